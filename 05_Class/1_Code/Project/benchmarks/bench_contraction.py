@@ -0,0 +1,78 @@
+"""收缩层次预处理与查询基准
+
+把 doc/线路.csv 复制为多个互不相连的城市（fixtures.replicate_csv）组成“全国”网络，
+为两种策略构建收缩层次，输出构建耗时、捷径数，并在同一批随机起终点上对比
+compiled 引擎（Dijkstra）与 ch 引擎的单次查询延迟；同时核对两者的路径代价一致。
+
+用法（在项目根目录下）::
+
+    python benchmarks/bench_contraction.py [查询数] [--copies 40] [--workers N]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import replicate_csv  # noqa: E402
+from main import _get_option  # noqa: E402
+from run_benchmarks import _percentile  # noqa: E402
+from services import graph_search  # noqa: E402
+from services.contraction import build_hierarchies  # noqa: E402
+from services.data_loader import DataLoader  # noqa: E402
+from config import DEFAULT_DATA_FILE  # noqa: E402
+
+
+def _cost(weights, graph, nodes):
+    """路径代价（相邻节点间取最小权重的边）"""
+    return sum(min(weights[e] for e in range(graph.offsets[a], graph.offsets[a + 1])
+                   if graph.targets[e] == b)
+               for a, b in zip(nodes, nodes[1:]))
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 and not sys.argv[1].startswith('--') else 500
+    copies = int(_get_option('--copies') or 40)
+    workers = _get_option('--workers')
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'national.csv')
+        replicate_csv(DEFAULT_DATA_FILE, copies, path)
+        graph = DataLoader().load_from_csv(path).compile()
+    print(f"网络: {graph}（{copies} 个城市）")
+
+    start = time.perf_counter()
+    hierarchies = build_hierarchies(graph, workers=int(workers) if workers else None)
+    print(f"预处理: {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(0)
+    n = graph.node_count
+    for strategy, hierarchy in hierarchies.items():
+        weights = graph.get_weights(strategy)
+        # 同城市内的起终点（跨城市不可达）
+        city_size = n // copies
+        pairs = []
+        for _ in range(total):
+            city = rng.randrange(copies) * city_size
+            pairs.append((city + rng.randrange(city_size), city + rng.randrange(city_size)))
+        plain, fast, mismatched = [], [], 0
+        for source, target in pairs:
+            begin = time.perf_counter()
+            pred = graph_search.dijkstra(graph, source, target, weights)
+            middle = time.perf_counter()
+            nodes = hierarchy.query(source, target)
+            plain.append(middle - begin)
+            fast.append(time.perf_counter() - middle)
+            expected = graph_search.reconstruct(pred, source, target)
+            mismatched += _cost(weights, graph, nodes) != _cost(weights, graph, expected)
+        print(f"{strategy}: {hierarchy}  Dijkstra p50 {_percentile(plain, 0.5) * 1000:.3f}ms  "
+              f"CH p50 {_percentile(fast, 0.5) * 1000:.3f}ms  "
+              f"p95 {_percentile(fast, 0.95) * 1000:.3f}ms  代价不一致 {mismatched}")
+
+
+if __name__ == "__main__":
+    main()
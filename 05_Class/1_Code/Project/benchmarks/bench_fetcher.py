@@ -0,0 +1,52 @@
+"""DataFetcher 数据处理阶段基准
+
+在合成的“全国”数据（多个城市，每个城市一份 JSON）上测量 JSON -> CSV 行的转换耗时。
+
+用法（在项目根目录下）::
+
+    python benchmarks/bench_fetcher.py                 # 默认 40 个城市
+    python benchmarks/bench_fetcher.py 200             # 指定城市数
+    python benchmarks/bench_fetcher.py --dump out.json # 仅写出单城市合成 JSON 夹具
+"""
+
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import national_payloads, synthetic_payload, write_payload  # noqa: E402
+from services.data_fetcher import DataFetcher  # noqa: E402
+
+
+def run(cities: int) -> None:
+    payloads = national_payloads(cities)
+    fetcher = DataFetcher()
+
+    start = time.perf_counter()
+    rows = 0
+    for payload in payloads:
+        for _ in fetcher.iter_rows(payload):
+            rows += 1
+    elapsed = time.perf_counter() - start
+    print(f"城市数: {cities}  行数: {rows}  耗时: {elapsed:.3f}s  ({rows / elapsed:,.0f} 行/秒)")
+
+    payload = synthetic_payload(lines=1000, stations_per_line=80)
+    start = time.perf_counter()
+    rows = len(fetcher.process(payload))
+    elapsed = time.perf_counter() - start
+    print(f"单份大 JSON: {rows} 行  耗时: {elapsed:.3f}s")
+
+
+def main() -> None:
+    if len(sys.argv) > 2 and sys.argv[1] == '--dump':
+        write_payload(sys.argv[2], synthetic_payload())
+        print(f"已写出: {sys.argv[2]}")
+        return
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 40)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""对象引擎边松弛速率对比
+
+同一批随机起终点分别用两种方式运行 object 引擎：
+* 现场计算：未绑定网络，每次松弛都调用 _get_neighbors_with_weight（比较站名、判定线路族）
+* 预计算：绑定网络，邻居与 (换乘, 代价) 权重取自 get_object_adjacency 生成的邻接表
+
+两种方式定下的节点完全相同，松弛次数先用计数子类单独统计一遍，再分别计时，输出每秒松弛次数。
+
+用法::
+
+    python benchmarks/bench_relaxations.py [查询数] [--lines 100 --stations 60]
+
+指定 --lines 时使用 fixtures 生成的合成网络（线路数 × 每线站数），否则使用 doc/线路.csv。
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import synthetic_payload  # noqa: E402
+from main import _get_option  # noqa: E402
+from services.data_fetcher import DataFetcher  # noqa: E402
+from services.data_loader import DataLoader  # noqa: E402
+from services.path_finder import PathFinder, get_object_adjacency  # noqa: E402
+from config import DEFAULT_DATA_FILE  # noqa: E402
+
+
+class _CountingFinder(PathFinder):
+    """统计现场计算方式下的松弛次数（每个定下节点的每个邻居计一次）"""
+
+    relaxations = 0
+
+    def _get_neighbors_with_weight(self, station, strategy):
+        neighbors = super()._get_neighbors_with_weight(station, strategy)
+        self.relaxations += len(neighbors)
+        return neighbors
+
+
+def load_network():
+    lines = _get_option('--lines')
+    if not lines:
+        return DataLoader().load_from_csv(DEFAULT_DATA_FILE)
+    payload = synthetic_payload(lines=int(lines), stations_per_line=int(_get_option('--stations') or 60))
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'synthetic.csv')
+        fetcher = DataFetcher()
+        fetcher.save_to_csv(fetcher.iter_rows(payload), path)
+        return DataLoader().load_from_csv(path)
+
+
+def run(finder: PathFinder, pairs) -> float:
+    start = time.perf_counter()
+    for a, b, strategy in pairs:
+        finder.find_path(a, b, strategy)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 and not sys.argv[1].startswith('--') else 200
+    network = load_network()
+    stations = list(network.stations_by_id.values())
+    rng = random.Random(0)
+    pairs = [(*rng.sample(stations, 2), rng.choice(("min_station", "min_transfer"))) for _ in range(total)]
+
+    counter = _CountingFinder(engine="object")
+    run(counter, pairs)
+    relaxations = counter.relaxations
+
+    build_start = time.perf_counter()
+    graph = network.compile()
+    for strategy in ("min_station", "min_transfer"):
+        get_object_adjacency(graph, strategy)
+    build_time = time.perf_counter() - build_start
+
+    before = run(PathFinder(engine="object"), pairs)
+    after = run(PathFinder(network, engine="object"), pairs)
+
+    print(f"网络: {network}  查询: {total}  松弛次数: {relaxations:,}")
+    print(f"现场计算: {before:.2f}s  {relaxations / before:,.0f} 次松弛/秒")
+    print(f"预计算:   {after:.2f}s  {relaxations / after:,.0f} 次松弛/秒  "
+          f"（邻接表构建 {build_time * 1000:.0f}ms，加速 {before / after:.2f}x）")
+
+
+if __name__ == "__main__":
+    main()
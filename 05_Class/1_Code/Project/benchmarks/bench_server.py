@@ -0,0 +1,84 @@
+"""HTTP 服务压测
+
+以多个线程、每线程一条 keep-alive 连接，向已启动的 ``src/server.py`` 发送随机起终点的 /route 请求，
+输出吞吐量与客户端侧延迟分位数；服务端各端点的延迟直方图可随后从 /metrics 读取。
+
+用法（先启动服务：python src/server.py --port 8000）::
+
+    python benchmarks/bench_server.py [请求总数] [--port 8000] [--threads 8] [--batch 0]
+
+``--batch N`` 表示改用 POST /route，每个请求携带 N 条查询。
+"""
+
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+
+from main import _get_option  # noqa: E402
+from services.data_loader import DataLoader  # noqa: E402
+from config import DEFAULT_DATA_FILE  # noqa: E402
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def main() -> None:
+    total = int(sys.argv[1]) if len(sys.argv) > 1 and not sys.argv[1].startswith('--') else 2000
+    port = int(_get_option('--port') or 8000)
+    threads = int(_get_option('--threads') or 8)
+    batch = int(_get_option('--batch') or 0)
+
+    names = list(DataLoader().load(DEFAULT_DATA_FILE).stations_by_name)
+    rng = random.Random(0)
+    queries = [f"{a}-{b}" for a, b in (rng.sample(names, 2) for _ in range(total))]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(chunk):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        local = []
+        step = batch or 1
+        for i in range(0, len(chunk), step):
+            start = time.perf_counter()
+            if batch:
+                body = json.dumps(chunk[i:i + batch], ensure_ascii=False).encode('utf-8')
+                conn.request('POST', '/route', body=body, headers={'Content-Type': 'application/json'})
+            else:
+                conn.request('GET', '/route?q=' + quote(chunk[i]))
+            response = conn.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+            if response.status >= 500:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    chunks = [queries[i::threads] for i in range(threads)]
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"查询: {total}  请求: {len(latencies)}  线程: {threads}  耗时: {elapsed:.2f}s  "
+          f"吞吐: {total / elapsed:,.0f} 查询/秒  5xx: {errors[0]}")
+    print(f"请求延迟 p50={percentile(latencies, 0.5) * 1000:.2f}ms  "
+          f"p95={percentile(latencies, 0.95) * 1000:.2f}ms  p99={percentile(latencies, 0.99) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
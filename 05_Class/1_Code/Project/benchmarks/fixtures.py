@@ -0,0 +1,74 @@
+"""基准测试用的合成数据
+
+生成与高德地铁接口结构相同的 JSON（``{"l": [{"ln": 线路名, "st": [{"n": 站名}, ...]}]}``），
+站名从有限的名字池中抽取，使不同线路之间产生大量同名换乘站；
+同时包含环线和同名分叉线路，覆盖 DataFetcher 的拓扑修复分支。
+"""
+
+import csv
+import json
+import random
+from typing import Dict, List
+
+
+def synthetic_payload(lines: int = 400, stations_per_line: int = 60,
+                      name_pool: int = 0, seed: int = 42) -> Dict[str, List[Dict]]:
+    """生成合成线路 JSON
+
+    Args:
+        lines: 线路数
+        stations_per_line: 每条线路的站点数
+        name_pool: 站名池大小，默认约为总站数的 60%（即约 40% 的站点参与换乘）
+        seed: 随机种子，保证结果可复现
+
+    Returns:
+        与 DataFetcher.fetch_raw() 返回值结构相同的字典
+    """
+    rng = random.Random(seed)
+    pool_size = name_pool or max(1, int(lines * stations_per_line * 0.6))
+    payload_lines = []
+    for index in range(lines):
+        names = []
+        used = set()
+        while len(names) < stations_per_line:
+            name = f"站{rng.randrange(pool_size)}"
+            if name not in used:
+                used.add(name)
+                names.append(name)
+        # 每 10 条线路中有一条与上一条同名（分叉线路）
+        line_no = index if index % 10 != 9 else index - 1
+        payload_lines.append({"ln": f"{line_no}号线", "st": [{"n": name} for name in names]})
+    # 环线（首尾不同，处理时会闭合）
+    payload_lines.append({"ln": "4号线", "st": [{"n": f"站{i}"} for i in range(stations_per_line)]})
+    return {"l": payload_lines}
+
+
+def national_payloads(cities: int = 40, lines: int = 25, stations_per_line: int = 30) -> List[Dict]:
+    """生成全国多个城市的合成数据（每个城市一份 JSON）"""
+    return [synthetic_payload(lines, stations_per_line, seed=city) for city in range(cities)]
+
+
+def replicate_csv(source: str, copies: int, path: str) -> None:
+    """把真实线路 CSV 复制为多个互不相连的“城市”（站点ID平移，线路名与站名加城市前缀）
+
+    随机站名生成的合成网络近似随机图，没有真实地铁网络的层次结构，
+    评估收缩层次等依赖层次的预处理时改用这份数据。
+    """
+    with open(source, 'r', encoding='utf-8', newline='') as f:
+        header, *rows = list(csv.reader(f))
+    offset = max(int(row[0]) for row in rows)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for city in range(copies):
+            shift = city * offset
+            for station_id, line_name, station_name, transfers in rows:
+                ids = '/'.join(str(int(x) + shift) for x in transfers.split('/') if x)
+                writer.writerow([int(station_id) + shift, f"C{city}-{line_name}",
+                                 f"C{city}-{station_name}", ids])
+
+
+def write_payload(path: str, payload: Dict) -> None:
+    """将合成数据写为 JSON 文件，便于离线重复使用"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
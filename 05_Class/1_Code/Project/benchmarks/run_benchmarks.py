@@ -0,0 +1,204 @@
+"""热点路径基准套件
+
+对以下操作分别在真实数据（doc/线路.csv）和放大 10 倍、100 倍的合成网络上计时，
+记录每次调用的 p50 / p95 延迟，以及单次调用的峰值内存分配（tracemalloc，单独一轮测量，不影响计时）：
+
+* load_from_csv     DataLoader.load_from_csv
+* find_path         PathFinder.find_path（config.PATH_ENGINE，随机起终点）
+* search_stations   MetroNetwork.search_stations（随机站名片段）
+* fetcher_process   DataFetcher.process（对应规模的 JSON）
+
+用法（在项目根目录下）::
+
+    python benchmarks/run_benchmarks.py                 # 运行并与 baseline.json 对比
+    python benchmarks/run_benchmarks.py --save          # 运行并覆盖 baseline.json
+    python benchmarks/run_benchmarks.py --check         # p50 比基线慢超过阈值时以非零状态退出
+    python benchmarks/run_benchmarks.py --scales 1x,10x # 只跑部分规模
+"""
+
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import synthetic_payload  # noqa: E402
+from services.data_loader import DataLoader  # noqa: E402
+from services.data_fetcher import DataFetcher  # noqa: E402
+from services.path_finder import PathFinder  # noqa: E402
+from services.network_diff import network_rows  # noqa: E402
+from config import DEFAULT_DATA_FILE, PATH_ENGINE  # noqa: E402
+
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+# p50 超过基线的该倍数视为退化
+REGRESSION_RATIO = 1.5
+
+# 规模 -> (合成线路数, 每线站数)；1x 使用真实数据
+SCALES = {
+    '1x': None,
+    '10x': (100, 60),
+    '100x': (1000, 60),
+}
+# 各规模下每项操作的重复次数
+REPEATS = {
+    '1x': {'load_from_csv': 30, 'find_path': 300, 'search_stations': 500, 'fetcher_process': 50},
+    '10x': {'load_from_csv': 5, 'find_path': 100, 'search_stations': 300, 'fetcher_process': 5},
+    '100x': {'load_from_csv': 3, 'find_path': 20, 'search_stations': 100, 'fetcher_process': 3},
+}
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def measure(calls: List[Callable[[], object]]) -> Dict[str, float]:
+    """逐个执行调用并统计延迟；再对前几个调用测量峰值内存"""
+    gc.collect()  # 避免上一项操作遗留的垃圾计入本项
+    durations = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - start)
+
+    peaks = []
+    for call in calls[:min(len(calls), 5)]:
+        tracemalloc.start()
+        call()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'n': len(durations),
+        'p50_ms': round(_percentile(durations, 0.50) * 1000, 4),
+        'p95_ms': round(_percentile(durations, 0.95) * 1000, 4),
+        'mean_ms': round(sum(durations) / len(durations) * 1000, 4),
+        'peak_kb': round(max(peaks) / 1024, 1),
+    }
+
+
+def _real_payload(network) -> Dict:
+    """由真实网络反推出接口 JSON（每条线路的站名序列），供 fetcher_process 使用"""
+    lines: Dict[str, List[Dict[str, str]]] = {}
+    for row in network_rows(network):
+        lines.setdefault(row['线路名'], []).append({'n': row['站名']})
+    return {'l': [{'ln': name, 'st': stations} for name, stations in lines.items()]}
+
+
+def prepare(scale: str, workdir: str):
+    """准备某一规模的 CSV 文件与接口 JSON"""
+    shape = SCALES[scale]
+    if shape is None:
+        network = DataLoader().load_from_csv(DEFAULT_DATA_FILE)
+        return DEFAULT_DATA_FILE, _real_payload(network)
+    payload = synthetic_payload(lines=shape[0], stations_per_line=shape[1])
+    csv_path = os.path.join(workdir, f'{scale}.csv')
+    fetcher = DataFetcher()
+    fetcher.save_to_csv(fetcher.iter_rows(payload), csv_path)
+    return csv_path, payload
+
+
+def run_scale(scale: str, workdir: str) -> Dict[str, Dict[str, float]]:
+    csv_path, payload = prepare(scale, workdir)
+    repeats = REPEATS[scale]
+    rng = random.Random(0)
+    results = {}
+
+    results['load_from_csv'] = measure(
+        [lambda: DataLoader().load_from_csv(csv_path)] * repeats['load_from_csv'])
+
+    network = DataLoader().load_from_csv(csv_path)
+    finder = PathFinder(network, engine=PATH_ENGINE)
+    stations = list(network.stations_by_id.values())
+    pairs = [rng.sample(stations, 2) for _ in range(repeats['find_path'])]
+    finder.find_path(*pairs[0])  # 预热：地标等派生数据
+    results['find_path'] = measure([lambda a=a, b=b: finder.find_path(a, b) for a, b in pairs])
+
+    names = list(network.stations_by_name)
+    network.search_stations(names[0])  # 预热：构建检索索引
+    keywords = []
+    for _ in range(repeats['search_stations']):
+        name = rng.choice(names)
+        start = rng.randrange(len(name))
+        keywords.append(name[start:start + rng.randint(1, 3)])
+    results['search_stations'] = measure(
+        [lambda k=k: network.search_stations(k, limit=50) for k in keywords])
+
+    fetcher = DataFetcher()
+    results['fetcher_process'] = measure(
+        [lambda: fetcher.process(payload)] * repeats['fetcher_process'])
+
+    results['_stations'] = {'n': network.get_station_count()}
+    return results
+
+
+def compare(current: Dict, baseline: Optional[Dict]) -> List[str]:
+    """打印结果表并返回退化项"""
+    regressions = []
+    header = f"{'规模':<6}{'操作':<18}{'p50(ms)':>10}{'p95(ms)':>10}{'峰值内存(KB)':>14}{'基线p50':>10}{'变化':>8}"
+    print(header)
+    for scale, ops in current['results'].items():
+        for op, stats in ops.items():
+            if op.startswith('_'):
+                continue
+            base = (baseline or {}).get('results', {}).get(scale, {}).get(op)
+            ratio = ''
+            base_p50 = ''
+            if base:
+                base_p50 = f"{base['p50_ms']:.3f}"
+                change = stats['p50_ms'] / base['p50_ms'] if base['p50_ms'] else 1.0
+                ratio = f"{change:.2f}x"
+                if change > REGRESSION_RATIO:
+                    regressions.append(f"{scale}/{op}: p50 {base['p50_ms']:.3f} -> {stats['p50_ms']:.3f} ms")
+            print(f"{scale:<6}{op:<18}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+                  f"{stats['peak_kb']:>14.1f}{base_p50:>10}{ratio:>8}")
+    return regressions
+
+
+def main() -> None:
+    scales = list(SCALES)
+    if '--scales' in sys.argv:
+        scales = sys.argv[sys.argv.index('--scales') + 1].split(',')
+    current = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'engine': PATH_ENGINE,
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            start = time.perf_counter()
+            current['results'][scale] = run_scale(scale, workdir)
+            print(f"[{scale}] 站点数 {current['results'][scale]['_stations']['n']}，"
+                  f"用时 {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    baseline = None
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = compare(current, baseline)
+
+    if '--save' in sys.argv:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"基线已保存: {BASELINE_FILE}")
+    elif regressions:
+        print("\n性能退化（p50 超过基线 %.1f 倍）：" % REGRESSION_RATIO)
+        for item in regressions:
+            print("  " + item)
+        if '--check' in sys.argv:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""本地高德接口桩服务器
+
+对任意 GET 路径返回同一份夹具 JSON，支持 ETag / Last-Modified 条件请求（返回 304），
+并可让前若干次请求返回 503，用于检验 DataFetcher 的重试、缓存与条件请求逻辑。
+
+用法（在项目根目录下）::
+
+    python benchmarks/stub_server.py [夹具.json] [端口]
+
+然后 ``DataFetcher(api_url="http://127.0.0.1:端口/{city}.json")``。也可在脚本中使用::
+
+    with StubServer(payload) as server:
+        fetcher = DataFetcher(api_url=server.url_template, cache_dir=tmp_dir)
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import synthetic_payload  # noqa: E402
+
+
+class StubServer:
+    """在后台线程中运行的桩服务器
+
+    Attributes:
+        requests: 收到的请求数
+        not_modified: 返回 304 的次数
+        fail_next: 接下来需要返回 503 的请求数
+        delay: 每个请求的模拟网络延迟（秒）
+    """
+
+    def __init__(self, payload: Dict, port: int = 0, fail_next: int = 0, delay: float = 0.0):
+        self.requests = 0
+        self.delay = delay
+        self.not_modified = 0
+        self.fail_next = fail_next
+        self.set_payload(payload)
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    def set_payload(self, payload: Dict) -> None:
+        """替换返回的数据（ETag 与 Last-Modified 随之变化）"""
+        self.body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.etag = '"%s"' % hashlib.sha1(self.body).hexdigest()
+        self.last_modified = formatdate(usegmt=True)
+
+    @property
+    def url_template(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/{{code}}_drw_{{city}}.json"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.fail_next > 0:
+                    stub.fail_next -= 1
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if (self.headers.get("If-None-Match") == stub.etag
+                        or self.headers.get("If-Modified-Since") == stub.last_modified):
+                    stub.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", stub.etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(stub.body)))
+                self.send_header("ETag", stub.etag)
+                self.send_header("Last-Modified", stub.last_modified)
+                self.end_headers()
+                self.wfile.write(stub.body)
+
+            def log_message(self, format, *args):  # 保持输出安静
+                pass
+
+        return Handler
+
+    def start(self) -> 'StubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    else:
+        payload = synthetic_payload(lines=20, stations_per_line=30)
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+    server = StubServer(payload, port=port)
+    print(f"桩服务器已启动: {server.url_template}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
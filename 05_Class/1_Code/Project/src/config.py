@@ -14,6 +14,43 @@ DOC_DIR = os.path.join(PROJECT_ROOT, 'doc')
 # 默认数据文件路径
 DEFAULT_DATA_FILE = os.path.join(DOC_DIR, '线路.csv')
 
+# 默认城市（其数据文件为 DEFAULT_DATA_FILE）
+DEFAULT_CITY = 'shanghai'
+
+# 其他城市的数据目录：doc/cities/<城市拼音>/线路.csv
+CITIES_DIR = os.path.join(DOC_DIR, 'cities')
+
+# 多城市网络缓存的容量上限（按站点总数估算内存），超出时淘汰最久未使用的城市
+CITY_CACHE_MAX_STATIONS = 100000
+
+# 启动后在后台预加载的热门城市
+PREFETCH_CITIES = []
+
+# 在线抓取：响应缓存目录（压缩的原始 JSON + ETag/Last-Modified），超时秒数与重试次数
+FETCH_CACHE_DIR = os.path.join(DOC_DIR, 'cache')
+FETCH_TIMEOUT = 15
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 0.5
+
+# 时间相关路径（--depart）的缺省参数（秒），用于数据文件旁的 时刻.csv 缺失或未列出的区间/换乘/线路
+DEFAULT_RUN_SECONDS = 120         # 相邻站运行时间
+DEFAULT_DWELL_SECONDS = 30        # 停站时间
+DEFAULT_WALK_SECONDS = 180        # 跨线路换乘步行时间
+SAME_FAMILY_WALK_SECONDS = 0      # 同线路族（环线闭合、主线/支线）同名站之间
+DEFAULT_HEADWAY_SECONDS = 300     # 发车间隔
+DEFAULT_FIRST_TRAIN = '05:30'
+DEFAULT_LAST_TRAIN = '23:00'
+
+# 路径搜索引擎："object" / "compiled" / "bidirectional" / "astar" / "hub" / "ch"
+# （ch 使用 --precompute-ch 生成的收缩层次，未生成时首次查询在当前进程中构建）
+PATH_ENGINE = 'compiled'
+
+# 路径查询 LRU 缓存容量（<= 0 表示禁用）
+ROUTE_CACHE_SIZE = 1024
+
+# 请求级性能埋点（各阶段耗时与搜索计数），默认关闭；命令行 --trace 可临时开启
+TRACE_ENABLED = False
+
 # 线路颜色（如缺失则前端可回退为灰色）
 LINE_COLORS = {
     '1号线': '#E3002C',
@@ -45,3 +82,10 @@ SYSTEM_CONFIG = {
     'encoding': 'utf-8',
     'debug': False
 }
+
+
+def get_city_data_file(city: str) -> str:
+    """获取城市对应的线路数据文件路径"""
+    if city == DEFAULT_CITY:
+        return DEFAULT_DATA_FILE
+    return os.path.join(CITIES_DIR, city, '线路.csv')
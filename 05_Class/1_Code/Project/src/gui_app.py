@@ -1,23 +1,76 @@
 """地铁换乘路径规划系统 - Tkinter GUI入口
 
 提供桌面界面：起终点输入、策略选择、结果展示，并复用 MetroPathPlanner 作为后端。
+路径查询与在线更新在工作线程中执行，结果通过 after() 轮询交回 Tk 主线程；
+结果画布只绘制可见区域内的行，线路树在展开时才插入站点。
 """
 
+import queue
 import re
+import threading
 import tkinter as tk
 from tkinter import messagebox, ttk
 import ttkbootstrap as tb
-from ttkbootstrap.constants import BOTH, YES, LEFT, RIGHT, X, Y, VERTICAL
-from typing import List, Optional, Tuple, Union, Any
+from ttkbootstrap.constants import BOTH, YES, LEFT, RIGHT, X, Y, VERTICAL, HORIZONTAL
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
 from main import MetroPathPlanner
 from config import LINE_COLORS
 
 
+# 下拉框联想最多展示的站点数
+FILTER_LIMIT = 50
+# 工作线程结果的轮询间隔（毫秒）
+POLL_INTERVAL_MS = 30
+
+# 路线画布布局：首行纵坐标、行距、站点圆半径、文字偏移、列宽、列左边距
+ROUTE_Y_START = 40
+ROUTE_STEP = 70
+ROUTE_RADIUS = 10
+ROUTE_TEXT_OFFSET = 20
+ROUTE_COLUMN_WIDTH = 320
+ROUTE_X_START = 120
+# 可见区域上下额外绘制的行数，减少滚动时的闪烁
+ROUTE_OVERSCAN = 3
+
+# 线路树中未展开线路的占位子节点
+_TREE_PLACEHOLDER = "加载中…"
+
+
 def _is_station(obj: Any) -> bool:
     return hasattr(obj, "station_name") and hasattr(obj, "line_name")
 
 
+class RouteRow(NamedTuple):
+    """路线中的一行（站点或换乘标记），connector 为与上一行之间连线的颜色，首行为 None"""
+    is_station: bool
+    label: str
+    color: str
+    connector: Optional[str]
+
+
+def layout_route(path: List[Any]) -> List[RouteRow]:
+    """把路径转换为逐行的绘制参数（不创建任何画布元素）"""
+    rows: List[RouteRow] = []
+    prev_color: Optional[str] = None
+    for item in path:
+        if _is_station(item):
+            color = LINE_COLORS.get(getattr(item, "line_name", ""), '#888888')
+            label = f"{getattr(item, 'station_name', '')} ({getattr(item, 'line_name', '')})"
+            rows.append(RouteRow(True, label, color, (prev_color or color) if rows else None))
+            prev_color = color
+        else:  # 换乘
+            rows.append(RouteRow(False, "换乘", '#666666', '#666666'))
+    return rows
+
+
+def visible_rows(top: float, bottom: float, total: int) -> range:
+    """画布纵坐标 [top, bottom] 覆盖的行下标范围（含上下预留行）"""
+    first = int((top - ROUTE_Y_START) // ROUTE_STEP) - ROUTE_OVERSCAN
+    last = int((bottom - ROUTE_Y_START) // ROUTE_STEP) + ROUTE_OVERSCAN
+    return range(max(0, first), min(total, last + 1))
+
+
 class MetroGUI:
     def __init__(self, root: tb.Window, planner: MetroPathPlanner):
         self.root = root
@@ -26,6 +79,13 @@ class MetroGUI:
         self.root.minsize(800, 600)
         self.planner = planner
         self.all_station_options: List[str] = []
+        # 当前结果的逐行布局（每条路线一列）及已绘制的行范围
+        self._route_rows: List[List[RouteRow]] = []
+        self._drawn_window: Optional[Tuple[int, int]] = None
+        # 各类后台任务的最新序号，过期任务的结果被丢弃
+        self._jobs: Dict[str, int] = {}
+        # 查询在工作线程中串行执行（路径缓存等结构非线程安全）
+        self._query_lock = threading.Lock()
 
         # 样式设置
         style = ttk.Style()
@@ -49,6 +109,7 @@ class MetroGUI:
 
         content = tb.Labelframe(container, text="规划结果", padding=10, bootstyle="default")
         content.pack(side=LEFT, fill=BOTH, expand=YES)
+        self.content = content
 
         # 输入区
         tb.Label(sidebar, text="起点站", bootstyle="secondary").pack(anchor="w")
@@ -70,12 +131,22 @@ class MetroGUI:
         tb.Radiobutton(strategy_frame, text="最少换乘", variable=self.strategy_var, value="min_transfer",
                       bootstyle="toolbutton-outline").pack(side=LEFT, fill=X, expand=YES, padx=2)
 
+        # 备选路线数
+        alt_frame = tb.Frame(sidebar)
+        alt_frame.pack(fill=X, pady=4)
+        tb.Label(alt_frame, text="备选路线数", bootstyle="secondary").pack(side=LEFT)
+        self.route_count_var = tk.IntVar(value=1)
+        ttk.Spinbox(alt_frame, from_=1, to=5, width=5, textvariable=self.route_count_var,
+                    state="readonly").pack(side=RIGHT)
+
         # 按钮组
         btn_frame = tb.Frame(sidebar)
         btn_frame.pack(fill=X, pady=12)
         tb.Button(btn_frame, text="查询路线", command=self.on_search, bootstyle="success").pack(fill=X, pady=4)
         tb.Separator(sidebar).pack(fill=X, pady=6)
-        tb.Button(sidebar, text="更新数据", command=self.on_update_data, bootstyle="info-outline").pack(fill=X, pady=4)
+        self.update_button = tb.Button(sidebar, text="更新数据", command=self.on_update_data,
+                                       bootstyle="info-outline")
+        self.update_button.pack(fill=X, pady=4)
         tb.Button(sidebar, text="查看线路图", command=self.on_view_network, bootstyle="info-outline").pack(fill=X, pady=4)
 
         # 结果区域：Canvas + Scrollbar
@@ -83,9 +154,54 @@ class MetroGUI:
         result_frame.pack(fill=BOTH, expand=YES)
         self.canvas = tk.Canvas(result_frame, background='white', highlightthickness=0)
         self.v_scroll = tb.Scrollbar(result_frame, orient=VERTICAL, command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=self.v_scroll.set)
+        self.h_scroll = tb.Scrollbar(content, orient=HORIZONTAL, command=self.canvas.xview)
+        # 纵向视图变化（滚动、窗口缩放）时补画新进入可见区域的行
+        self.canvas.configure(yscrollcommand=self._on_yscroll, xscrollcommand=self.h_scroll.set)
+        self.canvas.bind('<Configure>', lambda e: self._render_visible())
         self.canvas.pack(side=LEFT, fill=BOTH, expand=YES)
         self.v_scroll.pack(side=RIGHT, fill=Y)
+        self.h_scroll.pack(fill=X)
+
+    def _run_async(self, job: str, func: Callable[[], Any], on_done: Callable[[Any], None],
+                   on_finally: Optional[Callable[[], None]] = None) -> None:
+        """在工作线程中执行 func，由 Tk 主线程轮询结果后调用 on_done
+
+        同一 job 名下只有最后一次提交的结果会被处理；异常以错误对话框显示。
+
+        Args:
+            job: 任务类别，如 "search"
+            func: 在工作线程中执行的函数（不得访问 Tk 控件）
+            on_done: 在主线程中以 func 的返回值调用
+            on_finally: 无论成败、是否过期，都在主线程中调用
+        """
+        token = self._jobs[job] = self._jobs.get(job, 0) + 1
+        results: "queue.Queue[Tuple[bool, Any]]" = queue.Queue(maxsize=1)
+
+        def worker():
+            try:
+                results.put((True, func()))
+            except Exception as e:
+                results.put((False, e))
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(POLL_INTERVAL_MS, self._poll, job, token, results, on_done, on_finally)
+
+    def _poll(self, job: str, token: int, results: "queue.Queue[Tuple[bool, Any]]",
+              on_done: Callable[[Any], None], on_finally: Optional[Callable[[], None]]) -> None:
+        try:
+            ok, value = results.get_nowait()
+        except queue.Empty:
+            self.root.after(POLL_INTERVAL_MS, self._poll, job, token, results, on_done, on_finally)
+            return
+        if on_finally is not None:
+            on_finally()
+        if token != self._jobs.get(job):
+            return
+        if ok:
+            on_done(value)
+        else:
+            messagebox.showerror("错误", str(value))
+
     def on_search(self):
         start = self.entry_start.get().strip()
         end = self.entry_end.get().strip()
@@ -96,23 +212,34 @@ class MetroGUI:
             return
 
         # 解析输入：允许格式 “线路，站名-线路，站名” 或 仅“站名-站名”
-        try:
-            start_line, start_name = self._parse_input_text(start)
-            end_line, end_name = self._parse_input_text(end)
+        start_line, start_name = self._parse_input_text(start)
+        end_line, end_name = self._parse_input_text(end)
+        route_count = self.route_count_var.get()
+
+        def search():
+            with self._query_lock:
+                if route_count > 1:
+                    return self.planner.get_routes(start_line, start_name, end_line, end_name,
+                                                   strategy=strategy, k=route_count)
+                return [self.planner.get_route(start_line, start_name, end_line, end_name, strategy=strategy)]
 
-            path = self.planner.get_route(start_line, start_name, end_line, end_name, strategy=strategy)
-            self._draw_route(path)
-        except Exception as e:
-            messagebox.showerror("错误", str(e))
+        self.content.configure(text="规划结果（查询中…）")
+        self._run_async("search", search, self._draw_routes,
+                        on_finally=lambda: self.content.configure(text="规划结果"))
 
     def on_update_data(self):
-        result = self.planner.update_data_online()
-        messagebox.showinfo("更新结果", result)
-        # 更新下拉列表数据
-        if self.planner.network:
-            self.all_station_options = self.planner.network.get_all_station_names_with_line()
-            self.entry_start['values'] = self.all_station_options
-            self.entry_end['values'] = self.all_station_options
+        self.update_button.configure(state=tk.DISABLED, text="正在更新…")
+
+        def done(result: str):
+            messagebox.showinfo("更新结果", result)
+            # 更新下拉列表数据
+            if self.planner.network:
+                self.all_station_options = self.planner.network.get_all_station_names_with_line()
+                self.entry_start['values'] = self.all_station_options
+                self.entry_end['values'] = self.all_station_options
+
+        self._run_async("update", self.planner.update_data_online, done,
+                        on_finally=lambda: self.update_button.configure(state=tk.NORMAL, text="更新数据"))
 
     def on_view_network(self):
         if not self.planner.network:
@@ -127,42 +254,77 @@ class MetroGUI:
         tree.configure(yscrollcommand=scrollbar.set)
 
         tree.heading('#0', text='线路 / 站点')
-        for line_name, line in self.planner.network.lines.items():
+        # 只插入线路，站点在首次展开时再插入
+        lines = dict(self.planner.network.lines)
+        for line_name in lines:
             line_id = tree.insert('', 'end', text=line_name)
-            for st in line.stations:
+            tree.insert(line_id, 'end', text=_TREE_PLACEHOLDER)
+
+        def on_open(_event):
+            line_id = tree.focus()
+            children = tree.get_children(line_id)
+            if len(children) != 1 or tree.item(children[0], 'text') != _TREE_PLACEHOLDER:
+                return
+            tree.delete(children[0])
+            line = lines.get(tree.item(line_id, 'text'))
+            for st in (line.stations if line else []):
                 tree.insert(line_id, 'end', text=st.station_name)
 
-    def _draw_route(self, path: List[Any]):
-        self.canvas.delete('all')
-        if not path:
-            return
-
-        y_start = 40
-        step = 70
-        x_line = 120
-        radius = 10
-        text_offset = 20
-        prev_pos = None
-        prev_color = None
-
-        for idx, item in enumerate(path):
-            y = y_start + idx * step
-            if _is_station(item):
-                color = LINE_COLORS.get(getattr(item, "line_name", ""), '#888888')
-                if prev_pos is not None:
-                    self.canvas.create_line(x_line, prev_pos, x_line, y, fill=prev_color or color, width=4)
-                self.canvas.create_oval(x_line - radius, y - radius, x_line + radius, y + radius, fill=color, outline=color)
-                label = f"{getattr(item, 'station_name', '')} ({getattr(item, 'line_name', '')})"
-                self.canvas.create_text(x_line + text_offset, y, text=label, anchor=tk.W, font=('Microsoft YaHei', 10))
-                prev_color = color
-                prev_pos = y
-            else:  # 换乘
-                self.canvas.create_line(x_line, prev_pos or y, x_line, y, fill='#666666', width=2, dash=(4,2))
-                self.canvas.create_text(x_line + text_offset, y, text="换乘", anchor=tk.W, font=('Microsoft YaHei', 9, 'italic'), fill='#666666')
-                prev_pos = y
+        tree.bind('<<TreeviewOpen>>', on_open)
 
+    def _draw_routes(self, paths: List[List[Any]]):
+        """并排展示多条路线，每条一列；只计算布局，实际绘制交给 _render_visible"""
+        self.canvas.delete('all')
+        self._route_rows = [layout_route(path) for path in paths]
+        self._drawn_window = None
+        if len(paths) > 1:
+            for col in range(len(paths)):
+                self.canvas.create_text(ROUTE_X_START + col * ROUTE_COLUMN_WIDTH, 15, text=f"方案 {col + 1}",
+                                        anchor=tk.W, font=('Microsoft YaHei', 10, 'bold'))
+        max_len = max((len(rows) for rows in self._route_rows), default=0)
         # scroll region
-        self.canvas.configure(scrollregion=(0, 0, 800, y_start + len(path) * step))
+        self.canvas.configure(scrollregion=(0, 0, ROUTE_X_START + len(paths) * ROUTE_COLUMN_WIDTH,
+                                            ROUTE_Y_START + max_len * ROUTE_STEP))
+        self.canvas.yview_moveto(0)
+        self._render_visible()
+
+    def _on_yscroll(self, first: str, last: str) -> None:
+        self.v_scroll.set(first, last)
+        self._render_visible()
+
+    def _render_visible(self) -> None:
+        """重绘当前可见区域内的路线行（窗口未变化时不做任何事）"""
+        if not self._route_rows:
+            return
+        total = max(len(rows) for rows in self._route_rows)
+        top = self.canvas.canvasy(0)
+        window = visible_rows(top, top + self.canvas.winfo_height(), total)
+        if (window.start, window.stop) == self._drawn_window:
+            return
+        self._drawn_window = (window.start, window.stop)
+        self.canvas.delete('route')
+        for col, rows in enumerate(self._route_rows):
+            x_line = ROUTE_X_START + col * ROUTE_COLUMN_WIDTH
+            for idx in window:
+                if idx < len(rows):
+                    self._draw_row(rows[idx], idx, x_line)
+
+    def _draw_row(self, row: RouteRow, idx: int, x_line: int) -> None:
+        """绘制一行及其与上一行之间的连线"""
+        y = ROUTE_Y_START + idx * ROUTE_STEP
+        canvas = self.canvas
+        if row.is_station:
+            if row.connector is not None:
+                canvas.create_line(x_line, y - ROUTE_STEP, x_line, y, fill=row.connector, width=4, tags='route')
+            canvas.create_oval(x_line - ROUTE_RADIUS, y - ROUTE_RADIUS, x_line + ROUTE_RADIUS, y + ROUTE_RADIUS,
+                               fill=row.color, outline=row.color, tags='route')
+            canvas.create_text(x_line + ROUTE_TEXT_OFFSET, y, text=row.label, anchor=tk.W,
+                               font=('Microsoft YaHei', 10), tags='route')
+        else:  # 换乘
+            canvas.create_line(x_line, y - ROUTE_STEP if idx else y, x_line, y, fill=row.connector,
+                               width=2, dash=(4, 2), tags='route')
+            canvas.create_text(x_line + ROUTE_TEXT_OFFSET, y, text=row.label, anchor=tk.W,
+                               font=('Microsoft YaHei', 9, 'italic'), fill=row.color, tags='route')
 
     def _on_filter(self, combo: ttk.Combobox):
         keyword = combo.get().strip()
@@ -170,7 +332,7 @@ class MetroGUI:
             return
 
         if keyword:
-            matches = self.planner.network.search_stations(keyword)
+            matches = self.planner.network.search_stations(keyword, limit=FILTER_LIMIT)
             values = [self._format_station_option(s) for s in matches]
         else:
             values = self.all_station_options
@@ -214,6 +376,7 @@ def main():
     if not planner.load_data():
         messagebox.showerror("错误", "数据加载失败，无法启动应用")
         return
+    planner.prefetch_cities()
 
     root = tb.Window(themename="cosmo")
     app = MetroGUI(root, planner)
@@ -3,9 +3,12 @@
 该程序实现了地铁换乘路径的智能规划功能。
 """
 
+import contextlib
 import sys
+import threading
+import time
 import os
-from typing import Optional, List, Union
+from typing import Dict, Optional, List, Tuple, Union
 
 # 添加src目录到路径，以便导入模块
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,29 +16,52 @@ sys.path.insert(0, current_dir)
 
 from models.station import Station
 from models.network import MetroNetwork
+from models.compiled_graph import STRATEGIES
 from services.data_loader import DataLoader, DataLoadError
 from services.data_fetcher import DataFetcher, FetchError
 from services.path_finder import PathFinder, PathNotFoundError
+from services.route_table import RouteTable, RouteTableError, default_table_path
+from services.contraction import (ContractionError, attach_hierarchies, build_hierarchies,
+                                  build_in_background, checkpoint_path, default_hierarchy_path,
+                                  load_hierarchies, save_hierarchies)
+from services.route_cache import RouteCache
+from services.batch_router import BatchRouter
+from services.network_registry import NetworkRegistry
+from services.network_diff import diff_network, same_topology
+from services.bulk_fetcher import BulkFetcher, format_report
+from services.time_router import (TimeRouter, TimetableError, default_timetable_path,
+                                  parse_clock)
 from utils.parser import Parser, InvalidInputError
 from utils.formatter import Formatter
-from config import DEFAULT_DATA_FILE
+from utils.instrumentation import Tracer
+from config import (DEFAULT_DATA_FILE, DEFAULT_CITY, PATH_ENGINE, ROUTE_CACHE_SIZE,
+                    PREFETCH_CITIES, TRACE_ENABLED)
 
 
 class MetroPathPlanner:
     """地铁换乘路径规划系统主类"""
     
-    def __init__(self, data_file: str = DEFAULT_DATA_FILE):
+    def __init__(self, data_file: str = DEFAULT_DATA_FILE, city: str = DEFAULT_CITY):
         """初始化系统
         
         Args:
             data_file: CSV数据文件路径
+            city: data_file 对应的城市，其余城市由 registry 按需加载
         """
         self.data_file = data_file
+        self.city = city
+        self.registry = NetworkRegistry()
+        self._update_lock = threading.Lock()
         self.network: Optional[MetroNetwork] = None
-        self.path_finder = PathFinder()
+        self.route_table: Optional[RouteTable] = None
+        self.route_cache = RouteCache(ROUTE_CACHE_SIZE)
+        self._time_router: Optional[TimeRouter] = None
+        self.path_finder = PathFinder(engine=PATH_ENGINE)
         self.parser = Parser()
         self.formatter = Formatter()
-        self.data_fetcher = DataFetcher()
+        self.data_fetcher = DataFetcher(city)
+        # 性能埋点，默认关闭；开启后逐请求向标准错误输出一行 JSON
+        self.tracer = Tracer(TRACE_ENABLED, sys.stderr)
     
     def load_data(self) -> bool:
         """加载地铁数据
@@ -45,12 +71,87 @@ class MetroPathPlanner:
         """
         try:
             loader = DataLoader()
-            self.network = loader.load_from_csv(self.data_file)
+            self.network = loader.load(self.data_file)
+            self.path_finder.set_network(self.network)
+            self.route_cache.invalidate()
+            self.registry.put(self.city, self.network)
             print(f"✓ 成功加载数据: {self.network}")
+            if loader.malformed_rows:
+                print(self.formatter.format_info(f"已跳过{loader.describe_malformed()}"))
+            self._load_route_table()
+            self._load_hierarchies()
             return True
         except DataLoadError as e:
             print(self.formatter.format_error(f"加载数据失败: {str(e)}"))
             return False
+
+    def _load_route_table(self) -> None:
+        """若存在与当前数据匹配的预计算路径表则加载，否则回退为在线搜索"""
+        self.route_table = None
+        table_path = default_table_path(self.data_file)
+        if not os.path.exists(table_path):
+            return
+        try:
+            self.route_table = RouteTable.load(table_path, self.network.compile())
+            print("✓ 已加载预计算路径表")
+        except RouteTableError as e:
+            print(self.formatter.format_info(f"未使用预计算路径表: {str(e)}"))
+
+    def _load_hierarchies(self) -> None:
+        """ch 引擎下若存在与当前数据匹配的收缩层次则加载，否则首次查询时在当前进程中构建"""
+        hierarchy_path = default_hierarchy_path(self.data_file)
+        if PATH_ENGINE != "ch" or not os.path.exists(hierarchy_path):
+            return
+        graph = self.network.compile()
+        try:
+            attach_hierarchies(graph, load_hierarchies(hierarchy_path, graph))
+            print("✓ 已加载收缩层次")
+        except ContractionError as e:
+            print(self.formatter.format_info(f"未使用收缩层次: {str(e)}"))
+
+    def precompute_hierarchies(self, workers: Optional[int] = None) -> str:
+        """离线构建收缩层次并保存到数据文件旁
+
+        构建过程中每轮写入检查点，中断后再次执行会从检查点继续。
+
+        Args:
+            workers: 并行进程数，None 为 CPU 核数
+
+        Returns:
+            结果提示字符串
+        """
+        if self.network is None:
+            return self.formatter.format_error("系统未初始化，请先加载数据")
+        hierarchy_path = default_hierarchy_path(self.data_file)
+        try:
+            graph = self.network.compile()
+            hierarchies = build_hierarchies(graph, workers=workers,
+                                            checkpoint=checkpoint_path(hierarchy_path))
+            save_hierarchies(hierarchy_path, graph, hierarchies)
+            attach_hierarchies(graph, hierarchies)
+            shortcuts = sum(h.shortcut_count for h in hierarchies.values())
+            return self.formatter.format_info(f"收缩层次已生成: {hierarchy_path}（捷径 {shortcuts} 条）")
+        except (ContractionError, OSError) as e:
+            return self.formatter.format_error(str(e))
+
+    def precompute_routes(self, workers: Optional[int] = None) -> str:
+        """离线预计算全源路径表并保存到数据文件旁
+
+        Args:
+            workers: 并行进程数，None 为 CPU 核数
+
+        Returns:
+            结果提示字符串
+        """
+        if self.network is None:
+            return self.formatter.format_error("系统未初始化，请先加载数据")
+        try:
+            table = RouteTable.build(self.network.compile(), workers=workers)
+            table.save(default_table_path(self.data_file))
+            self.route_table = table
+            return self.formatter.format_info(f"路径表已生成: {default_table_path(self.data_file)}")
+        except RouteTableError as e:
+            return self.formatter.format_error(str(e))
     
     def find_route(self, start_line: Optional[str], start_station: str, 
                    end_line: Optional[str], end_station: str, strategy: str = "min_station") -> str:
@@ -67,85 +168,362 @@ class MetroPathPlanner:
             格式化的路径字符串
         """
         try:
-            path = self.get_route(start_line, start_station, end_line, end_station, strategy)
-            return self.formatter.format_path(path)
+            with self.tracer.request("route") as trace:
+                path = self.get_route(start_line, start_station, end_line, end_station, strategy)
+                with trace.stage("format"):
+                    return self.formatter.format_path(path)
         except PathNotFoundError as e:
             return self.formatter.format_error(str(e))
         except Exception as e:
             return self.formatter.format_error(f"查找路径时出错: {str(e)}")
 
     def get_route(self, start_line: Optional[str], start_station: str,
-                  end_line: Optional[str], end_station: str, strategy: str = "min_station") -> List[Union[Station, str]]:
-        """返回原始路径对象列表（含 Station 和 "换乘" 字符串）"""
-        if self.network is None:
+                  end_line: Optional[str], end_station: str, strategy: str = "min_station",
+                  city: Optional[str] = None) -> List[Union[Station, str]]:
+        """返回原始路径对象列表（含 Station 和 "换乘" 字符串）
+
+        city 为其他城市时，从 registry 懒加载该城市网络并直接搜索（不走缓存和预计算路径表）。
+        """
+        with self.tracer.request("route") as trace:
+            if city is not None and city != self.city:
+                with trace.stage("load_city"):
+                    network = self.registry.get(city)
+                finder = PathFinder(network, engine=PATH_ENGINE)
+                with trace.stage("resolve"):
+                    start = self._resolve_station(start_line, start_station, "起点", network)
+                    end = self._resolve_station(end_line, end_station, "终点", network)
+                return self._search(finder, start, end, strategy, trace)
+
+            # 整个查询只使用同一个 PathFinder 及其网络，在线更新热替换时不会混用新旧网络
+            finder = self.path_finder
+            network = finder.network
+            if network is None:
+                raise ValueError("系统未初始化，请先加载数据")
+
+            with trace.stage("resolve"):
+                start = self._resolve_station(start_line, start_station, "起点", network)
+                end = self._resolve_station(end_line, end_station, "终点", network)
+
+            # 缓存绑定网络版本号，网络替换或修改后旧结果自动失效
+            cache_key = (start.id, end.id, strategy)
+            cached = self.route_cache.get(network.version, cache_key)
+            if cached is not None:
+                trace.count("cache_hits")
+                return cached
+            trace.count("cache_misses")
+
+            table = self.route_table
+            if (table is not None and table.has_strategy(strategy)
+                    and table.fingerprint == network.compile().fingerprint()):
+                trace.count("table_lookups")
+                with trace.stage("search"):
+                    path = finder.find_path_in_table(table, start, end, strategy=strategy)
+            else:
+                path = self._search(finder, start, end, strategy, trace)
+            self.route_cache.put(network.version, cache_key, path)
+            return path
+
+    def _search(self, finder: PathFinder, start: Station, end: Station, strategy: str,
+                trace) -> List[Union[Station, str]]:
+        """在线搜索；埋点开启时同时记录出堆节点数与入堆次数"""
+        with trace.stage("search"):
+            if not self.tracer.enabled:
+                return finder.find_path(start, end, strategy=strategy)
+            path, stats = finder.find_path_with_stats(start, end, strategy=strategy)
+        trace.count("settled", stats['settled'])
+        trace.count("pushes", stats['pushes'])
+        return path
+
+    def get_routes(self, start_line: Optional[str], start_station: str,
+                   end_line: Optional[str], end_station: str, strategy: str = "min_station",
+                   k: int = 3) -> List[List[Union[Station, str]]]:
+        """返回前 k 条备选路线（首条为最优路线），按代价升序"""
+        if k <= 1:
+            return [self.get_route(start_line, start_station, end_line, end_station, strategy)]
+        finder = self.path_finder
+        if finder.network is None:
             raise ValueError("系统未初始化，请先加载数据")
+        with self.tracer.request("routes") as trace:
+            with trace.stage("resolve"):
+                start = self._resolve_station(start_line, start_station, "起点", finder.network)
+                end = self._resolve_station(end_line, end_station, "终点", finder.network)
+            with trace.stage("search"):
+                return finder.find_k_paths(start, end, k, strategy=strategy)
 
-        # 起点处理
-        start = None
-        if start_line:
-            start = self.network.find_station(start_line, start_station)
-        else:
-            start = self.network.get_station_any_line(start_station)
-            if start is None:
-                candidates = self.network.search_stations(start_station)
-                if len(candidates) == 1:
-                    start = candidates[0]
-                elif len(candidates) > 1:
-                    options = '，'.join(str(s) for s in candidates)
-                    raise ValueError(f"起点存在多个匹配，请指定线路或更精确站名：{options}")
-        if start is None:
-            raise ValueError(f"未找到起点站: {start_station}")
-
-        # 终点处理
-        end = None
-        if end_line:
-            end = self.network.find_station(end_line, end_station)
+    def get_pareto_routes(self, start_line: Optional[str], start_station: str,
+                          end_line: Optional[str], end_station: str) -> List[List[Union[Station, str]]]:
+        """一次搜索返回 (换乘次数, 站点数) 意义下全部互不支配的路线，按换乘次数升序"""
+        finder = self.path_finder
+        if finder.network is None:
+            raise ValueError("系统未初始化，请先加载数据")
+        start = self._resolve_station(start_line, start_station, "起点", finder.network)
+        end = self._resolve_station(end_line, end_station, "终点", finder.network)
+        return finder.find_pareto_paths(start, end)
+
+    def get_timed_route(self, start_line: Optional[str], start_station: str,
+                        end_line: Optional[str], end_station: str,
+                        depart: str) -> Tuple[List[Union[Station, str]], int, int]:
+        """按出发时刻查询最早到达的路线
+
+        时刻参数取自数据文件旁的 时刻.csv（首次查询时生成全天列车连接，网络更新后重建）。
+
+        Args:
+            depart: 出发时刻 "HH:MM"
+
+        Returns:
+            (路径列表, 出发时刻秒数, 到达时刻秒数)
+
+        Raises:
+            ValueError: 站点或时间格式错误
+            TimetableError: 时刻参数文件格式错误
+            PathNotFoundError: 当天已无可达列车
+        """
+        finder = self.path_finder
+        network = finder.network
+        if network is None:
+            raise ValueError("系统未初始化，请先加载数据")
+        depart_seconds = parse_clock(depart)
+        with self.tracer.request("timed_route") as trace:
+            with trace.stage("resolve"):
+                start = self._resolve_station(start_line, start_station, "起点", network)
+                end = self._resolve_station(end_line, end_station, "终点", network)
+
+            graph = network.compile()
+            router = self._time_router
+            if router is None or router.graph is not graph:
+                with trace.stage("timetable"):
+                    router = TimeRouter(graph, default_timetable_path(self.data_file))
+                self._time_router = router
+            if start == end:
+                return [start], depart_seconds, depart_seconds
+            with trace.stage("search"):
+                result = router.earliest_arrival(graph.index_of[start.id], graph.index_of[end.id],
+                                                 depart_seconds)
+        if result is None:
+            raise PathNotFoundError(f"{depart} 出发已无法从 {start} 到达 {end}（末班车已过）")
+        arrival, nodes = result
+        path = PathFinder.with_transfer_marks([graph.stations[node] for node in nodes])
+        return path, depart_seconds, arrival
+
+    def find_timed_route(self, start_line: Optional[str], start_station: str,
+                         end_line: Optional[str], end_station: str, depart: str) -> str:
+        """按出发时刻查询最早到达路线，返回格式化字符串"""
+        try:
+            with self.tracer.request("timed_route") as trace:
+                path, depart_seconds, arrival = self.get_timed_route(
+                    start_line, start_station, end_line, end_station, depart)
+                with trace.stage("format"):
+                    return self.formatter.format_timed_path(path, depart_seconds, arrival)
+        except (PathNotFoundError, TimetableError, ValueError) as e:
+            return self.formatter.format_error(str(e))
+
+    def _resolve_station(self, line_name: Optional[str], station_name: str, role: str,
+                         network: Optional[MetroNetwork] = None) -> Station:
+        """根据线路和站名定位站点；未指定线路时按站名推断，必要时模糊匹配
+
+        Args:
+            line_name: 线路名，可为 None
+            station_name: 站名
+            role: 提示信息中的角色名（"起点"/"终点"）
+            network: 查找的网络，默认为当前城市网络
+
+        Raises:
+            ValueError: 未找到站点或模糊匹配存在歧义时抛出
+        """
+        network = network or self.network
+        station = None
+        if line_name:
+            station = network.find_station(line_name, station_name)
         else:
-            end = self.network.get_station_any_line(end_station)
-            if end is None:
-                candidates = self.network.search_stations(end_station)
+            station = network.get_station_any_line(station_name)
+            if station is None:
+                trace = self.tracer.current()
+                trace.count("fuzzy_lookups")
+                with trace.stage("fuzzy_search"):
+                    candidates = network.search_stations(station_name)
                 if len(candidates) == 1:
-                    end = candidates[0]
+                    station = candidates[0]
                 elif len(candidates) > 1:
                     options = '，'.join(str(s) for s in candidates)
-                    raise ValueError(f"终点存在多个匹配，请指定线路或更精确站名：{options}")
-        if end is None:
-            raise ValueError(f"未找到终点站: {end_station}")
+                    raise ValueError(f"{role}存在多个匹配，请指定线路或更精确站名：{options}")
+        if station is None:
+            raise ValueError(f"未找到{role}站: {station_name}")
+        return station
 
-        return self.path_finder.find_path(start, end, strategy=strategy)
+    def prefetch_cities(self, cities: Optional[List[str]] = None) -> None:
+        """在后台线程中预加载热门城市（默认为 config.PREFETCH_CITIES）"""
+        cities = PREFETCH_CITIES if cities is None else cities
+        pending = [city for city in cities if city != self.city]
+        if pending:
+            self.registry.prefetch(pending)
 
     def update_data_online(self) -> str:
         """在线更新数据并重新加载"""
         try:
-            output_path = self.data_file
-            self.data_fetcher.fetch_and_save(output_path)
-            # 更新后重新加载
-            if self.load_data():
-                return self.formatter.format_info("数据已更新并重新加载")
-            return self.formatter.format_error("数据下载成功但重载失败")
+            if self.network is None:
+                # 尚无可比较的网络：整体下载后加载
+                self.data_fetcher.fetch_and_save(self.data_file)
+                if self.load_data():
+                    return self.formatter.format_info("数据已更新并重新加载")
+                return self.formatter.format_error("数据下载成功但重载失败")
+            response = self.data_fetcher.fetch()
+            if response is None:
+                # 服务器返回 304：与上次抓取相同，无需下载和处理
+                return self.formatter.format_info("数据无变化，无需重新加载")
+            data, headers, body = response
+            message = self.apply_update(list(self.data_fetcher.iter_rows(data)))
+            # 更新成功应用后才记录校验头，失败时下次仍会重新下载
+            self.data_fetcher.save_response(headers, body)
+            return message
         except FetchError as e:
             return self.formatter.format_error(str(e))
         except Exception as e:
             return self.formatter.format_error(f"更新数据失败: {str(e)}")
     
-    def process_user_input(self, user_input: str) -> str:
+    def apply_update(self, rows: List[Dict[str, str]]) -> str:
+        """将新数据应用到运行中的系统
+
+        计算新旧网络的结构差异：无变化时什么都不做；有变化时由对齐ID后的新数据重建网络，
+        写出CSV与快照后一次性替换 PathFinder（查询只经由它取网络，替换是原子的）。
+        差异决定旧网络的哪些派生结构可以沿用（见 NetworkDiff.carry_derived）：
+        编译图拓扑不变时地标、收缩层次与预计算路径表全部沿用；只删不增时地标距离与
+        未经过被删除元素的缓存路径沿用，否则清空路径缓存。
+        无法沿用的收缩层次（ch 引擎）与路径表在后台线程中重建，期间查询回退为在线搜索，
+        不会在替换后的第一次查询中同步构建。
+
+        Args:
+            rows: 新数据的CSV行（DataFetcher.iter_rows() 的产出）
+
+        Returns:
+            结果提示字符串
+        """
+        with self._update_lock:
+            old_network = self.network
+            diff = diff_network(old_network, rows)
+            if diff.is_empty():
+                return self.formatter.format_info("数据无变化，无需重新加载")
+
+            loader = DataLoader()
+            network = diff.rebuild(loader)
+            old_graph, graph = old_network.compile(), network.compile()
+            reused = diff.carry_derived(old_graph, graph)
+            if network.adopt_search_index(old_network):
+                reused.insert(0, "站名索引")
+            self.data_fetcher.save_to_csv(diff.rows, self.data_file)
+            loader.save_snapshot(self.data_file)
+            rebuilding = self._refresh_precomputed(old_graph, graph, reused)
+
+            if diff.is_removal_only():
+                def remap(path):
+                    stations = [item for item in path if isinstance(item, Station)]
+                    if diff.affects_path([s.id for s in stations]):
+                        return None
+                    return [network.stations_by_id[item.id] if isinstance(item, Station) else item
+                            for item in path]
+                kept = self.route_cache.migrate(old_network.version, network.version, remap)
+            else:
+                self.route_cache.invalidate()
+                kept = 0
+
+            self.path_finder = PathFinder(network, engine=PATH_ENGINE)
+            self.network = network
+            self.registry.put(self.city, network)
+            if rebuilding:
+                self._rebuild_precomputed(network, rebuilding)
+            details = f"，沿用{'、'.join(reused)}" if reused else ""
+            pending = f"，后台重建{'、'.join(rebuilding)}" if rebuilding else ""
+            return self.formatter.format_info(
+                f"数据已更新并重建网络（{diff.summary()}），保留缓存路径 {kept} 条{details}{pending}")
+
+    def _refresh_precomputed(self, old_graph, graph, reused: List[str]) -> List[str]:
+        """在线更新时处理离线预计算结果，返回需要在后台重建的项目
+
+        拓扑不变时路径表与收缩层次沿用（收缩层次已随派生结构搬到新图），只需以新指纹写回磁盘，
+        并记入 reused；否则交给后台重建。
+        """
+        rebuilding: List[str] = []
+        if self.route_table is not None:
+            if same_topology(old_graph, graph):
+                self.route_table = self.route_table.rebind(graph)
+                with contextlib.suppress(OSError):
+                    self.route_table.save_meta(default_table_path(self.data_file))
+                reused.append("路径表")
+            else:
+                rebuilding.append("路径表")
+        if PATH_ENGINE == "ch":
+            hierarchies = {strategy: graph.derived[f'ch:{strategy}'] for strategy in STRATEGIES
+                           if f'ch:{strategy}' in graph.derived}
+            if len(hierarchies) == len(STRATEGIES):
+                with contextlib.suppress(OSError):
+                    save_hierarchies(default_hierarchy_path(self.data_file), graph, hierarchies)
+            else:
+                rebuilding.append("收缩层次")
+        return rebuilding
+
+    def _rebuild_precomputed(self, network: MetroNetwork, items: List[str]) -> None:
+        """在后台线程中重建路径表与收缩层次，完成前查询使用在线搜索"""
+        graph = network.compile()
+        if "收缩层次" in items:
+            build_in_background(graph, default_hierarchy_path(self.data_file))
+        if "路径表" in items:
+            self.route_table = None
+
+            def worker():
+                try:
+                    table = RouteTable.build(graph)
+                except RouteTableError:
+                    return
+                # 构建期间若又发生了更新，结果已过时，丢弃
+                if self.network is network:
+                    with contextlib.suppress(OSError):
+                        table.save(default_table_path(self.data_file))
+                    self.route_table = table
+
+            threading.Thread(target=worker, name="route-table-build", daemon=True).start()
+
+    def run_batch(self, source: str, strategy: str = "min_station",
+                  workers: Optional[int] = None) -> Dict[str, int]:
+        """批量查询：逐行读取查询，结果以 JSON Lines 写到标准输出
+
+        Args:
+            source: 查询文件路径，"-" 表示标准输入
+            strategy: 路径策略
+            workers: 并行进程数，None 为 CPU 核数
+
+        Returns:
+            统计信息：total、ok、failed、groups
+        """
+        if self.network is None:
+            raise ValueError("系统未初始化，请先加载数据")
+        router = BatchRouter(self.network, self._resolve_station, strategy=strategy, workers=workers)
+        if source == '-':
+            return router.run(sys.stdin, sys.stdout)
+        with open(source, 'r', encoding='utf-8') as f:
+            return router.run(f, sys.stdout)
+
+    def process_user_input(self, user_input: str, depart: Optional[str] = None) -> str:
         """处理用户输入
         
         Args:
             user_input: 用户输入字符串
+            depart: 出发时刻 "HH:MM"，指定时按时刻表查询最早到达路线
             
         Returns:
             处理结果字符串
         """
         try:
-            # 解析输入
-            (start_line, start_station), (end_line, end_station) = \
-                self.parser.parse_input(user_input)
-            
-            # 查找路径
-            result = self.find_route(start_line, start_station, 
-                                    end_line, end_station)
-            return result
+            with self.tracer.request("query") as trace:
+                # 解析输入
+                with trace.stage("parse"):
+                    (start_line, start_station), (end_line, end_station) = \
+                        self.parser.parse_input(user_input)
+
+                # 查找路径
+                if depart:
+                    return self.find_timed_route(start_line, start_station, end_line, end_station, depart)
+                result = self.find_route(start_line, start_station,
+                                        end_line, end_station)
+                return result
             
         except InvalidInputError as e:
             return self.formatter.format_error(str(e))
@@ -200,13 +578,45 @@ class MetroPathPlanner:
             print("-" * 40)
 
 
+def _get_option(name: str) -> Optional[str]:
+    """读取形如 "--name value" 的命令行选项"""
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return None
+
+
 def main():
     """主函数"""
+    # --trace 可出现在任意位置：开启性能埋点，逐请求向标准错误输出 JSON 日志
+    trace = '--trace' in sys.argv
+    if trace:
+        sys.argv.remove('--trace')
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--fetch-all':
+        # 并发抓取多个城市：--fetch-all [城市,城市...] [--concurrency N]
+        cities = sys.argv[2].split(',') if len(sys.argv) > 2 and not sys.argv[2].startswith('--') else None
+        concurrency = _get_option('--concurrency')
+        try:
+            fetcher = BulkFetcher(cities, concurrency=int(concurrency) if concurrency else 8)
+            start = time.perf_counter()
+            results = fetcher.run()
+            print(format_report(results, time.perf_counter() - start))
+        except FetchError as e:
+            print(Formatter.format_error(str(e)))
+            sys.exit(1)
+        return
+
     # 创建系统实例
     planner = MetroPathPlanner()
+    planner.tracer.enabled = planner.tracer.enabled or trace
     
-    # 加载数据
-    if not planner.load_data():
+    # 加载数据（批量模式下标准输出只保留 JSON 结果，提示信息改写到标准错误）
+    batch_mode = len(sys.argv) > 1 and sys.argv[1] == '--batch'
+    with contextlib.redirect_stdout(sys.stderr if batch_mode else sys.stdout):
+        loaded = planner.load_data()
+    if not loaded:
         print("系统初始化失败，程序退出。")
         sys.exit(1)
     
@@ -215,6 +625,39 @@ def main():
         if sys.argv[1] == '--test':
             # 运行测试用例
             planner.run_test_cases()
+        elif sys.argv[1] == '--precompute':
+            # 离线预计算全源路径表，可选指定进程数
+            workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+            print(planner.precompute_routes(workers))
+        elif sys.argv[1] == '--precompute-ch':
+            # 离线构建收缩层次（可中断续算），可选指定进程数
+            workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+            print(planner.precompute_hierarchies(workers))
+        elif sys.argv[1] == '--batch':
+            # 批量查询：--batch 文件|- [--workers N] [--strategy 策略]
+            source = sys.argv[2] if len(sys.argv) > 2 else '-'
+            strategy = _get_option('--strategy') or "min_station"
+            if strategy not in STRATEGIES:
+                print(Formatter.format_error(f"不支持的策略: {strategy}，可选: {'、'.join(STRATEGIES)}"), file=sys.stderr)
+                sys.exit(1)
+            workers = _get_option('--workers')
+            if workers is not None and not (workers.isdigit() and int(workers) > 0):
+                print(Formatter.format_error(f"--workers 须为正整数: {workers}"), file=sys.stderr)
+                sys.exit(1)
+            summary = planner.run_batch(
+                source,
+                strategy=strategy,
+                workers=int(workers) if workers else None,
+            )
+            print(f"批量查询完成: {summary}", file=sys.stderr)
+        elif sys.argv[1] == '--depart':
+            # 按出发时刻查询最早到达：--depart HH:MM 查询
+            if len(sys.argv) < 4:
+                print(Formatter.format_error("用法: --depart HH:MM 起始线路，起始站名-目标线路，目标站名"))
+                sys.exit(1)
+            result = planner.process_user_input(' '.join(sys.argv[3:]), depart=sys.argv[2])
+            print("\n查询结果：")
+            print(result)
         else:
             # 处理单个查询
             query = ' '.join(sys.argv[1:])
@@ -222,7 +665,8 @@ def main():
             print("\n查询结果：")
             print(result)
     else:
-        # 交互式模式
+        # 交互式模式（后台预加载热门城市）
+        planner.prefetch_cities()
         planner.run_interactive()
 
 
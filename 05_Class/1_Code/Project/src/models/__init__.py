@@ -4,10 +4,16 @@
 - Station: 站点实体类
 - Line: 线路实体类
 - MetroNetwork: 地铁网络图类
+- CompiledGraph: 编译后的整数索引图
+- HubGraph: 站点组收缩图
+- StationArrays: 列式（NumPy）站点表
 """
 
 from .station import Station
 from .line import Line
 from .network import MetroNetwork
+from .compiled_graph import CompiledGraph
+from .hub_graph import HubGraph
+from .station_arrays import StationArrays
 
-__all__ = ['Station', 'Line', 'MetroNetwork']
+__all__ = ['Station', 'Line', 'MetroNetwork', 'CompiledGraph', 'HubGraph', 'StationArrays']
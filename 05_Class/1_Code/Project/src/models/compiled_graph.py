@@ -0,0 +1,239 @@
+"""编译后的整数索引图
+
+该模块将 MetroNetwork 中的站点对象图编译为 CSR（压缩稀疏行）结构：
+站点按整数下标编号，邻接关系保存在连续的整数数组中，
+搜索时只需整数运算，无需对象哈希和字符串比较。
+"""
+
+import hashlib
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from models.station import Station
+
+if TYPE_CHECKING:  # pragma: no cover - 仅用于类型标注，避免循环导入
+    from models.network import MetroNetwork
+
+
+# 权重放大倍数：原始权重 1.0 / 0.1 放大后均为整数
+WEIGHT_SCALE = 10
+
+# 同线路相邻站点的权重
+HOP_WEIGHT = 10
+# 同名且同线路族（含环线闭合、主线-支线）的换乘权重
+SAME_FAMILY_WEIGHT = 1
+# 跨线路换乘的站点代价（视作经过一站）
+TRANSFER_WEIGHT = 10
+
+# min_station: 只比较站点代价
+# min_transfer: 按 (换乘次数, 站点代价) 字典序比较，编码为 换乘次数 * transfer_unit + 站点代价
+STRATEGIES = ("min_station", "min_transfer")
+
+@lru_cache(maxsize=None)
+def extract_main_line(line_name: str) -> str:
+    """提取主线名称（去掉支线后缀），线路名数量有限，结果按线路名缓存"""
+    return line_name.split("(")[0].strip()
+
+
+def is_same_family(line_a: str, line_b: str) -> bool:
+    """判定是否属于同一线路族（主线/支线/包含关系）"""
+    if line_a == line_b:
+        return True
+    if line_a in line_b or line_b in line_a:
+        return True
+    return extract_main_line(line_a) == extract_main_line(line_b)
+
+
+class CompiledGraph:
+    """整数索引的 CSR 邻接图
+
+    第 i 个站点的出边为 ``targets[offsets[i]:offsets[i + 1]]``，
+    对应权重为 ``weights[strategy][offsets[i]:offsets[i + 1]]``。
+    出边顺序与 PathFinder 的对象搜索一致：前一站、后一站、换乘站。
+
+    Attributes:
+        stations: 下标 -> 站点对象
+        index_of: 站点ID -> 下标
+        offsets: 每个站点出边在 targets 中的起始位置（长度为站点数 + 1）
+        targets: 出边目标站点下标
+        weights: 策略名 -> 与 targets 等长的整数权重数组（已按 WEIGHT_SCALE 放大）
+        transfer_edges: 与 targets 等长，标记该边是否为跨线路换乘（1/0）
+        name_index: 与站点下标一一对应的站名编号，同名站点（同一物理车站）编号相同
+        transfer_unit: min_transfer 中一次换乘的代价，大于任意简单路径的站点代价，
+            因此整数权重之和的大小关系与 (换乘次数, 站点代价) 的字典序完全一致
+        derived: 依附于本图的派生数据缓存（反向图、地标距离等），随图一起失效
+    """
+
+    # export_state() 导出、构造时可直接恢复的数组字段
+    STATE_FIELDS = ('name_index', 'offsets', 'targets', 'weights', 'transfer_edges', 'transfer_unit')
+
+    def __init__(self, network: 'MetroNetwork', state: Optional[Dict[str, object]] = None):
+        """从地铁网络编译整数图
+
+        Args:
+            network: 已完成加载和换乘关联的地铁网络
+            state: 可选，export_state() 导出的数组；提供时直接恢复，跳过逐边编译。
+                调用方需保证其与 network 的站点顺序一致
+        """
+        self.stations: List[Station] = list(network.stations_by_id.values())
+        self.index_of: Dict[int, int] = {
+            station.id: index for index, station in enumerate(self.stations)
+        }
+        names: Dict[str, int] = {}
+        self.name_index = array('i', (
+            names.setdefault(station.station_name, len(names)) for station in self.stations
+        ))
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+        self.weights: Dict[str, array] = {strategy: array('q') for strategy in STRATEGIES}
+        self.transfer_edges = array('b')
+        self.transfer_unit = HOP_WEIGHT * max(len(self.stations), 1)
+        self.derived: Dict[str, object] = {}
+        if state is None:
+            self._build()
+        else:
+            for field in self.STATE_FIELDS:
+                setattr(self, field, state[field])
+
+    def _build(self) -> None:
+        """逐站点生成出边（数组的 append 预先绑定为局部变量，百万级站点时避免逐边方法查找）"""
+        index_of = self.index_of
+        unit = self.transfer_unit
+        add_target = self.targets.append
+        add_station_weight = self.weights["min_station"].append
+        add_transfer_weight = self.weights["min_transfer"].append
+        add_flag = self.transfer_edges.append
+        add_offset = self.offsets.append
+        edges = 0
+        for station in self.stations:
+            for neighbor in (station.prev_station, station.next_station):
+                if neighbor is not None:
+                    add_target(index_of[neighbor.id])
+                    add_station_weight(HOP_WEIGHT)
+                    add_transfer_weight(HOP_WEIGHT)
+                    add_flag(0)
+                    edges += 1
+            for transfer in station.transfer_stations:
+                add_target(index_of[transfer.id])
+                if (station.station_name == transfer.station_name
+                        and is_same_family(station.line_name, transfer.line_name)):
+                    add_station_weight(SAME_FAMILY_WEIGHT)
+                    add_transfer_weight(SAME_FAMILY_WEIGHT)
+                    add_flag(0)
+                else:
+                    add_station_weight(TRANSFER_WEIGHT)
+                    add_transfer_weight(TRANSFER_WEIGHT + unit)
+                    add_flag(1)
+                edges += 1
+            add_offset(edges)
+
+    @property
+    def node_count(self) -> int:
+        """站点（节点）数量"""
+        return len(self.stations)
+
+    @property
+    def edge_count(self) -> int:
+        """有向边数量"""
+        return len(self.targets)
+
+    def export_state(self) -> Dict[str, object]:
+        """导出可序列化的数组状态（不含站点对象）"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    def fingerprint(self) -> str:
+        """计算图结构指纹
+
+        由站点ID顺序、邻接数组和各策略权重共同决定，
+        用于校验离线预计算结果是否与当前网络匹配。
+
+        Returns:
+            十六进制 SHA-1 摘要
+        """
+        cached = self.derived.get('fingerprint')
+        if cached is not None:
+            return cached
+        digest = hashlib.sha1()
+        digest.update(array('i', (station.id for station in self.stations)).tobytes())
+        digest.update(self.offsets.tobytes())
+        digest.update(self.targets.tobytes())
+        for strategy in STRATEGIES:
+            digest.update(strategy.encode('utf-8'))
+            digest.update(self.weights[strategy].tobytes())
+        self.derived['fingerprint'] = digest.hexdigest()
+        return self.derived['fingerprint']
+
+    def topology(self) -> 'GraphTopology':
+        """导出不含站点对象的轻量拓扑，可跨进程传递"""
+        return GraphTopology(self.offsets, self.targets)
+
+    def reverse(self) -> Tuple['GraphTopology', array]:
+        """构建反向图（结果缓存在 derived 中）
+
+        Returns:
+            (反向拓扑, 边映射)：反向图第 i 条边对应原图第 edge_map[i] 条边
+        """
+        cached = self.derived.get('reverse')
+        if cached is None:
+            n = self.node_count
+            counts = [0] * (n + 1)
+            for v in self.targets:
+                counts[v + 1] += 1
+            for i in range(n):
+                counts[i + 1] += counts[i]
+            rev_offsets = array('i', counts)
+            rev_targets = array('i', bytes(4 * len(self.targets)))
+            edge_map = array('i', bytes(4 * len(self.targets)))
+            cursor = counts[:-1]
+            for u in range(n):
+                for e in range(self.offsets[u], self.offsets[u + 1]):
+                    v = self.targets[e]
+                    rev_targets[cursor[v]] = u
+                    edge_map[cursor[v]] = e
+                    cursor[v] += 1
+            cached = (GraphTopology(rev_offsets, rev_targets), edge_map)
+            self.derived['reverse'] = cached
+        return cached
+
+    def get_reverse_weights(self, strategy: str) -> array:
+        """获取反向图上指定策略的权重数组（与 reverse() 的边一一对应）"""
+        key = f'reverse_weights:{strategy}'
+        cached = self.derived.get(key)
+        if cached is None:
+            weights = self.get_weights(strategy)
+            _, edge_map = self.reverse()
+            cached = array('q', (weights[e] for e in edge_map))
+            self.derived[key] = cached
+        return cached
+
+    def get_weights(self, strategy: str) -> array:
+        """获取指定策略的权重数组
+
+        Raises:
+            ValueError: 策略非法时抛出
+        """
+        try:
+            return self.weights[strategy]
+        except KeyError:
+            raise ValueError(f"不支持的策略: {strategy}")
+
+    def __repr__(self) -> str:
+        return f"CompiledGraph(nodes={self.node_count}, edges={self.edge_count})"
+
+
+class GraphTopology:
+    """仅包含 CSR 数组的轻量图结构
+
+    与 CompiledGraph 具有相同的 offsets/targets/node_count 接口，
+    不引用 Station 对象，便于序列化后发送给子进程。
+    """
+
+    def __init__(self, offsets: array, targets: array):
+        self.offsets = offsets
+        self.targets = targets
+
+    @property
+    def node_count(self) -> int:
+        """节点数量"""
+        return len(self.offsets) - 1
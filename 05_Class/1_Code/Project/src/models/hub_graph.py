@@ -0,0 +1,223 @@
+"""站点组收缩图
+
+CompiledGraph 中同名站台（同一物理车站在各条线路上的站点）两两相连，k 条线路的换乘站有 k(k-1) 条换乘边。
+收缩图为每个这样的站点组增加枢纽节点，使边数随线路数线性增长：
+
+* 线路族枢纽 F：同一线路族（主线/支线、环线闭合）的站台 p 有 p→F（0）与 F→p（SAME_FAMILY_WEIGHT）
+* 车站枢纽 S（组内有多个线路族时）：F→S（0），S→F（TRANSFER_WEIGHT - SAME_FAMILY_WEIGHT，
+  min_transfer 下再加 transfer_unit）；只有一个站台的线路族省去 F，直接 p→S（0）、S→p（TRANSFER_WEIGHT）
+
+任意两站台之间经枢纽的最短代价与原换乘边相同，且不存在更便宜的绕行，因此最短路径长度不变。
+组内换乘边不完整、线路族关系不可传递、各站台的换乘顺序不一致，或收缩后边数并不减少时，该组保留原换乘边。
+站台节点沿用 CompiledGraph 的下标，枢纽节点编号在其后，路径还原时去掉即可。
+
+枢纽节点会改变堆中等价路径的先后次序，为了与 compiled 引擎选出完全相同的路线，
+同时保存各组的成员表（按原换乘边顺序排列）与线路族编号，由 graph_search.hub_dijkstra 直接按组松弛：
+组内第一个出堆的站台松弛全组，此后的站台只可能改善本线路族的站台，只需遍历本族成员。
+"""
+
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from models.compiled_graph import (CompiledGraph, STRATEGIES, SAME_FAMILY_WEIGHT, TRANSFER_WEIGHT)
+
+
+class HubGraph:
+    """站点组收缩后的 CSR 图，与 CompiledGraph 具有相同的搜索接口
+
+    Attributes:
+        base: 原编译图
+        platform_count: 站台节点数（= base.node_count），下标不小于它的是枢纽节点
+        offsets / targets / weights: CSR 结构与各策略权重
+        transfer_unit: 同 base.transfer_unit
+        contracted_groups: 被收缩的站点组数
+        group_of: 站台 -> 所在收缩组编号，未收缩为 -1
+        group_offsets / group_members: 各组成员（按原换乘边顺序）
+        family_of: 收缩组内站台 -> 线路族编号
+        family_offsets / family_members: 各线路族成员（按原换乘边顺序）
+    """
+
+    def __init__(self, graph: CompiledGraph):
+        self.base = graph
+        self.platform_count = graph.node_count
+        self.transfer_unit = graph.transfer_unit
+        self.contracted_groups = 0
+        self._node_count = graph.node_count
+        self.group_of = array('i', [-1]) * graph.node_count
+        self.group_offsets = array('i', [0])
+        self.group_members = array('i')
+        self.family_of = array('i', [-1]) * graph.node_count
+        self.family_offsets = array('i', [0])
+        self.family_members = array('i')
+        # 节点 -> [(目标, min_station 权重, min_transfer 权重), ...]，最后转为 CSR
+        adjacency: List[List[tuple]] = [[] for _ in range(graph.node_count)]
+        contracted = bytearray(graph.node_count)
+        for members in self._groups():
+            if self._contract(members, adjacency):
+                self.contracted_groups += 1
+                for u in members:
+                    contracted[u] = 1
+                    self.group_of[u] = self.contracted_groups - 1
+
+        ms, mt = graph.weights["min_station"], graph.weights["min_transfer"]
+        for u in range(graph.node_count):
+            kept = []
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                v = graph.targets[e]
+                if contracted[u] and self._is_group_edge(u, v, e):
+                    continue
+                kept.append((v, ms[e], mt[e]))
+            adjacency[u][:0] = kept  # 原有边在前，保持与原图相同的出边顺序
+
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+        self.weights: Dict[str, array] = {strategy: array('q') for strategy in STRATEGIES}
+        for edges in adjacency:
+            for v, w_station, w_transfer in edges:
+                self.targets.append(v)
+                self.weights["min_station"].append(w_station)
+                self.weights["min_transfer"].append(w_transfer)
+            self.offsets.append(len(self.targets))
+
+    @property
+    def node_count(self) -> int:
+        return self._node_count
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def get_weights(self, strategy: str) -> array:
+        """获取指定策略的权重数组
+
+        Raises:
+            ValueError: 策略非法时抛出
+        """
+        try:
+            return self.weights[strategy]
+        except KeyError:
+            raise ValueError(f"不支持的策略: {strategy}")
+
+    def to_platforms(self, nodes: Sequence[int]) -> List[int]:
+        """去掉路径中的枢纽节点，得到原图的站点下标序列"""
+        limit = self.platform_count
+        return [node for node in nodes if node < limit]
+
+    # ------------------------------------------------------------------
+    # 构建
+    # ------------------------------------------------------------------
+
+    def _is_group_edge(self, u: int, v: int, e: int) -> bool:
+        """是否为同名站台之间的换乘边（同名的相邻站区间不算）"""
+        graph = self.base
+        return (graph.name_index[u] == graph.name_index[v]
+                and (graph.weights["min_station"][e] == SAME_FAMILY_WEIGHT or graph.transfer_edges[e] == 1))
+
+    def _groups(self) -> List[List[int]]:
+        groups: Dict[int, List[int]] = {}
+        for u, name in enumerate(self.base.name_index):
+            groups.setdefault(name, []).append(u)
+        return [members for members in groups.values() if len(members) > 2]
+
+    def _contract(self, members: List[int], adjacency: List[List[tuple]]) -> bool:
+        """为一个站点组添加枢纽节点、成员表与边；不满足收缩条件或无收益时返回 False"""
+        graph = self.base
+        member_set = set(members)
+        order: Dict[int, List[int]] = {}
+        same_family: Dict[int, set] = {}
+        for u in members:
+            peers = {}
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                v = graph.targets[e]
+                if v in member_set and self._is_group_edge(u, v, e):
+                    if v in peers:  # 重复边
+                        return False
+                    peers[v] = graph.weights["min_station"][e] == SAME_FAMILY_WEIGHT
+                elif peers:  # 组内换乘边之后还有其他出边，按组松弛会改变出边顺序
+                    return False
+            if len(peers) != len(members) - 1:  # 组内不是两两相连
+                return False
+            order[u] = list(peers)
+            same_family[u] = {v for v, family in peers.items() if family} | {u}
+
+        canonical = self._canonical_order(members[0], order)
+        if canonical is None:
+            return False
+
+        # 线路族须为等价类：同族站台的同族集合完全相同
+        position = {u: i for i, u in enumerate(canonical)}
+        families: List[List[int]] = []
+        assigned = set()
+        for u in canonical:
+            if u in assigned:
+                continue
+            family = same_family[u]
+            if any(same_family[v] != family for v in family):
+                return False
+            families.append(sorted(family, key=position.__getitem__))
+            assigned |= family
+
+        # 每个站台与其线路族枢纽（或车站枢纽）之间两条边，另加各线路族枢纽与车站枢纽之间两条边
+        grouped = [family for family in families if len(family) > 1]
+        hub_edges = 2 * len(members)
+        if len(families) > 1:
+            hub_edges += 2 * len(grouped)
+        if hub_edges >= len(members) * (len(members) - 1):
+            return False
+
+        self.group_members.extend(canonical)
+        self.group_offsets.append(len(self.group_members))
+        for family in families:
+            for u in family:
+                self.family_of[u] = len(self.family_offsets) - 1
+            self.family_members.extend(family)
+            self.family_offsets.append(len(self.family_members))
+
+        unit = self.transfer_unit
+        cross = TRANSFER_WEIGHT - SAME_FAMILY_WEIGHT
+        station_hub = self._new_node(adjacency) if len(families) > 1 else None
+        for family in families:
+            if len(family) == 1:
+                (u,) = family
+                adjacency[u].append((station_hub, 0, 0))
+                adjacency[station_hub].append((u, TRANSFER_WEIGHT, TRANSFER_WEIGHT + unit))
+                continue
+            family_hub = self._new_node(adjacency)
+            for u in family:
+                adjacency[u].append((family_hub, 0, 0))
+                adjacency[family_hub].append((u, SAME_FAMILY_WEIGHT, SAME_FAMILY_WEIGHT))
+            if station_hub is not None:
+                adjacency[family_hub].append((station_hub, 0, 0))
+                adjacency[station_hub].append((family_hub, cross, cross + unit))
+        return True
+
+    @staticmethod
+    def _canonical_order(first: int, order: Dict[int, List[int]]) -> Optional[List[int]]:
+        """求组内统一的成员顺序：去掉任一站台自身后恰为该站台的换乘边顺序；不存在时返回 None"""
+        rest = order[first]
+        for i in range(len(rest) + 1):
+            canonical = rest[:i] + [first] + rest[i:]
+            if all(peers == [v for v in canonical if v != u] for u, peers in order.items()):
+                return canonical
+        return None
+
+    def _new_node(self, adjacency: List[List[tuple]]) -> int:
+        adjacency.append([])
+        self._node_count += 1
+        return self._node_count - 1
+
+    def __repr__(self) -> str:
+        return (f"HubGraph(nodes={self.node_count}, edges={self.edge_count}, "
+                f"hubs={self.node_count - self.platform_count}, groups={self.contracted_groups})")
+
+
+def get_hub_graph(graph: CompiledGraph) -> HubGraph:
+    """获取（必要时构建）编译图的站点组收缩图，结果缓存在 graph.derived 中"""
+    hubs = graph.derived.get('hub_graph')
+    if hubs is None:
+        hubs = HubGraph(graph)
+        graph.derived['hub_graph'] = hubs
+    return hubs
+
+
+__all__ = ["HubGraph", "get_hub_graph"]
@@ -3,7 +3,7 @@
 该模块定义了地铁线路的数据结构，负责管理线路上的站点序列。
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from models.station import Station
 
 
@@ -16,6 +16,8 @@ class Line:
         line_name: 线路名称
         stations: 线路上的站点列表（按顺序排列）
     """
+
+    __slots__ = ('line_name', 'stations', '_by_name')
     
     def __init__(self, line_name: str):
         """初始化线路实例
@@ -25,6 +27,8 @@ class Line:
         """
         self.line_name: str = line_name
         self.stations: List[Station] = []
+        # 站名 -> 该线路上第一个同名站点（环线闭合副本不会覆盖首站）
+        self._by_name: Dict[str, Station] = {}
     
     def add_station(self, station: Station) -> None:
         """按顺序添加站点到线路
@@ -41,6 +45,7 @@ class Line:
             station.prev_station = last_station
         
         self.stations.append(station)
+        self._by_name.setdefault(station.station_name, station)
     
     def get_station(self, station_name: str) -> Optional[Station]:
         """根据站名查找站点
@@ -51,10 +56,7 @@ class Line:
         Returns:
             找到的站点对象，如果不存在则返回None
         """
-        for station in self.stations:
-            if station.station_name == station_name:
-                return station
-        return None
+        return self._by_name.get(station_name)
     
     def get_station_count(self) -> int:
         """获取线路的站点数量
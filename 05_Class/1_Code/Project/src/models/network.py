@@ -4,9 +4,18 @@
 以及建立站点之间的换乘关系。
 """
 
-from typing import Dict, List, Optional
+import copy
+import itertools
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 from models.station import Station
 from models.line import Line
+from models.compiled_graph import CompiledGraph
+from models.reachability import bounded_reach, reach_matrix
+from models.station_arrays import StationArrays
+from models.station_index import StationSearchIndex
+
+# 全局递增的网络版本号，保证不同网络实例及同一网络的每次结构变化都有不同的版本
+_version_counter = itertools.count(1)
 
 
 class MetroNetwork:
@@ -18,6 +27,9 @@ class MetroNetwork:
         stations_by_id: 按站点ID索引的字典
         lines: 按线路名称索引的字典
         stations_by_name: 按站点名称索引的字典（一个站名可能对应多个站点）
+        compiled: 编译后的整数索引图（未编译或结构变化后为None）
+        version: 网络版本号，结构变化时递增，用于使派生缓存失效
+        arrays: 可选的列式站点表（调用 to_arrays() 后生成，结构变化后为None）
     """
     
     def __init__(self):
@@ -25,6 +37,10 @@ class MetroNetwork:
         self.stations_by_id: Dict[int, Station] = {}
         self.lines: Dict[str, Line] = {}
         self.stations_by_name: Dict[str, List[Station]] = {}
+        self.compiled: Optional[CompiledGraph] = None
+        self.version: int = next(_version_counter)
+        self.arrays: Optional[StationArrays] = None
+        self._search_index: Optional[StationSearchIndex] = None
     
     def add_line(self, line_name: str) -> Line:
         """添加或获取线路
@@ -49,6 +65,9 @@ class MetroNetwork:
         Args:
             station: 站点对象
         """
+        # 结构变化后编译结果失效
+        self._mark_changed()
+
         # 添加到ID索引
         self.stations_by_id[station.id] = station
         
@@ -61,6 +80,30 @@ class MetroNetwork:
             self.stations_by_name[station.station_name] = []
         self.stations_by_name[station.station_name].append(station)
     
+    def add_stations(self, stations: Iterable[Station]) -> None:
+        """按顺序批量添加站点
+
+        效果与逐个调用 add_station 相同，但只使派生结构失效一次，适合百万级站点的批量构建。
+
+        Args:
+            stations: 站点对象，同一线路的站点须按线路顺序排列
+        """
+        self._mark_changed()
+        stations_by_id = self.stations_by_id
+        stations_by_name = self.stations_by_name
+        lines = self.lines
+        for station in stations:
+            stations_by_id[station.id] = station
+            line = lines.get(station.line_name)
+            if line is None:
+                line = self.add_line(station.line_name)
+            line.add_station(station)
+            same_name = stations_by_name.get(station.station_name)
+            if same_name is None:
+                stations_by_name[station.station_name] = [station]
+            else:
+                same_name.append(station)
+
     def get_station_by_id(self, station_id: int) -> Optional[Station]:
         """根据站点ID查找站点
         
@@ -78,14 +121,129 @@ class MetroNetwork:
         Args:
             transfer_data: 换乘数据字典，键为站点ID，值为可换乘的站点ID列表
         """
+        self._mark_changed()
+        get_station = self.stations_by_id.get
         for station_id, transfer_ids in transfer_data.items():
-            station = self.get_station_by_id(station_id)
+            station = get_station(station_id)
             if station:
                 for transfer_id in transfer_ids:
-                    transfer_station = self.get_station_by_id(transfer_id)
+                    transfer_station = get_station(transfer_id)
                     if transfer_station:
                         station.add_transfer_station(transfer_station)
     
+    def _mark_changed(self) -> None:
+        """结构变化：丢弃编译结果并更新版本号"""
+        self.compiled = None
+        self.arrays = None
+        self._search_index = None
+        self.version = next(_version_counter)
+
+    def restore_compiled(self, state: Dict[str, object]) -> CompiledGraph:
+        """用预先导出的数组状态恢复编译结果（快照加载时使用）
+
+        Args:
+            state: CompiledGraph.export_state() 的结果，需与当前站点顺序一致
+
+        Returns:
+            恢复的整数索引图
+        """
+        self.compiled = CompiledGraph(self, state)
+        return self.compiled
+
+    def compile(self) -> CompiledGraph:
+        """将网络编译为整数索引的 CSR 图
+
+        编译结果缓存在 ``compiled`` 属性中，网络结构变化时自动失效。
+
+        Returns:
+            编译后的整数索引图
+        """
+        if self.compiled is None:
+            self.compiled = CompiledGraph(self)
+        return self.compiled
+
+    def to_arrays(self) -> StationArrays:
+        """生成（或复用）列式站点表：站点ID、线路编号、站名编号的 NumPy 数组
+
+        Returns:
+            列式站点表
+
+        Raises:
+            ImportError: 未安装 numpy 时抛出
+        """
+        if self.arrays is None:
+            self.arrays = StationArrays(self)
+        return self.arrays
+
+    def reachable_from(self, origin: Station, max_stops: Optional[int] = None,
+                       max_transfers: Optional[int] = None) -> Dict[Station, Tuple[int, int]]:
+        """一次搜索返回从 origin 出发在预算内可达的全部站点
+
+        站数为经过的同线路区间数，换乘为跨线路换乘次数（同名同线路族站台之间不计）。
+
+        Args:
+            origin: 起点站点
+            max_stops: 站数上限，None 为不限
+            max_transfers: 换乘次数上限，None 为不限
+
+        Returns:
+            站点 -> (最少站数, 达到该站数所需的最少换乘次数)，包含起点自身 (0, 0)
+
+        Raises:
+            ValueError: 起点不属于本网络或上限为负时抛出
+        """
+        graph = self.compile()
+        source = self._reach_source(graph, origin, max_stops, max_transfers)
+        stops, transfers = bounded_reach(graph, source, max_stops, max_transfers)
+        return {graph.stations[i]: (d, transfers[i]) for i, d in enumerate(stops) if d >= 0}
+
+    def reachability_matrix(self, origins: Sequence[Station], max_stops: Optional[int] = None,
+                            max_transfers: Optional[int] = None):
+        """多起点的有界可达性，结果写入 NumPy 矩阵（适合 OD 分析）
+
+        Args:
+            origins: 起点站点序列
+            max_stops: 站数上限，None 为不限
+            max_transfers: 换乘次数上限，None 为不限
+
+        Returns:
+            (站数矩阵, 换乘矩阵)：形状均为 (len(origins), 站点数) 的 int32 数组，第 i 行对应 origins[i]，
+            列与 ``compile().stations`` 及 ``to_arrays().ids`` 的顺序一致，预算内不可达为 -1
+
+        Raises:
+            ValueError: 起点不属于本网络或上限为负时抛出
+            ImportError: 未安装 numpy 时抛出
+        """
+        graph = self.compile()
+        sources = [self._reach_source(graph, origin, max_stops, max_transfers) for origin in origins]
+        return reach_matrix(graph, sources, max_stops, max_transfers)
+
+    @staticmethod
+    def _reach_source(graph: CompiledGraph, origin: Station, max_stops: Optional[int],
+                      max_transfers: Optional[int]) -> int:
+        if (max_stops is not None and max_stops < 0) or (max_transfers is not None and max_transfers < 0):
+            raise ValueError("站数和换乘次数上限不能为负")
+        source = graph.index_of.get(origin.id) if origin is not None else None
+        if source is None:
+            raise ValueError(f"起点不属于当前网络: {origin}")
+        return source
+
+    def adopt_search_index(self, other: 'MetroNetwork') -> bool:
+        """在站名未变时复用另一网络已构建的站名索引（在线更新热替换时使用）
+
+        Returns:
+            是否复用成功
+        """
+        index = other._search_index
+        if index is None or self._search_index is not None:
+            return False
+        # 复制一份再转移，旧网络上的索引仍可继续服务正在进行的查询
+        adopted = copy.copy(index)
+        if not adopted.rebind(self):
+            return False
+        self._search_index = adopted
+        return True
+
     def find_station(self, line_name: str, station_name: str) -> Optional[Station]:
         """查找指定线路的站点
         
@@ -117,24 +275,22 @@ class MetroNetwork:
         """
         return len(self.stations_by_id)
 
-    def search_stations(self, keyword: str) -> List[Station]:
+    def search_stations(self, keyword: str, limit: Optional[int] = None) -> List[Station]:
         """根据关键字模糊搜索站点名称
         
+        基于站名 n-gram 倒排索引（首次调用时构建，结构变化后重建），
+        结果按完全匹配、前缀匹配、包含匹配排序。
+        
         Args:
-            keyword: 关键字（大小写敏感度与原始数据一致，中文直接包含匹配）
+            keyword: 关键字（中文直接包含匹配；安装 pypinyin 后也支持全拼/首字母）
+            limit: 最多返回的站点数，None 为不限
         
         Returns:
-            名称包含关键字的所有站点列表
+            名称包含关键字的站点列表
         """
-        keyword = keyword.strip()
-        if not keyword:
-            return []
-        matches: List[Station] = []
-        for stations in self.stations_by_name.values():
-            for station in stations:
-                if keyword in station.station_name:
-                    matches.append(station)
-        return matches
+        if self._search_index is None:
+            self._search_index = StationSearchIndex(self)
+        return self._search_index.search(keyword, limit)
 
     def get_station_any_line(self, station_name: str) -> Optional[Station]:
         """在未指定线路时返回该站名对应的任意一个站点
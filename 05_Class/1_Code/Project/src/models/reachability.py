@@ -0,0 +1,237 @@
+"""有界可达性查询
+
+回答“从 X 出发，N 站以内、换乘不超过 M 次能到达哪些站点”，一次搜索得到所有可达站点的距离，
+无需对每个目的地分别调用 find_path。
+
+* 站数：经过的同线路区间数（同名同线路族站台之间的换乘不计站数）
+* 换乘：跨线路换乘次数（CompiledGraph.transfer_edges 标记的边）
+
+站点在预算内可达，当且仅当存在站数不超过 N 且换乘不超过 M 的路径。搜索按换乘次数分层：
+第 k 层在不换乘的边上做 0/1 代价的分桶 BFS，得到“至多换乘 k 次时的最少站数”；
+只有本层站数变小的站点才需要沿换乘边把结果带入下一层。站点的换乘次数记为其最少站数首次达到时所在的层，
+即达到最少站数所需的最少换乘次数。
+
+reach_matrix() 是多起点的向量化版本：一批起点的距离放在 (站点数, 起点数) 的 NumPy 矩阵中，
+每轮只取出起点站点距离发生变化的边，整批同时松弛，结果与逐个调用 bounded_reach() 完全相同。
+"""
+
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.compiled_graph import CompiledGraph, HOP_WEIGHT
+
+# 向量化版本每批同时处理的起点数（中间矩阵大小约为 批大小 × 活跃边数）
+REACH_BATCH_SIZE = 64
+# 向量化版本中表示不可达的站数（加上一条边的代价也不会溢出 int32）
+_INF = 1 << 30
+
+
+def _ensure_numpy():
+    try:
+        import numpy  # type: ignore
+        return numpy
+    except ImportError as exc:  # pragma: no cover - 环境缺依赖时提示
+        raise ImportError("可达性矩阵需要 numpy 库，请先安装: pip install numpy") from exc
+
+
+def get_stop_costs(graph: CompiledGraph) -> array:
+    """每条边的站数代价：同线路区间为 1，其余（同族换乘、跨线路换乘）为 0，结果缓存在 graph.derived 中"""
+    costs = graph.derived.get('stop_costs')
+    if costs is None:
+        station_weights = graph.weights["min_station"]
+        flags = graph.transfer_edges
+        costs = array('b', (1 if station_weights[e] == HOP_WEIGHT and not flags[e] else 0
+                            for e in range(graph.edge_count)))
+        graph.derived['stop_costs'] = costs
+    return costs
+
+
+def bounded_reach(graph: CompiledGraph, source: int, max_stops: Optional[int] = None,
+                  max_transfers: Optional[int] = None) -> Tuple[List[int], List[int]]:
+    """单起点有界可达性
+
+    Args:
+        graph: 编译后的整数图
+        source: 起点下标
+        max_stops: 站数上限，None 为不限
+        max_transfers: 换乘次数上限，None 为不限
+
+    Returns:
+        (站数, 换乘次数) 两个与节点一一对应的列表，预算内不可达为 -1
+    """
+    offsets = graph.offsets
+    targets = graph.targets
+    flags = graph.transfer_edges
+    stop_costs = get_stop_costs(graph)
+    n = graph.node_count
+    limit = n if max_stops is None else max_stops
+    stops = [-1] * n
+    transfers = [-1] * n
+    stops[source] = 0
+    transfers[source] = 0
+    seeds = [source]
+    layer = 0
+
+    while True:
+        # 本层：从站数变小的站点出发，沿不换乘的边分桶扩展
+        buckets: Dict[int, List[int]] = {}
+        for u in seeds:
+            buckets.setdefault(stops[u], []).append(u)
+        improved = []
+        while buckets:
+            d = min(buckets)
+            bucket = buckets.pop(d)
+            for u in bucket:  # 0 代价的边会向当前桶追加
+                if stops[u] != d:
+                    continue
+                improved.append(u)
+                for e in range(offsets[u], offsets[u + 1]):
+                    if flags[e]:
+                        continue
+                    v = targets[e]
+                    nd = d + stop_costs[e]
+                    if nd <= limit and (stops[v] < 0 or nd < stops[v]):
+                        stops[v] = nd
+                        transfers[v] = layer
+                        if nd == d:
+                            bucket.append(v)
+                        else:
+                            buckets.setdefault(nd, []).append(v)
+
+        if max_transfers is not None and layer >= max_transfers:
+            break
+        # 换乘一次进入下一层（不计站数）
+        layer += 1
+        seeds = []
+        for u in improved:
+            d = stops[u]
+            for e in range(offsets[u], offsets[u + 1]):
+                if not flags[e]:
+                    continue
+                v = targets[e]
+                if stops[v] < 0 or d < stops[v]:
+                    stops[v] = d
+                    transfers[v] = layer
+                    seeds.append(v)
+        if not seeds:
+            break
+    return stops, transfers
+
+
+def reach_matrix(graph: CompiledGraph, sources: Sequence[int], max_stops: Optional[int] = None,
+                 max_transfers: Optional[int] = None, batch_size: int = REACH_BATCH_SIZE):
+    """多起点有界可达性（NumPy 向量化）
+
+    Args:
+        graph: 编译后的整数图
+        sources: 起点下标序列
+        max_stops: 站数上限，None 为不限
+        max_transfers: 换乘次数上限，None 为不限
+        batch_size: 每批同时处理的起点数
+
+    Returns:
+        (站数矩阵, 换乘矩阵)：形状均为 (len(sources), 站点数) 的 int32 数组，
+        第 i 行对应 sources[i]，列为站点下标，预算内不可达为 -1
+
+    Raises:
+        ImportError: 未安装 numpy 时抛出
+    """
+    np = _ensure_numpy()
+    n = graph.node_count
+    edges = _matrix_edges(graph)
+    stops = np.full((len(sources), n), -1, dtype=np.int32)
+    transfers = np.full((len(sources), n), -1, dtype=np.int32)
+    for start in range(0, len(sources), batch_size):
+        batch = np.asarray(sources[start:start + batch_size], dtype=np.int64)
+        dist, layers = _reach_batch(np, n, edges, batch, max_stops, max_transfers)
+        reached = dist < _INF
+        stops[start:start + len(batch)] = np.where(reached, dist, -1).T
+        transfers[start:start + len(batch)] = np.where(reached, layers, -1).T
+    return stops, transfers
+
+
+def _matrix_edges(graph: CompiledGraph) -> Dict[str, object]:
+    """按是否换乘拆分、按终点排序的边数组（NumPy），结果缓存在 graph.derived 中"""
+    cached = graph.derived.get('reach_edges')
+    if cached is None:
+        np = _ensure_numpy()
+        offsets = np.asarray(graph.offsets, dtype=np.int64)
+        sources = np.repeat(np.arange(graph.node_count, dtype=np.int32), np.diff(offsets))
+        targets = np.asarray(graph.targets, dtype=np.int32)
+        flags = np.asarray(graph.transfer_edges, dtype=bool)
+        costs = np.asarray(get_stop_costs(graph), dtype=np.int32)
+        order = np.argsort(targets, kind='stable')
+        sources, targets, flags, costs = sources[order], targets[order], flags[order], costs[order]
+        cached = {
+            'line': (sources[~flags], targets[~flags], costs[~flags]),
+            'transfer': (sources[flags], targets[flags], None),
+        }
+        graph.derived['reach_edges'] = cached
+    return cached
+
+
+def _relax(np, dist, src, dst, cost, limit: int):
+    """把一组（按终点排序的）边的松弛结果写回 dist，返回站数变小的站点"""
+    if len(src) == 0:
+        return np.empty(0, dtype=np.int32)
+    candidate = dist[src]
+    if cost is not None:
+        candidate = candidate + cost[:, None]
+    starts = np.flatnonzero(np.concatenate(([True], dst[1:] != dst[:-1])))
+    nodes = dst[starts]
+    best = np.minimum.reduceat(candidate, starts, axis=0)
+    current = dist[nodes]
+    better = (best < current) & (best <= limit)
+    changed = better.any(axis=1)
+    if not changed.any():
+        return np.empty(0, dtype=np.int32)
+    dist[nodes] = np.where(better, best, current)
+    return nodes[changed]
+
+
+def _reach_batch(np, n: int, edges: Dict[str, object], batch, max_stops: Optional[int],
+                 max_transfers: Optional[int]):
+    """一批起点的分层松弛
+
+    矩阵按 (站点, 起点) 存放，同一站点对整批起点的距离连续，按终点归约时访问连续内存。
+
+    Returns:
+        (站数矩阵, 层号矩阵)，形状为 (站点数, 批大小)，预算内不可达为 _INF
+    """
+    rows = len(batch)
+    dist = np.full((n, rows), _INF, dtype=np.int32)
+    dist[batch, np.arange(rows)] = 0
+    layers = np.zeros((n, rows), dtype=np.int32)
+    line_src, line_dst, line_cost = edges['line']
+    transfer_src, transfer_dst, _ = edges['transfer']
+    limit = _INF - 1 if max_stops is None else max_stops
+    active = np.zeros(n, dtype=bool)
+    active[batch] = True
+    layer = 0
+    before = None
+
+    while True:
+        # 本层：只松弛起点站点上次发生变化的不换乘边，直至不再变化
+        while True:
+            mask = active[line_src]
+            changed = _relax(np, dist, line_src[mask], line_dst[mask], line_cost[mask], limit)
+            active[:] = False
+            if len(changed) == 0:
+                break
+            active[changed] = True
+        if before is not None:
+            layers[dist < before] = layer
+
+        if max_transfers is not None and layer >= max_transfers:
+            break
+        # 换乘一次进入下一层，经换乘边改善的站点也记入新的一层
+        before = dist.copy()
+        changed = _relax(np, dist, transfer_src, transfer_dst, None, limit)
+        if len(changed) == 0:
+            break
+        active[changed] = True
+        layer += 1
+    return dist, layers
+
+
+__all__ = ["bounded_reach", "reach_matrix", "get_stop_costs"]
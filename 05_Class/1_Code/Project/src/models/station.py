@@ -4,7 +4,7 @@
 同线路前后站点关系以及换乘站点关系。
 """
 
-from typing import Optional, List
+from typing import Optional, List, Set
 
 
 class Station:
@@ -20,6 +20,10 @@ class Station:
         next_station: 同线路的后继站点
         transfer_stations: 可换乘的其他线路站点列表
     """
+
+    # 大规模网络（数万站点）下省去每个实例的 __dict__
+    __slots__ = ('id', 'line_name', 'station_name', 'prev_station', 'next_station',
+                 'transfer_stations', '_transfer_ids')
     
     def __init__(self, station_id: int, line_name: str, station_name: str):
         """初始化站点实例
@@ -35,6 +39,8 @@ class Station:
         self.prev_station: Optional[Station] = None
         self.next_station: Optional[Station] = None
         self.transfer_stations: List[Station] = []
+        # 换乘站点ID集合，首次添加换乘站时才创建（多数站点没有换乘）
+        self._transfer_ids: Optional[Set[int]] = None
     
     def add_transfer_station(self, station: 'Station') -> None:
         """添加换乘站点
@@ -42,7 +48,12 @@ class Station:
         Args:
             station: 可换乘的其他线路站点
         """
-        if station not in self.transfer_stations:
+        # 以站点ID集合判重（与 __eq__ 语义一致），避免对列表线性扫描
+        ids = self._transfer_ids
+        if ids is None:
+            ids = self._transfer_ids = set()
+        if station.id not in ids:
+            ids.add(station.id)
             self.transfer_stations.append(station)
     
     def __str__(self) -> str:
@@ -0,0 +1,77 @@
+"""站点的列式（struct-of-arrays）表示
+
+将全网站点拆成若干等长的 NumPy 整数数组（站点ID、线路编号、站名编号），
+线路名和站名各只保存一份字符串表。适合多城市、数万站点规模下的批量统计与筛选，
+不替代 Station 对象图，GUI 和 Formatter 仍使用 Station 属性。
+"""
+
+from typing import Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover - 仅用于类型标注，避免循环导入
+    from models.network import MetroNetwork
+
+
+def _ensure_numpy():
+    try:
+        import numpy  # type: ignore
+        return numpy
+    except ImportError as exc:  # pragma: no cover - 环境缺依赖时提示
+        raise ImportError("列式站点表需要 numpy 库，请先安装: pip install numpy") from exc
+
+
+class StationArrays:
+    """列式站点表
+
+    第 i 行对应 ``network.stations_by_id`` 中的第 i 个站点，
+    与 CompiledGraph 的站点下标一致。
+
+    Attributes:
+        ids: 站点ID（int32）
+        line_index: 线路编号（int32），对应 line_names
+        name_index: 站名编号（int32），对应 station_names，同名站点编号相同
+        line_names: 线路名表
+        station_names: 站名表
+    """
+
+    def __init__(self, network: 'MetroNetwork'):
+        """从地铁网络构建列式表
+
+        Args:
+            network: 地铁网络
+
+        Raises:
+            ImportError: 未安装 numpy 时抛出
+        """
+        np = _ensure_numpy()
+        lines: Dict[str, int] = {}
+        names: Dict[str, int] = {}
+        stations = network.stations_by_id.values()
+        count = len(network.stations_by_id)
+        self.ids = np.fromiter((s.id for s in stations), dtype=np.int32, count=count)
+        self.line_index = np.fromiter(
+            (lines.setdefault(s.line_name, len(lines)) for s in stations), dtype=np.int32, count=count)
+        self.name_index = np.fromiter(
+            (names.setdefault(s.station_name, len(names)) for s in stations), dtype=np.int32, count=count)
+        self.line_names: List[str] = list(lines)
+        self.station_names: List[str] = list(names)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def line_station_ids(self, line_name: str):
+        """返回指定线路全部站点ID组成的数组（线路不存在时为空数组）"""
+        np = _ensure_numpy()
+        try:
+            code = self.line_names.index(line_name)
+        except ValueError:
+            return np.empty(0, dtype=np.int32)
+        return self.ids[self.line_index == code]
+
+    def transfer_hub_counts(self):
+        """每个站名对应的站点（站台）数量，数组下标为站名编号"""
+        np = _ensure_numpy()
+        return np.bincount(self.name_index, minlength=len(self.station_names))
+
+    def nbytes(self) -> int:
+        """三个数组占用的字节数"""
+        return int(self.ids.nbytes + self.line_index.nbytes + self.name_index.nbytes)
@@ -0,0 +1,138 @@
+"""站名检索索引
+
+为站名建立字符 n-gram（单字 + 二元组）倒排索引，查询时对各 n-gram 的倒排表求交集得到候选，
+再做一次子串校验并排序，避免每次按键都扫描全部站点。
+安装 pypinyin 后，同时为全拼和拼音首字母建立索引，可用 "rmgc" / "renmin" 检索 "人民广场"。
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+
+from models.station import Station
+
+if TYPE_CHECKING:  # pragma: no cover - 仅用于类型标注，避免循环导入
+    from models.network import MetroNetwork
+
+
+def _load_pinyin():
+    """可选依赖：未安装 pypinyin 时返回 None，仅按汉字检索"""
+    try:
+        from pypinyin import lazy_pinyin, Style  # type: ignore
+    except ImportError:
+        return None
+
+    def convert(name: str) -> Tuple[str, str]:
+        syllables = lazy_pinyin(name)
+        initials = lazy_pinyin(name, style=Style.FIRST_LETTER)
+        return ''.join(syllables).lower(), ''.join(initials).lower()
+
+    return convert
+
+
+def _ngrams(text: str) -> Set[str]:
+    """文本的全部单字与二元组"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class StationSearchIndex:
+    """站名 n-gram 倒排索引
+
+    Attributes:
+        names: 站名编号 -> 站名（按网络中首次出现的顺序）
+        keys: 站名编号 -> 可检索的键（站名本身，以及可选的全拼、首字母），均为小写
+        postings: n-gram -> 包含该 n-gram 的站名编号集合
+    """
+
+    def __init__(self, network: 'MetroNetwork', use_pinyin: bool = True):
+        """构建索引
+
+        Args:
+            network: 地铁网络
+            use_pinyin: 是否尝试建立拼音键（需安装 pypinyin）
+        """
+        self._stations_by_name = network.stations_by_name
+        self.names: List[str] = list(network.stations_by_name.keys())
+        pinyin = _load_pinyin() if use_pinyin else None
+        self.keys: List[Tuple[str, ...]] = []
+        self.postings: Dict[str, Set[int]] = {}
+        for name_id, name in enumerate(self.names):
+            keys = [name.lower()]
+            if pinyin is not None:
+                keys.extend(pinyin(name))
+            self.keys.append(tuple(keys))
+            for key in keys:
+                for gram in _ngrams(key):
+                    self.postings.setdefault(gram, set()).add(name_id)
+
+    def rebind(self, network: 'MetroNetwork') -> bool:
+        """将索引转移到站名集合及其顺序未变的新网络（如仅换乘关系变化的在线更新），免去重建
+
+        Returns:
+            能否复用；不能复用时索引保持原状
+        """
+        if list(network.stations_by_name.keys()) != self.names:
+            return False
+        self._stations_by_name = network.stations_by_name
+        return True
+
+    def search(self, keyword: str, limit: Optional[int] = None) -> List[Station]:
+        """检索站点
+
+        排序规则：站名完全相同 > 前缀匹配 > 包含匹配，同级按站名长度、再按原始顺序。
+
+        Args:
+            keyword: 关键字（忽略首尾空白与大小写）
+            limit: 最多返回的站点数，None 为不限
+
+        Returns:
+            匹配的站点列表（同名的多个线路站点相邻排列）
+        """
+        query = keyword.strip().lower()
+        if not query:
+            return []
+
+        grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        lists = []
+        for gram in set(grams):
+            posting = self.postings.get(gram)
+            if not posting:
+                return []
+            lists.append(posting)
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates &= posting
+            if not candidates:
+                return []
+
+        ranked = []
+        for name_id in candidates:
+            rank = self._rank(query, self.keys[name_id])
+            if rank is not None:
+                ranked.append((rank, len(self.names[name_id]), name_id))
+        ranked.sort()
+
+        results: List[Station] = []
+        for _, _, name_id in ranked:
+            for station in self._stations_by_name[self.names[name_id]]:
+                results.append(station)
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
+
+    @staticmethod
+    def _rank(query: str, keys: Iterable[str]) -> Optional[int]:
+        """0 完全匹配，1 前缀匹配，2 包含匹配；不匹配返回 None（n-gram 命中但非子串）"""
+        best = None
+        for key in keys:
+            if key == query:
+                return 0
+            if key.startswith(query):
+                best = 1
+            elif best is None and query in key:
+                best = 2
+        return best
+
+
+__all__ = ["StationSearchIndex"]
@@ -0,0 +1,346 @@
+"""地铁换乘路径规划系统 - HTTP/JSON 服务
+
+父进程加载一次网络（含编译图、预计算路径表），随后 fork 出多个工作进程共享同一个监听套接字；
+网络在工作进程中只读，依靠写时复制共享内存。每个工作进程以线程处理连接，支持 HTTP/1.1 keep-alive。
+不支持 fork 的平台（Windows）退化为单进程多线程。
+
+接口：
+    GET  /route?q=起始线路，起始站名-目标线路，目标站名[&strategy=min_transfer][&k=3][&depart=08:30]
+    POST /route     批量查询，请求体为 JSON 数组，元素为 {"q": ..., "strategy": ..., ...} 或查询字符串
+    GET  /search?q=关键字[&limit=20]
+    GET  /lines
+    GET  /metrics   各端点延迟直方图（Prometheus 文本格式，汇总全部工作进程）；
+                    开启 --trace 时附带处理该请求的工作进程内的分阶段耗时与搜索计数
+
+用法：python src/server.py [--port 8000] [--workers N] [--trace]
+"""
+
+import gc
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Union
+from urllib.parse import parse_qs, urlsplit
+
+# 添加src目录到路径，以便导入模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from main import MetroPathPlanner, _get_option
+from models.station import Station
+from services.path_finder import PathNotFoundError
+from services.time_router import TimetableError
+from utils.parser import InvalidInputError
+from utils.metrics import LatencyHistogram
+
+# 端点 -> 支持的方法
+ALLOWED_METHODS = {
+    "/route": ("GET", "POST"),
+    "/search": ("GET",),
+    "/lines": ("GET",),
+    "/metrics": ("GET",),
+}
+ENDPOINTS = tuple(ALLOWED_METHODS)
+STATUSES = ("200", "400", "404", "405", "500")
+# 单个批量请求最多包含的查询数
+MAX_BATCH = 1000
+DEFAULT_SEARCH_LIMIT = 20
+
+
+class ApiError(Exception):
+    """请求参数错误（对应 HTTP 4xx）"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _path_payload(path: List[Union[Station, str]]) -> Dict[str, object]:
+    return {
+        'path': [str(item) for item in path],
+        'stations': sum(1 for item in path if isinstance(item, Station)),
+        'transfers': sum(1 for item in path if item == "换乘"),
+    }
+
+
+class RouteService:
+    """与 HTTP 无关的接口逻辑，输入查询参数，输出可 JSON 序列化的结果
+
+    同一工作进程内的线程共享一个 planner，查询串行执行（纯 Python 计算受 GIL 限制，
+    并行度来自多个工作进程），以保护路径缓存等非线程安全结构。
+    """
+
+    def __init__(self, planner: MetroPathPlanner):
+        self.planner = planner
+        self._lock = threading.Lock()
+
+    def route(self, params: Dict[str, object]) -> Dict[str, object]:
+        """单条路径查询
+
+        Args:
+            params: q（必填，格式同命令行）、strategy、k（备选路线数）、depart（出发时刻）
+
+        Raises:
+            ApiError: 参数错误或未找到站点/路径
+        """
+        query = params.get('q')
+        if not isinstance(query, str) or not query.strip():
+            raise ApiError("缺少参数 q，格式：起始线路，起始站名-目标线路，目标站名")
+        strategy = str(params.get('strategy') or "min_station")
+        if strategy not in ("min_station", "min_transfer"):
+            raise ApiError(f"未知策略: {strategy}")
+        try:
+            k = int(params.get('k') or 1)
+        except (TypeError, ValueError):
+            raise ApiError("参数 k 应为整数")
+        depart = params.get('depart')
+
+        try:
+            with self._lock, self.planner.tracer.request("api_route") as trace:
+                with trace.stage("parse"):
+                    (start_line, start_name), (end_line, end_name) = self.planner.parser.parse_input(query)
+                if depart:
+                    path, depart_s, arrive_s = self.planner.get_timed_route(
+                        start_line, start_name, end_line, end_name, str(depart))
+                    return dict(_path_payload(path), query=query, depart=depart_s, arrive=arrive_s)
+                if k > 1:
+                    routes = self.planner.get_routes(start_line, start_name, end_line, end_name,
+                                                     strategy, k=min(k, 10))
+                    return {'query': query, 'routes': [_path_payload(path) for path in routes]}
+                path = self.planner.get_route(start_line, start_name, end_line, end_name, strategy)
+                with trace.stage("format"):
+                    return dict(_path_payload(path), query=query)
+        except PathNotFoundError as e:
+            raise ApiError(str(e), 404)
+        except (InvalidInputError, TimetableError, ValueError) as e:
+            raise ApiError(str(e))
+
+    def route_batch(self, items: object) -> List[Dict[str, object]]:
+        """批量路径查询，单条失败不影响其他查询（结果中带 error）"""
+        if not isinstance(items, list):
+            raise ApiError("请求体应为 JSON 数组")
+        if len(items) > MAX_BATCH:
+            raise ApiError(f"单次最多 {MAX_BATCH} 条查询")
+        results = []
+        for item in items:
+            params = {'q': item} if isinstance(item, str) else item
+            try:
+                if not isinstance(params, dict):
+                    raise ApiError("数组元素应为查询字符串或对象")
+                results.append(self.route(params))
+            except ApiError as e:
+                results.append({'query': params.get('q') if isinstance(params, dict) else None,
+                                'error': str(e), 'status': e.status})
+        return results
+
+    def search(self, params: Dict[str, object]) -> Dict[str, object]:
+        keyword = str(params.get('q') or '')
+        try:
+            limit = int(params.get('limit') or DEFAULT_SEARCH_LIMIT)
+        except (TypeError, ValueError):
+            raise ApiError("参数 limit 应为整数")
+        network = self.planner.path_finder.network
+        stations = network.search_stations(keyword, limit=limit)
+        return {'query': keyword,
+                'stations': [{'line': s.line_name, 'name': s.station_name} for s in stations]}
+
+    def lines(self) -> Dict[str, object]:
+        network = self.planner.path_finder.network
+        return {'lines': [{'name': name, 'stations': [s.station_name for s in line.stations]}
+                          for name, line in network.lines.items()]}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理（由 make_handler 绑定 service 与 metrics）"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # 响应头与响应体分两次写出，关闭 Nagle 算法以免在长连接上与延迟确认叠加出数十毫秒的等待
+    disable_nagle_algorithm = True
+    service: RouteService
+    metrics: LatencyHistogram
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method: str) -> None:
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        endpoint = url.path.rstrip('/') or '/'
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status = 200
+        try:
+            # 先读完请求体，出错返回时长连接上也不会残留未读的字节
+            payload = self._read_body() if method == 'POST' else b''
+            allowed = ALLOWED_METHODS.get(endpoint)
+            if allowed is None:
+                raise ApiError(f"未知接口: {endpoint}", 404)
+            if method not in allowed:
+                raise ApiError(f"{endpoint} 只支持 {'/'.join(allowed)}", 405)
+            if endpoint == '/metrics':
+                text = self.metrics.render()
+                tracer = self.service.planner.tracer
+                if tracer.enabled:
+                    text += tracer.render()
+                self._send(200, text.encode('utf-8'), "text/plain; version=0.0.4")
+                return
+            body = self._handle(method, endpoint, params, payload)
+            self._send_json(200, body)
+        except ApiError as e:
+            status = e.status
+            headers = {"Allow": ", ".join(ALLOWED_METHODS[endpoint])} if status == 405 else None
+            self._send_json(status, {'error': str(e)}, headers)
+        except Exception as e:  # 兜底，避免工作线程因单个请求崩溃
+            status = 500
+            self._send_json(status, {'error': f"服务器内部错误: {e}"})
+        finally:
+            if endpoint in ENDPOINTS:
+                self.metrics.observe(endpoint, str(status), time.perf_counter() - start)
+
+    def _handle(self, method: str, endpoint: str, params: Dict[str, str], payload: bytes) -> object:
+        service = self.service
+        if endpoint == '/route':
+            if method == 'POST':
+                return {'results': service.route_batch(self._parse_json(payload))}
+            return service.route(params)
+        if endpoint == '/search':
+            return service.search(params)
+        return service.lines()
+
+    def _read_body(self) -> bytes:
+        """按 Content-Length 读取完整请求体
+
+        Raises:
+            ApiError: 长度非法或使用分块传输时抛出；此时无法确定请求边界，响应后关闭连接
+        """
+        if self.headers.get('Transfer-Encoding'):
+            self.close_connection = True
+            raise ApiError("不支持分块传输的请求体，请提供 Content-Length")
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            raise ApiError("Content-Length 不合法")
+        return self.rfile.read(length)
+
+    @staticmethod
+    def _parse_json(payload: bytes) -> object:
+        try:
+            return json.loads(payload or b'null')
+        except ValueError as e:
+            raise ApiError(f"请求体不是合法 JSON: {e}")
+
+    def _send_json(self, status: int, body: object,
+                   headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, json.dumps(body, ensure_ascii=False).encode('utf-8'),
+                   "application/json; charset=utf-8", headers)
+
+    def _send(self, status: int, data: bytes, content_type: str,
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):  # 访问日志默认关闭，延迟见 /metrics
+        pass
+
+
+def make_handler(service: RouteService, metrics: LatencyHistogram) -> type:
+    """生成绑定了 service 与 metrics 的请求处理类"""
+    return type('BoundRequestHandler', (RequestHandler,), {'service': service, 'metrics': metrics})
+
+
+def make_metrics() -> LatencyHistogram:
+    """创建共享内存直方图（须在 fork 之前调用）"""
+    return LatencyHistogram("http_request_duration_seconds",
+                            [(endpoint, status) for endpoint in ENDPOINTS for status in STATUSES])
+
+
+def serve(planner: MetroPathPlanner, host: str = "127.0.0.1", port: int = 8000,
+          workers: Optional[int] = None) -> None:
+    """启动服务并阻塞，直到收到 SIGINT/SIGTERM
+
+    Args:
+        planner: 已加载数据的规划器
+        host: 监听地址
+        port: 监听端口
+        workers: 工作进程数，默认为 CPU 核数；1 或平台不支持 fork 时在当前进程中服务
+    """
+    metrics = make_metrics()
+    server = ThreadingHTTPServer((host, port), make_handler(RouteService(planner), metrics))
+    server.daemon_threads = True
+    workers = workers or os.cpu_count() or 1
+    print(f"✓ 服务已启动: http://{host}:{server.server_address[1]}  工作进程: "
+          f"{workers if hasattr(os, 'fork') else 1}", flush=True)
+
+    if workers <= 1 or not hasattr(os, 'fork'):
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    # 把已加载的对象移出 GC 追踪，减少子进程中因 GC 触碰对象而引起的写时复制
+    gc.freeze()
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(*_):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        stop()
+        for pid in children:
+            os.waitpid(pid, 0)
+    finally:
+        server.server_close()
+
+
+def main():
+    planner = MetroPathPlanner()
+    if not planner.load_data():
+        print("系统初始化失败，程序退出。")
+        sys.exit(1)
+    if '--trace' in sys.argv:
+        # 服务模式下只做汇总（见 /metrics），不逐请求输出日志
+        planner.tracer.enabled = True
+        planner.tracer.stream = None
+    port = _get_option('--port')
+    workers = _get_option('--workers')
+    serve(planner, host=_get_option('--host') or "127.0.0.1", port=int(port) if port else 8000,
+          workers=int(workers) if workers else None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""批量路径查询
+
+读取 ``线路，站名-线路，站名`` 格式的查询流，按起点分组：
+同一起点的所有查询共享一次单源搜索，各组分发到进程池并行计算，
+结果以 JSON Lines 形式流式输出，适合大规模 OD 矩阵报表。
+"""
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, TextIO, Tuple
+
+from models.compiled_graph import GraphTopology
+from models.network import MetroNetwork
+from models.station import Station
+from services import graph_search
+from services.path_finder import PathFinder
+from utils.parser import Parser, InvalidInputError
+
+# (线路名或None, 站名, 角色) -> 站点；无法定位时抛出 ValueError
+StationResolver = Callable[[Optional[str], str, str], Station]
+
+# 子进程中的只读图数据（由 _init_worker 设置）
+_worker_graph: Optional[GraphTopology] = None
+_worker_weights: Sequence[int] = ()
+
+
+def _init_worker(topology: GraphTopology, weights: Sequence[int]) -> None:
+    global _worker_graph, _worker_weights
+    _worker_graph = topology
+    _worker_weights = weights
+
+
+def _solve_group(group: Tuple[int, List[Tuple[int, int]]]) -> List[Tuple[int, Optional[List[int]]]]:
+    """子进程任务：一次单源搜索回答同一起点的全部查询
+
+    Args:
+        group: (起点下标, [(查询序号, 终点下标), ...])
+
+    Returns:
+        [(查询序号, 节点序列或 None), ...]
+    """
+    source, queries = group
+    pred = graph_search.single_source(_worker_graph, source, _worker_weights)
+    results = []
+    for index, target in queries:
+        if pred[target] < 0:
+            results.append((index, None))
+        else:
+            results.append((index, graph_search.reconstruct(pred, source, target)))
+    return results
+
+
+class BatchRouter:
+    """按起点分组的批量路径查询器
+
+    Attributes:
+        network: 地铁网络
+        strategy: 路径策略
+        workers: 进程数，None 为 CPU 核数，1 表示在当前进程中计算
+    """
+
+    def __init__(self, network: MetroNetwork, resolve: StationResolver,
+                 strategy: str = "min_station", workers: Optional[int] = None):
+        """初始化批量查询器
+
+        Args:
+            network: 地铁网络
+            resolve: 站点定位函数，规则与单次查询一致
+            strategy: 路径策略
+            workers: 进程数
+        """
+        self.network = network
+        self.resolve = resolve
+        self.strategy = strategy
+        self.workers = workers
+        self.graph = network.compile()
+        self.weights = self.graph.get_weights(strategy)
+
+    def run(self, lines: Iterable[str], out: TextIO) -> Dict[str, int]:
+        """执行批量查询并逐行写出 JSON 结果
+
+        每行输出包含 index（输入行号，从 1 开始）、query，以及 path/stations/transfers 或 error。
+        解析失败的查询立即输出，其余结果按起点分组完成的顺序输出。
+
+        Args:
+            lines: 查询行（空行忽略）
+            out: 输出流
+
+        Returns:
+            统计信息：total、ok、failed、groups
+        """
+        summary = {'total': 0, 'ok': 0, 'failed': 0, 'groups': 0}
+        queries: Dict[int, str] = {}
+        groups: Dict[int, List[Tuple[int, int]]] = {}
+        index_of = self.graph.index_of
+        resolved: Dict[Tuple[Optional[str], str, str], Station] = {}
+
+        def resolve(line_name: Optional[str], station_name: str, role: str) -> Station:
+            # 大批量查询中端点高度重复，同一端点只定位一次
+            key = (line_name, station_name, role)
+            if key not in resolved:
+                resolved[key] = self.resolve(line_name, station_name, role)
+            return resolved[key]
+
+        for line_no, raw in enumerate(lines, 1):
+            query = raw.strip()
+            if not query:
+                continue
+            summary['total'] += 1
+            try:
+                (start_line, start_name), (end_line, end_name) = Parser.parse_input(query)
+                start = resolve(start_line, start_name, "起点")
+                end = resolve(end_line, end_name, "终点")
+            except (InvalidInputError, ValueError) as e:
+                summary['failed'] += 1
+                self._write(out, {'index': line_no, 'query': query, 'error': str(e)})
+                continue
+            queries[line_no] = query
+            groups.setdefault(index_of[start.id], []).append((line_no, index_of[end.id]))
+
+        summary['groups'] = len(groups)
+        for results in self._solve(list(groups.items())):
+            for line_no, nodes in results:
+                query = queries.pop(line_no)
+                if nodes is None:
+                    summary['failed'] += 1
+                    self._write(out, {'index': line_no, 'query': query, 'error': '未找到路径'})
+                else:
+                    summary['ok'] += 1
+                    self._write(out, self._format_result(line_no, query, nodes))
+        return summary
+
+    def _solve(self, groups: List[Tuple[int, List[Tuple[int, int]]]]):
+        """按组求解，逐组产出结果"""
+        topology = self.graph.topology()
+        if self.workers == 1 or len(groups) <= 1:
+            _init_worker(topology, self.weights)
+            for group in groups:
+                yield _solve_group(group)
+            return
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(topology, self.weights)) as executor:
+            yield from executor.map(_solve_group, groups, chunksize=8)
+
+    def _format_result(self, line_no: int, query: str, nodes: List[int]) -> Dict[str, object]:
+        stations = self.graph.stations
+        path = PathFinder.with_transfer_marks([stations[node] for node in nodes])
+        return {
+            'index': line_no,
+            'query': query,
+            'path': [str(item) for item in path],
+            'stations': len(nodes),
+            'transfers': sum(1 for item in path if item == "换乘"),
+        }
+
+    @staticmethod
+    def _write(out: TextIO, record: Dict[str, object]) -> None:
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write('\n')
+
+
+__all__ = ["BatchRouter"]
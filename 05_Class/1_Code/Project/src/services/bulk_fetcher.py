@@ -0,0 +1,244 @@
+"""多城市并发抓取
+
+基于 asyncio + httpx 同时下载多个城市的 ``srhdata`` 数据：
+全局并发数由信号量限制，同一主机的请求按固定速率错开发出；
+每个城市的响应到达后立即交给 DataFetcher 的流式处理写出 CSV（先写临时文件，全部行成功后再替换），
+并记录各阶段耗时；单个城市失败只记入该城市的结果，不影响其他城市。
+条件请求与压缩缓存和单城市抓取共用（见 DataFetcher.conditional_headers）。
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from services.data_fetcher import API_URL, CITY_CODES, DataFetcher, FetchError
+from config import FETCH_BACKOFF, FETCH_CACHE_DIR, FETCH_RETRIES, FETCH_TIMEOUT, get_city_data_file
+
+
+def _ensure_httpx():
+    try:
+        import httpx  # type: ignore
+        return httpx
+    except ImportError as exc:  # pragma: no cover - 环境缺依赖时提示
+        raise FetchError("并发抓取需要 httpx 库，请先安装: pip install httpx") from exc
+
+
+class CityResult:
+    """单个城市的抓取结果
+
+    Attributes:
+        city: 城市拼音
+        status: "ok"（已更新）、"not_modified"（服务器返回 304）或 "error"
+        rows: 写出的CSV行数
+        download: 下载耗时（秒，含排队等待限速）
+        process: 处理并写出CSV的耗时（秒）
+        attempts: 请求次数（含重试）
+        error: 失败原因
+    """
+
+    __slots__ = ('city', 'status', 'rows', 'download', 'process', 'attempts', 'error')
+
+    def __init__(self, city: str):
+        self.city = city
+        self.status = "error"
+        self.rows = 0
+        self.download = 0.0
+        self.process = 0.0
+        self.attempts = 0
+        self.error = ""
+
+    def to_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _HostRateLimiter:
+    """按主机限速：同一主机相邻两次请求的发出时间至少间隔 1 / rate 秒"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # 单线程事件循环中先占位再等待，并发协程各自拿到不同的发出时刻
+        slot = max(now, self._next.get(host, now))
+        self._next[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class BulkFetcher:
+    """多城市并发抓取器
+
+    Attributes:
+        cities: 待抓取的城市列表
+        concurrency: 同时进行的请求上限
+        per_host_rate: 每个主机每秒最多发出的请求数，<= 0 不限速
+    """
+
+    def __init__(self, cities: Optional[Iterable[str]] = None, concurrency: int = 8,
+                 per_host_rate: float = 4.0, api_url: str = API_URL,
+                 output_for: Callable[[str], str] = get_city_data_file,
+                 cache_dir: Optional[str] = FETCH_CACHE_DIR, timeout: float = FETCH_TIMEOUT,
+                 retries: int = FETCH_RETRIES, backoff: float = FETCH_BACKOFF):
+        """初始化并发抓取器
+
+        Args:
+            cities: 城市拼音列表，默认为 CITY_CODES 中的全部城市
+            concurrency: 并发请求上限
+            per_host_rate: 单主机限速（请求/秒）
+            api_url: 接口地址模板（含 {code}、{city} 占位符）
+            output_for: 城市 -> CSV 输出路径
+            cache_dir: 响应缓存目录，None 表示不缓存
+            timeout: 单次请求超时秒数
+            retries: 临时故障的最大重试次数
+            backoff: 指数退避基数秒数
+
+        Raises:
+            FetchError: 包含未知城市时抛出
+        """
+        self.fetchers = [
+            DataFetcher(city, api_url=api_url, cache_dir=cache_dir, timeout=timeout,
+                        retries=retries, backoff=backoff)
+            for city in (list(cities) if cities is not None else list(CITY_CODES))
+        ]
+        self.cities = [fetcher.city for fetcher in self.fetchers]
+        self.concurrency = concurrency
+        self.per_host_rate = per_host_rate
+        self.output_for = output_for
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    def run(self) -> List[CityResult]:
+        """同步入口：抓取全部城市，返回各城市结果（顺序与 cities 一致）"""
+        return asyncio.run(self.fetch_all())
+
+    async def fetch_all(self) -> List[CityResult]:
+        """并发抓取全部城市"""
+        httpx = _ensure_httpx()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = _HostRateLimiter(self.per_host_rate)
+        limits = httpx.Limits(max_connections=self.concurrency,
+                              max_keepalive_connections=self.concurrency)
+        headers = {"User-Agent": DataFetcher.USER_AGENT}
+        # 与 requests 一致跟随重定向（如 http 跳转到 https）
+        async with httpx.AsyncClient(limits=limits, headers=headers, timeout=self.timeout,
+                                     follow_redirects=True) as client:
+            tasks = [self._fetch_city(client, semaphore, limiter, fetcher) for fetcher in self.fetchers]
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        results = []
+        for fetcher, outcome in zip(self.fetchers, outcomes):
+            if isinstance(outcome, BaseException):
+                # _fetch_city 已按城市记录错误，这里兜底处理取消等意外情况
+                failed = CityResult(fetcher.city)
+                failed.error = f"{type(outcome).__name__}: {outcome}"
+                outcome = failed
+            results.append(outcome)
+        return results
+
+    async def _fetch_city(self, client, semaphore: asyncio.Semaphore,
+                          limiter: _HostRateLimiter, fetcher: DataFetcher) -> CityResult:
+        result = CityResult(fetcher.city)
+        start = time.perf_counter()
+        try:
+            async with semaphore:
+                response = await self._get(client, limiter, fetcher, result)
+            result.download = time.perf_counter() - start
+            if response is None:
+                result.status = "not_modified"
+                return result
+            start = time.perf_counter()
+            # JSON 解析与 CSV 写出是同步的 CPU/磁盘工作，放到线程中，不阻塞其他城市的下载
+            result.rows = await asyncio.to_thread(
+                self._process, fetcher, response.headers, response.content)
+            result.process = time.perf_counter() - start
+            result.status = "ok"
+        except FetchError as e:
+            result.download = result.download or time.perf_counter() - start
+            result.error = str(e)
+        except Exception as e:
+            # 写文件失败等非预期错误同样只记入本城市
+            result.download = result.download or time.perf_counter() - start
+            result.error = f"{type(e).__name__}: {e}"
+        return result
+
+    async def _get(self, client, limiter: _HostRateLimiter, fetcher: DataFetcher,
+                   result: CityResult):
+        """带限速与指数退避重试的条件 GET；304 时返回 None
+
+        城市CSV不存在时不发送条件请求头，否则 304 之后该城市永远不会写出CSV。
+        """
+        httpx = _ensure_httpx()
+        url = fetcher.url
+        host = urlsplit(url).netloc
+        headers = fetcher.conditional_headers() if os.path.exists(self.output_for(fetcher.city)) else {}
+        for attempt in range(self.retries + 1):
+            await limiter.wait(host)
+            result.attempts += 1
+            try:
+                response = await client.get(url, headers=headers)
+            except httpx.HTTPError as exc:
+                error = exc
+            else:
+                if response.status_code == 304 and headers:
+                    return None
+                if response.status_code not in DataFetcher.RETRY_STATUS:
+                    # 重定向已自动跟随，仍为 3xx（如缺少 Location）视为失败，不当作数据处理
+                    if response.is_error or 300 <= response.status_code < 400:
+                        raise FetchError(f"获取数据失败: HTTP {response.status_code}")
+                    return response
+                error = f"HTTP {response.status_code}"
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+        raise FetchError(f"获取数据失败（已重试 {self.retries} 次）: {error}")
+
+    def _process(self, fetcher: DataFetcher, headers, body: bytes) -> int:
+        """解析响应、流式写出CSV并更新缓存，返回行数
+
+        save_to_csv 先写同目录的临时文件，全部行成功后才替换城市CSV，中途出错时原文件保持不变。
+        """
+        try:
+            data = json.loads(body)
+        except ValueError as exc:
+            raise FetchError(f"响应不是合法 JSON: {exc}") from exc
+        counter = _RowCounter(fetcher.iter_rows(data))
+        fetcher.save_to_csv(counter, self.output_for(fetcher.city))
+        # CSV 写出成功后才记录缓存，避免处理失败后被 304 跳过
+        fetcher.save_response(headers, body)
+        return counter.count
+
+
+class _RowCounter:
+    """透传行迭代器并计数"""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self._rows:
+            self.count += 1
+            yield row
+
+
+def format_report(results: List[CityResult], elapsed: float) -> str:
+    """格式化各城市耗时报告"""
+    lines = [f"{'城市':<14}{'状态':<14}{'行数':>7}{'下载(s)':>10}{'处理(s)':>10}{'请求':>6}"]
+    for r in results:
+        lines.append(f"{r.city:<14}{r.status:<14}{r.rows:>7}{r.download:>10.3f}"
+                     f"{r.process:>10.3f}{r.attempts:>6}" + (f"  {r.error}" if r.error else ""))
+    ok = sum(1 for r in results if r.status == "ok")
+    unchanged = sum(1 for r in results if r.status == "not_modified")
+    lines.append(f"共 {len(results)} 个城市：更新 {ok}，未变化 {unchanged}，"
+                 f"失败 {len(results) - ok - unchanged}；总耗时 {elapsed:.2f}s")
+    return "\n".join(lines)
+
+
+__all__ = ["BulkFetcher", "CityResult", "format_report"]
@@ -0,0 +1,624 @@
+"""收缩层次（Contraction Hierarchies）
+
+离线阶段按重要度从低到高逐个收缩节点：删除节点 v 时，对每对邻居 u→v→w，
+若在剩余图中找不到不经过 v 且不长于 u→v→w 的见证路径，就插入捷径 u→w（记录中间节点 v）。
+收缩顺序即节点层级 rank，原图边与捷径按两端层级分为上行图（指向更高层级）与下行图。
+在线查询只在上行图上从起点、在反向的下行图上从终点做双向 Dijkstra，两侧都只向高层级扩展，
+搜索空间通常只有几十个节点；相遇点中代价最小者给出最短路径，捷径按中间节点逐层展开为原图节点序列。
+
+预处理按轮进行：每轮先重新估计“脏”节点的优先级（模拟收缩所需捷径数 - 删除边数 + 已收缩邻居数），
+再选出优先级在邻域内最小的一组互不相邻的节点同时收缩。两步中的见证搜索只读当前剩余图，
+按节点分块交给进程池并行计算；同轮收缩的节点在彼此的见证搜索中视作已删除，结果与依次收缩同样正确。
+每轮结束后把层级与捷径写入检查点，中断后再次构建时从最近一轮继续。
+
+站名随机交织的网络（近似随机图）没有明显的层次，收缩到后期剩余图会迅速稠密、捷径数爆炸。
+剩余图平均出度超过 CORE_DEGREE_LIMIT 时停止收缩，剩余节点作为“核心”排在最高层级，
+核心内部的边同时放入上行图与下行图，查询在核心内退化为普通的双向 Dijkstra，结果依然正确。
+
+文件布局：
+- ``<数据文件名>.ch``: pickle 保存的格式版本、图指纹与各策略的层级和上/下行图数组
+- ``<数据文件名>.ch.partial``: 构建过程中的检查点，完成后删除
+"""
+
+import os
+import pickle
+import heapq
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from models.compiled_graph import CompiledGraph, STRATEGIES
+
+FORMAT_VERSION = 1
+
+# 见证搜索最多定下的节点数，超出时保守地插入捷径（只影响捷径数量，不影响正确性）
+WITNESS_SETTLE_LIMIT = 64
+# 剩余图平均出度超过该值时停止收缩（真实线路数据收缩过程中平均出度不超过 10）
+CORE_DEGREE_LIMIT = 16
+# 一轮中待计算节点少于该数时在当前进程计算，避免进程池的启动与传图开销
+PARALLEL_MIN_NODES = 2000
+
+
+class ContractionError(Exception):
+    """收缩层次构建或加载异常"""
+    pass
+
+
+def default_hierarchy_path(data_file: str) -> str:
+    """根据数据文件路径推导收缩层次文件路径"""
+    return os.path.splitext(data_file)[0] + '.ch'
+
+
+def checkpoint_path(hierarchy_path: str) -> str:
+    """收缩层次文件对应的检查点路径"""
+    return hierarchy_path + '.partial'
+
+
+# ----------------------------------------------------------------------
+# 见证搜索（在子进程或当前进程中运行，只读剩余图）
+# ----------------------------------------------------------------------
+
+# 剩余图：节点 -> {邻居: 权重}，出边与入边各一份（由 _init_worker 设置）
+_worker_out: List[Dict[int, int]] = []
+_worker_in: List[Dict[int, int]] = []
+
+
+def _init_worker(out_edges: List[Dict[int, int]], in_edges: List[Dict[int, int]]) -> None:
+    global _worker_out, _worker_in
+    _worker_out = out_edges
+    _worker_in = in_edges
+
+
+def _witness_costs(source: int, skip: int, excluded: FrozenSet[int], limit: int,
+                   targets: Dict[int, int]) -> Dict[int, int]:
+    """从 source 出发、不经过 skip 与 excluded 的受限 Dijkstra，返回已定下节点的代价"""
+    out_edges = _worker_out
+    dist = {source: 0}
+    settled: Dict[int, int] = {}
+    heap = [(0, source)]
+    remaining = len(targets)
+    while heap and len(settled) < WITNESS_SETTLE_LIMIT:
+        cost, u = heapq.heappop(heap)
+        if u in settled:
+            continue
+        if cost > limit:
+            break
+        settled[u] = cost
+        if u in targets:
+            remaining -= 1
+            if remaining == 0:
+                break
+        for v, weight in out_edges[u].items():
+            if v == skip or v in excluded or v in settled:
+                continue
+            new_cost = cost + weight
+            if new_cost < dist.get(v, new_cost + 1):
+                dist[v] = new_cost
+                heapq.heappush(heap, (new_cost, v))
+    return settled
+
+
+def _shortcuts_for(v: int, excluded: FrozenSet[int]) -> List[Tuple[int, int, int]]:
+    """收缩 v 需要插入的捷径 [(u, w, 代价), ...]"""
+    outgoing = list(_worker_out[v].items())
+    shortcuts = []
+    for u, first in _worker_in[v].items():
+        targets = {w: first + second for w, second in outgoing if w != u}
+        if not targets:
+            continue
+        witness = _witness_costs(u, v, excluded, max(targets.values()), targets)
+        for w, cost in targets.items():
+            if witness.get(w, cost + 1) > cost:
+                shortcuts.append((u, w, cost))
+    return shortcuts
+
+
+def _simulate(task: Tuple[List[int], FrozenSet[int]]) -> List[Tuple[int, List[Tuple[int, int, int]]]]:
+    """子进程任务：对一批节点计算收缩所需的捷径"""
+    nodes, excluded = task
+    return [(v, _shortcuts_for(v, excluded)) for v in nodes]
+
+
+def _run(nodes: List[int], excluded: FrozenSet[int], out_edges: List[Dict[int, int]],
+         in_edges: List[Dict[int, int]], workers: Optional[int],
+         chunk_size: int) -> Iterable[Tuple[int, List[Tuple[int, int, int]]]]:
+    """对一批节点计算捷径；节点较多且允许多进程时分块并行"""
+    if workers == 1 or len(nodes) < PARALLEL_MIN_NODES:
+        _init_worker(out_edges, in_edges)
+        return _simulate((nodes, excluded))
+    chunks = [(nodes[i:i + chunk_size], excluded) for i in range(0, len(nodes), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(out_edges, in_edges)) as executor:
+        for part in executor.map(_simulate, chunks):
+            results.extend(part)
+    return results
+
+
+# ----------------------------------------------------------------------
+# 收缩层次
+# ----------------------------------------------------------------------
+
+class ContractionHierarchy:
+    """单一策略的收缩层次
+
+    上行图第 u 个节点的出边为 ``up_targets[up_offsets[u]:up_offsets[u + 1]]``（目标层级更高），
+    下行图按终点存放：``down_targets[down_offsets[v]:down_offsets[v + 1]]`` 是指向 v 且起点层级更高的边的起点。
+    ``*_middle`` 为捷径的中间节点，原图边为 -1。层级不低于 core_rank 的核心节点之间的边同时出现在两个图中。
+
+    Attributes:
+        strategy: 权重策略
+        rank: 节点 -> 收缩顺序（层级）
+        core_rank: 未收缩核心的起始层级，全部收缩时等于节点数
+        shortcut_count: 插入的捷径数
+    """
+
+    STATE_FIELDS = ('strategy', 'rank', 'core_rank', 'shortcut_count',
+                    'up_offsets', 'up_targets', 'up_weights', 'up_middle',
+                    'down_offsets', 'down_targets', 'down_weights', 'down_middle')
+
+    def __init__(self, state: Dict[str, object]):
+        for field in self.STATE_FIELDS:
+            setattr(self, field, state[field])
+
+    @property
+    def node_count(self) -> int:
+        return len(self.rank)
+
+    @classmethod
+    def build(cls, graph, strategy: str, workers: Optional[int] = None,
+              checkpoint: Optional[str] = None, chunk_size: int = 256) -> 'ContractionHierarchy':
+        """收缩节点并生成上/下行图
+
+        Args:
+            graph: CompiledGraph，或具有相同 CSR 接口（offsets/targets/node_count/get_weights）的图
+            strategy: 权重策略
+            workers: 进程数，None 为 CPU 核数，1 表示在当前进程中计算
+            checkpoint: 检查点路径；提供时每轮结束后写入，已有同一策略的检查点则从中继续
+            chunk_size: 每个子任务包含的节点数
+
+        Returns:
+            构建完成的收缩层次
+        """
+        weights = graph.get_weights(strategy)
+        state = _read_checkpoint(checkpoint, graph) if checkpoint else None
+        progress = state.get('current') if state else None
+        if progress is None or progress['strategy'] != strategy:
+            progress = _Progress.fresh(graph.node_count, strategy)
+        else:
+            progress = _Progress.restore(progress)
+        contractor = _Contractor(graph, weights, progress)
+
+        while contractor.remaining and not contractor.is_dense():
+            contractor.contract_round(workers, chunk_size)
+            if checkpoint:
+                done = state.get('done', {}) if state else {}
+                _write_checkpoint(checkpoint, graph, done, progress.export())
+        return cls(contractor.finish())
+
+    def export_state(self) -> Dict[str, object]:
+        """导出可序列化的数组状态"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    def query(self, source: int, target: int,
+              stats: Optional[Dict[str, int]] = None) -> Optional[List[int]]:
+        """双向上行搜索并展开捷径
+
+        Args:
+            source: 起点下标
+            target: 终点下标
+            stats: 可选的统计字典，写入 settled（两侧出堆定点数之和）和 pushes（入堆次数）
+
+        Returns:
+            原图上的节点序列；不可达时返回 None
+        """
+        if source == target:
+            return [source]
+        inf = float('inf')
+        sides = (
+            (self.up_offsets, self.up_targets, self.up_weights),
+            (self.down_offsets, self.down_targets, self.down_weights),
+        )
+        dist = ({source: 0}, {target: 0})
+        pred: Tuple[Dict[int, int], Dict[int, int]] = ({source: source}, {target: target})
+        done = (set(), set())
+        heaps = ([(0, source)], [(0, target)])
+        best = inf
+        meet = -1
+        settled = 0
+        pushes = 2
+
+        side = 0
+        while heaps[0] or heaps[1]:
+            # 两侧交替扩展，某侧堆顶已不小于当前最优时该侧停止
+            if not heaps[side] or heaps[side][0][0] >= best:
+                side = 1 - side
+                if not heaps[side] or heaps[side][0][0] >= best:
+                    break
+            cost, u = heapq.heappop(heaps[side])
+            if u in done[side]:
+                side = 1 - side
+                continue
+            done[side].add(u)
+            settled += 1
+            other = dist[1 - side].get(u)
+            if other is not None and cost + other < best:
+                best = cost + other
+                meet = u
+            offsets, targets, weights = sides[side]
+            side_dist = dist[side]
+            side_pred = pred[side]
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                new_cost = cost + weights[e]
+                if new_cost < side_dist.get(v, inf):
+                    side_dist[v] = new_cost
+                    side_pred[v] = u
+                    pushes += 1
+                    heapq.heappush(heaps[side], (new_cost, v))
+            side = 1 - side
+
+        if stats is not None:
+            stats['settled'] = settled
+            stats['pushes'] = pushes
+        if meet < 0:
+            return None
+
+        hops = [meet]
+        node = meet
+        while node != source:
+            node = pred[0][node]
+            hops.append(node)
+        hops.reverse()
+        node = meet
+        while node != target:
+            node = pred[1][node]
+            hops.append(node)
+
+        nodes = [source]
+        for a, b in zip(hops, hops[1:]):
+            self._unpack(a, b, nodes)
+        return nodes
+
+    def _unpack(self, a: int, b: int, nodes: List[int]) -> None:
+        """把边 a->b 展开为原图节点（不含 a）追加到 nodes"""
+        stack = [(a, b)]
+        while stack:
+            x, y = stack.pop()
+            middle = self._middle(x, y)
+            if middle < 0:
+                nodes.append(y)
+            else:
+                stack.append((middle, y))
+                stack.append((x, middle))
+
+    def _middle(self, a: int, b: int) -> int:
+        """边 a->b 的中间节点（原图边为 -1）"""
+        if self.rank[b] > self.rank[a]:
+            offsets, targets, middles, key, other = self.up_offsets, self.up_targets, self.up_middle, a, b
+        else:
+            offsets, targets, middles, key, other = self.down_offsets, self.down_targets, self.down_middle, b, a
+        for e in range(offsets[key], offsets[key + 1]):
+            if targets[e] == other:
+                return middles[e]
+        raise ContractionError(f"收缩层次中缺少边 {a}->{b}")
+
+    def __repr__(self) -> str:
+        return (f"ContractionHierarchy(strategy={self.strategy}, nodes={self.node_count}, "
+                f"shortcuts={self.shortcut_count}, core={self.node_count - self.core_rank})")
+
+
+class _Progress:
+    """构建进度：可写入检查点的全部状态"""
+
+    FIELDS = ('strategy', 'rank', 'next_rank', 'rounds', 'priority', 'dirty', 'deleted',
+              'shortcut_from', 'shortcut_to', 'shortcut_cost', 'shortcut_middle')
+
+    @classmethod
+    def fresh(cls, n: int, strategy: str) -> '_Progress':
+        progress = cls()
+        progress.strategy = strategy
+        progress.rank = array('i', [-1]) * n
+        progress.next_rank = 0
+        progress.rounds = 0
+        progress.priority = array('i', [0]) * n
+        progress.dirty = bytearray(b'\x01') * n
+        progress.deleted = array('i', [0]) * n
+        progress.shortcut_from = array('i')
+        progress.shortcut_to = array('i')
+        progress.shortcut_cost = array('q')
+        progress.shortcut_middle = array('i')
+        return progress
+
+    @classmethod
+    def restore(cls, state: Dict[str, object]) -> '_Progress':
+        progress = cls()
+        for field in cls.FIELDS:
+            setattr(progress, field, state[field])
+        return progress
+
+    def export(self) -> Dict[str, object]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class _Contractor:
+    """在剩余图上按轮收缩节点"""
+
+    def __init__(self, graph, weights: Sequence[int], progress: _Progress):
+        self.graph = graph
+        self.weights = weights
+        self.progress = progress
+        n = graph.node_count
+        rank = progress.rank
+        self.out_edges: List[Dict[int, int]] = [{} for _ in range(n)]
+        self.in_edges: List[Dict[int, int]] = [{} for _ in range(n)]
+        for u in range(n):
+            if rank[u] >= 0:
+                continue
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                v = graph.targets[e]
+                if rank[v] < 0 and u != v:
+                    self._add_edge(u, v, weights[e])
+        # 从检查点继续时，两端都未收缩的捷径仍在剩余图中
+        for u, v, cost in zip(progress.shortcut_from, progress.shortcut_to, progress.shortcut_cost):
+            if rank[u] < 0 and rank[v] < 0:
+                self._add_edge(u, v, cost)
+        self.remaining = [v for v in range(n) if rank[v] < 0]
+
+    def _add_edge(self, u: int, v: int, cost: int) -> None:
+        edges = self.out_edges[u]
+        if cost < edges.get(v, cost + 1):
+            edges[v] = cost
+            self.in_edges[v][u] = cost
+
+    def is_dense(self) -> bool:
+        """剩余图平均出度是否超过 CORE_DEGREE_LIMIT"""
+        out_edges = self.out_edges
+        edges = sum(len(out_edges[v]) for v in self.remaining)
+        return edges > CORE_DEGREE_LIMIT * len(self.remaining)
+
+    def contract_round(self, workers: Optional[int], chunk_size: int) -> None:
+        progress = self.progress
+        priority, dirty, deleted = progress.priority, progress.dirty, progress.deleted
+        out_edges, in_edges = self.out_edges, self.in_edges
+
+        stale = [v for v in self.remaining if dirty[v]]
+        for v, shortcuts in _run(stale, frozenset(), out_edges, in_edges, workers, chunk_size):
+            priority[v] = len(shortcuts) - len(out_edges[v]) - len(in_edges[v]) + deleted[v]
+            dirty[v] = 0
+
+        # 优先级（节点编号打破平局）在所有邻居中最小的节点互不相邻，可在同一轮收缩
+        selected = []
+        for v in self.remaining:
+            key = (priority[v], v)
+            if all(key < (priority[x], x) for x in out_edges[v]) and \
+                    all(key < (priority[x], x) for x in in_edges[v]):
+                selected.append(v)
+
+        results = _run(selected, frozenset(selected), out_edges, in_edges, workers, chunk_size)
+        for v, shortcuts in sorted(results):
+            progress.rank[v] = progress.next_rank
+            progress.next_rank += 1
+            for u, w, cost in shortcuts:
+                self._add_edge(u, w, cost)
+                progress.shortcut_from.append(u)
+                progress.shortcut_to.append(w)
+                progress.shortcut_cost.append(cost)
+                progress.shortcut_middle.append(v)
+            for x in out_edges[v]:
+                del in_edges[x][v]
+                deleted[x] += 1
+                dirty[x] = 1
+            for x in in_edges[v]:
+                del out_edges[x][v]
+                deleted[x] += 1
+                dirty[x] = 1
+            out_edges[v] = {}
+            in_edges[v] = {}
+        progress.rounds += 1
+        rank = progress.rank
+        self.remaining = [v for v in self.remaining if rank[v] < 0]
+
+    def finish(self) -> Dict[str, object]:
+        """合并原图边与捷径（同一对节点只保留代价最小者，平局时保留原图边），按层级拆分为上/下行图"""
+        graph, weights, progress = self.graph, self.weights, self.progress
+        n = graph.node_count
+        rank = progress.rank
+        core_rank = progress.next_rank
+        for v in self.remaining:
+            rank[v] = progress.next_rank
+            progress.next_rank += 1
+        best: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        for u in range(n):
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                key = (u, graph.targets[e])
+                if key[0] != key[1] and (key not in best or weights[e] < best[key][0]):
+                    best[key] = (weights[e], -1)
+        for u, v, cost, middle in zip(progress.shortcut_from, progress.shortcut_to,
+                                      progress.shortcut_cost, progress.shortcut_middle):
+            key = (u, v)
+            if key not in best or cost < best[key][0]:
+                best[key] = (cost, middle)
+
+        up: List[List[Tuple[int, int, int]]] = [[] for _ in range(n)]
+        down: List[List[Tuple[int, int, int]]] = [[] for _ in range(n)]
+        for (u, v), (cost, middle) in best.items():
+            if rank[u] >= core_rank and rank[v] >= core_rank:
+                up[u].append((v, cost, middle))
+                down[v].append((u, cost, middle))
+            elif rank[v] > rank[u]:
+                up[u].append((v, cost, middle))
+            else:
+                down[v].append((u, cost, middle))
+
+        state: Dict[str, object] = {
+            'strategy': progress.strategy,
+            'rank': progress.rank,
+            'core_rank': core_rank,
+            'shortcut_count': len(progress.shortcut_from),
+        }
+        for prefix, lists in (('up', up), ('down', down)):
+            offsets, targets = array('i', [0]), array('i')
+            costs, middles = array('q'), array('i')
+            for edges in lists:
+                for v, cost, middle in edges:
+                    targets.append(v)
+                    costs.append(cost)
+                    middles.append(middle)
+                offsets.append(len(targets))
+            state[f'{prefix}_offsets'] = offsets
+            state[f'{prefix}_targets'] = targets
+            state[f'{prefix}_weights'] = costs
+            state[f'{prefix}_middle'] = middles
+        return state
+
+
+# ----------------------------------------------------------------------
+# 构建、保存与加载
+# ----------------------------------------------------------------------
+
+def _read_checkpoint(path: str, graph) -> Optional[Dict]:
+    """读取与当前图匹配的检查点；不存在、损坏或不匹配时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if (not isinstance(state, dict) or state.get('version') != FORMAT_VERSION
+            or state.get('fingerprint') != _fingerprint(graph)):
+        return None
+    return state
+
+
+def _write_checkpoint(path: str, graph, done: Dict[str, Dict], current: Optional[Dict]) -> None:
+    """先写临时文件再原子替换，中途被打断时旧检查点仍然完整"""
+    state = {'version': FORMAT_VERSION, 'fingerprint': _fingerprint(graph),
+             'done': done, 'current': current}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _fingerprint(graph) -> Optional[str]:
+    fingerprint = getattr(graph, 'fingerprint', None)
+    return fingerprint() if fingerprint else None
+
+
+def build_hierarchies(graph: CompiledGraph, workers: Optional[int] = None,
+                      checkpoint: Optional[str] = None) -> Dict[str, ContractionHierarchy]:
+    """为全部策略构建收缩层次，可从检查点继续
+
+    Args:
+        graph: 编译后的整数图
+        workers: 进程数，None 为 CPU 核数，1 表示在当前进程中计算
+        checkpoint: 检查点路径；每轮及每个策略完成后写入
+
+    Returns:
+        策略名 -> 收缩层次
+    """
+    state = _read_checkpoint(checkpoint, graph) if checkpoint else None
+    done: Dict[str, Dict] = dict(state['done']) if state else {}
+    hierarchies = {}
+    for strategy in STRATEGIES:
+        if strategy in done:
+            hierarchies[strategy] = ContractionHierarchy(done[strategy])
+            continue
+        hierarchy = ContractionHierarchy.build(graph, strategy, workers, checkpoint)
+        hierarchies[strategy] = hierarchy
+        done[strategy] = hierarchy.export_state()
+        if checkpoint:
+            _write_checkpoint(checkpoint, graph, done, None)
+    return hierarchies
+
+
+def save_hierarchies(path: str, graph: CompiledGraph,
+                     hierarchies: Dict[str, ContractionHierarchy]) -> None:
+    """保存收缩层次并删除检查点"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    state = {
+        'version': FORMAT_VERSION,
+        'fingerprint': graph.fingerprint(),
+        'hierarchies': {name: hierarchy.export_state() for name, hierarchy in hierarchies.items()},
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    if os.path.exists(checkpoint_path(path)):
+        os.remove(checkpoint_path(path))
+
+
+def load_hierarchies(path: str, graph: CompiledGraph) -> Dict[str, ContractionHierarchy]:
+    """加载收缩层次
+
+    Raises:
+        ContractionError: 文件缺失、损坏、版本不符或与当前网络不匹配时抛出
+    """
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError) as exc:
+        raise ContractionError(f"无法读取收缩层次: {exc}") from exc
+    if not isinstance(state, dict) or state.get('version') != FORMAT_VERSION:
+        raise ContractionError("收缩层次格式版本不匹配，请重新预处理")
+    if state.get('fingerprint') != graph.fingerprint():
+        raise ContractionError("收缩层次与当前线路数据不匹配，请重新预处理")
+    return {name: ContractionHierarchy(item) for name, item in state['hierarchies'].items()}
+
+
+def attach_hierarchies(graph: CompiledGraph, hierarchies: Dict[str, ContractionHierarchy]) -> None:
+    """把已加载的收缩层次放入编译图的派生缓存，供 get_hierarchy 使用"""
+    for name, hierarchy in hierarchies.items():
+        graph.derived[f'ch:{name}'] = hierarchy
+
+
+def build_in_background(graph: CompiledGraph, path: Optional[str] = None,
+                        workers: Optional[int] = None) -> threading.Thread:
+    """在后台线程中构建全部策略的收缩层次，完成后放入派生缓存（并保存到 path）
+
+    构建期间 get_hierarchy 对该图返回 None，调用方应改用普通搜索，而不是在查询中同步构建。
+
+    Returns:
+        已启动的守护线程
+    """
+    graph.derived['ch:building'] = True
+
+    def worker():
+        try:
+            hierarchies = build_hierarchies(
+                graph, workers=workers, checkpoint=checkpoint_path(path) if path else None)
+            attach_hierarchies(graph, hierarchies)
+            if path:
+                save_hierarchies(path, graph, hierarchies)
+        except (ContractionError, OSError):
+            pass  # 后台构建失败时保持回退搜索，下次 --precompute-ch 可重新生成
+        finally:
+            graph.derived.pop('ch:building', None)
+
+    thread = threading.Thread(target=worker, name="ch-build", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_hierarchy(graph: CompiledGraph, strategy: str) -> Optional[ContractionHierarchy]:
+    """获取（必要时在当前进程中构建）指定策略的收缩层次，结果缓存在 graph.derived 中
+
+    Returns:
+        收缩层次；该图的收缩层次正在后台构建（见 build_in_background）时返回 None
+    """
+    key = f'ch:{strategy}'
+    hierarchy = graph.derived.get(key)
+    if hierarchy is None:
+        if graph.derived.get('ch:building'):
+            return None
+        hierarchy = ContractionHierarchy.build(graph, strategy, workers=1)
+        graph.derived[key] = hierarchy
+    return hierarchy
+
+
+__all__ = ["ContractionHierarchy", "ContractionError", "build_hierarchies", "save_hierarchies",
+           "load_hierarchies", "attach_hierarchies", "get_hierarchy", "build_in_background",
+           "default_hierarchy_path",
+           "checkpoint_path"]
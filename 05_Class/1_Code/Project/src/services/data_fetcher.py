@@ -5,13 +5,54 @@
 
 from __future__ import annotations
 
+import contextlib
 import csv
+import gzip
+import json
 import os
 from collections import defaultdict
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-CITY_CODE = "3100"  # 上海
-API_URL = f"http://map.amap.com/service/subway?_1469083453978&srhdata={CITY_CODE}_drw_{{city}}.json"
+from config import FETCH_BACKOFF, FETCH_CACHE_DIR, FETCH_RETRIES, FETCH_TIMEOUT
+
+# 高德地铁图的城市编码（城市拼音 -> 编码）
+CITY_CODES: Dict[str, str] = {
+    "beijing": "1100",
+    "tianjin": "1200",
+    "shijiazhuang": "1301",
+    "shenyang": "2101",
+    "dalian": "2102",
+    "changchun": "2201",
+    "haerbin": "2301",
+    "shanghai": "3100",
+    "nanjing": "3201",
+    "wuxi": "3202",
+    "suzhou": "3205",
+    "hangzhou": "3301",
+    "ningbo": "3302",
+    "hefei": "3401",
+    "fuzhou": "3501",
+    "xiamen": "3502",
+    "nanchang": "3601",
+    "qingdao": "3702",
+    "zhengzhou": "4101",
+    "wuhan": "4201",
+    "changsha": "4301",
+    "guangzhou": "4401",
+    "shenzhen": "4403",
+    "foshan": "4406",
+    "dongguan": "4419",
+    "nanning": "4501",
+    "chongqing": "5000",
+    "chengdu": "5101",
+    "guiyang": "5201",
+    "kunming": "5301",
+    "xian": "6101",
+    "lanzhou": "6201",
+    "wulumuqi": "6501",
+}
+CITY_CODE = CITY_CODES["shanghai"]  # 上海（兼容旧代码）
+API_URL = "http://map.amap.com/service/subway?_1469083453978&srhdata={code}_drw_{city}.json"
 DEFAULT_CITY = "shanghai"
 
 
@@ -21,9 +62,40 @@ class FetchError(Exception):
 
 class DataFetcher:
     LOOP_LINES = ["4号线"]
+    USER_AGENT = (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    )
+    # 这些状态码视为临时故障，按指数退避重试
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, city: str = DEFAULT_CITY, city_code: Optional[str] = None,
+                 api_url: str = API_URL, cache_dir: Optional[str] = FETCH_CACHE_DIR,
+                 timeout: float = FETCH_TIMEOUT, retries: int = FETCH_RETRIES,
+                 backoff: float = FETCH_BACKOFF):
+        """
+        Args:
+            city: 城市拼音（如 "shanghai"）
+            city_code: 高德城市编码，默认按 CITY_CODES 查找
+            api_url: 接口地址模板（含 {code}、{city} 占位符），可指向本地桩服务器
+            cache_dir: 响应缓存目录，None 表示不缓存
+            timeout: 单次请求超时秒数
+            retries: 连接错误与临时性状态码的最大重试次数
+            backoff: 指数退避的基数秒数（第 n 次重试前等待 backoff * 2^(n-1)）
 
-    def __init__(self, city: str = DEFAULT_CITY):
+        Raises:
+            FetchError: 城市未知且未提供编码时抛出
+        """
         self.city = city
+        self.city_code = city_code or CITY_CODES.get(city)
+        if self.city_code is None:
+            raise FetchError(f"未知城市: {city}，请提供 city_code")
+        self.api_url = api_url
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._session = None
 
     def _ensure_requests(self):
         try:
@@ -32,26 +104,132 @@ class DataFetcher:
         except ImportError as exc:  # pragma: no cover - 环境缺依赖时提示
             raise FetchError("缺少 requests 库，请先安装: pip install requests") from exc
 
-    def fetch_raw(self) -> Dict:
-        """拉取原始 JSON 数据"""
-        requests = self._ensure_requests()
-        url = API_URL.format(city=self.city)
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
+    @property
+    def url(self) -> str:
+        return self.api_url.format(code=self.city_code, city=self.city)
+
+    @property
+    def session(self):
+        """连接池复用的会话（首次使用时创建），带指数退避重试"""
+        if self._session is None:
+            requests = self._ensure_requests()
+            from requests.adapters import HTTPAdapter  # type: ignore
+            from urllib3.util.retry import Retry  # type: ignore
+
+            retry = Retry(total=self.retries, backoff_factor=self.backoff,
+                          status_forcelist=self.RETRY_STATUS, allowed_methods=frozenset({"GET"}))
+            adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=8)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = self.USER_AGENT
+            self._session = session
+        return self._session
+
+    def close(self) -> None:
+        """关闭会话连接池"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _cache_paths(self) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, self.city)
+        return base + ".json.gz", base + ".meta.json"
+
+    def _read_cache(self) -> Tuple[Optional[Dict[str, str]], Optional[bytes]]:
+        """读取缓存的元数据与原始响应；缺失、损坏或地址不符时返回 (None, None)"""
+        if not self.cache_dir:
+            return None, None
+        body_path, meta_path = self._cache_paths()
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with gzip.open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError, EOFError):
+            return None, None
+        if meta.get("url") != self.url:
+            return None, None
+        return meta, body
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """根据缓存生成条件请求头；无可用缓存时为空"""
+        meta, _ = self._read_cache()
+        headers: Dict[str, str] = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def save_response(self, headers, body: bytes) -> None:
+        """压缩保存原始响应及校验头（先写临时文件再替换），写入失败不影响抓取"""
+        if not self.cache_dir:
+            return
+        meta = {"url": self.url}
+        for header, key in (("ETag", "etag"), ("Last-Modified", "last_modified")):
+            if headers.get(header):
+                meta[key] = headers[header]
+        body_path, meta_path = self._cache_paths()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with gzip.open(body_path + ".tmp", "wb") as f:
+                f.write(body)
+            os.replace(body_path + ".tmp", body_path)
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(meta_path + ".tmp", meta_path)
+        except OSError:
+            pass
+
+    def fetch(self) -> Optional[Tuple[Dict, Any, bytes]]:
+        """条件请求：数据自上次抓取以来未变化时返回 None
+
+        有缓存时携带 If-None-Match / If-Modified-Since，服务器返回 304 即视为未变化，
+        不再下载和解析。返回 200 时不更新缓存：调用方在数据成功应用或写出后
+        再调用 save_response(headers, body)，否则处理失败后的下一次请求会被 304 跳过。
+
+        Returns:
+            (解析后的 JSON, 响应头, 原始响应体)；未变化时为 None
+
+        Raises:
+            FetchError: 网络错误（重试后仍失败）或响应不是合法 JSON 时抛出
+        """
+        headers = self.conditional_headers()
         try:
-            resp = requests.get(url, headers=headers, timeout=15)
+            resp = self.session.get(self.url, headers=headers, timeout=self.timeout)
+            if resp.status_code == 304 and headers:
+                return None
             resp.raise_for_status()
-            return resp.json()
+            data = json.loads(resp.content)
         except Exception as exc:
             raise FetchError(f"获取数据失败: {exc}") from exc
+        return data, resp.headers, resp.content
 
-    def _fix_topology(self, lines: List[Dict]) -> List[Tuple[str, List[Dict]]]:
-        """修复拓扑：闭合环线、分叉重命名并返回标准结构"""
+    def fetch_raw(self) -> Dict:
+        """拉取原始 JSON 数据（未变化时返回缓存内容），不更新缓存"""
+        response = self.fetch()
+        if response is not None:
+            return response[0]
+        return self._cached_data()
+
+    def _cached_data(self) -> Dict:
+        """读取缓存中的上次响应
+
+        Raises:
+            FetchError: 缓存缺失或损坏时抛出
+        """
+        _, cached = self._read_cache()
+        try:
+            return json.loads(cached)
+        except (TypeError, ValueError) as exc:
+            raise FetchError(f"缓存数据损坏: {exc}") from exc
+
+    def _fix_topology(self, lines: Iterable[Dict]) -> Iterator[Tuple[str, List[Dict]]]:
+        """修复拓扑：闭合环线、分叉重命名，逐条产出 (线路名, 站点列表)"""
 
         seen_lines: Dict[str, List[List[str]]] = {}
-        fixed: List[Tuple[str, List[Dict]]] = []
 
         for line in lines:
             line_name = line.get("ln")
@@ -82,76 +260,104 @@ class DataFetcher:
                     final_line_name = f"{base_name}{suffix}"
             seen_lines.setdefault(base_name, []).append(station_names)
 
-            fixed.append((final_line_name, stations_fixed))
-
-        return fixed
+            yield final_line_name, stations_fixed
 
     def process(self, data: Dict) -> List[Dict[str, str]]:
         """将 JSON 转为 CSV 行列表
 
         返回字段：站点ID, 线路名, 站名, 可换乘站点ID
         """
-        if not data or "l" not in data:
+        return list(self.iter_rows(data))
+
+    def iter_rows(self, data: Dict) -> Iterator[Dict[str, str]]:
+        """流式生成 CSV 行
+
+        一次遍历线路为站点编号，写入按 ID 下标的站点表，同时按站名聚合 ID；
+        之后顺序产出各行，换乘 ID 直接取自同名 ID 列表。总耗时与站点数成线性关系。
+        数据格式在调用时立即校验，而不是等到迭代开始，调用方可以在打开输出文件之前发现错误。
+
+        Raises:
+            FetchError: 数据缺少 'l' 字段或线路、站点不是对象时抛出
+        """
+        self.validate(data)
+        return self._iter_rows(data)
+
+    @staticmethod
+    def validate(data: Dict) -> None:
+        """校验接口数据的结构
+
+        Raises:
+            FetchError: 数据缺少 'l' 字段或线路、站点不是对象时抛出
+        """
+        if not isinstance(data, dict) or "l" not in data:
             raise FetchError("数据格式不正确：缺少 'l' 字段")
+        lines = data["l"]
+        if not isinstance(lines, list):
+            raise FetchError("数据格式不正确：'l' 字段不是列表")
+        for line in lines:
+            if not isinstance(line, dict):
+                raise FetchError("数据格式不正确：线路不是对象")
+            stations = line.get("st") or []
+            if not isinstance(stations, list) or not all(isinstance(st, dict) for st in stations):
+                raise FetchError(f"数据格式不正确：线路 {line.get('ln')} 的站点不是对象列表")
 
-        fixed_lines = self._fix_topology(data["l"])
-        csv_rows: List[Dict[str, str]] = []
-        station_name_map: Dict[str, List[int]] = defaultdict(list)
-        all_stations: List[Dict[str, object]] = []
+    def _iter_rows(self, data: Dict) -> Iterator[Dict[str, str]]:
+        # 站点表：下标 i 对应站点ID i + 1
+        table: List[Tuple[str, str]] = []
+        ids_by_name: Dict[str, List[int]] = defaultdict(list)
         dedupe_seen: set[Tuple[str, str]] = set()
 
-        current_id = 1
-        for line_name, stations in fixed_lines:
+        for line_name, stations in self._fix_topology(data["l"]):
             for st in stations:
                 st_name = st.get("n")
                 if not st_name:
                     continue
-                is_loop_closure = bool(st.get("_loop_closure"))
                 key = (line_name, st_name)
-                if key in dedupe_seen and not is_loop_closure:
+                if key in dedupe_seen and not st.get("_loop_closure"):
                     continue
                 dedupe_seen.add(key)
+                table.append(key)
+                ids_by_name[st_name].append(len(table))
 
-                station_obj = {
-                    "id": current_id,
-                    "line": line_name,
-                    "name": st_name,
-                    "transfer_ids": []  # type: ignore[list-item]
-                }
-                all_stations.append(station_obj)
-                station_name_map[st_name].append(current_id)
-                current_id += 1
-
-        # 计算换乘
-        for ids in station_name_map.values():
-            if len(ids) > 1:
-                for s_id in ids:
-                    station_obj = next(s for s in all_stations if s["id"] == s_id)
-                    station_obj["transfer_ids"] = [str(tid) for tid in ids if tid != s_id]
-
-        # 组装 CSV 行
-        for st in all_stations:
-            transfer_str = "/".join(st["transfer_ids"])  # type: ignore[index]
-            csv_rows.append({
-                "站点ID": str(st["id"]),
-                "线路名": str(st["line"]),
-                "站名": str(st["name"]),
-                "可换乘站点ID": transfer_str,
-            })
-        return csv_rows
-
-    def save_to_csv(self, rows: List[Dict[str, str]], output_path: str) -> None:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        for station_id, (line_name, st_name) in enumerate(table, 1):
+            ids = ids_by_name[st_name]
+            yield {
+                "站点ID": str(station_id),
+                "线路名": str(line_name),
+                "站名": str(st_name),
+                "可换乘站点ID": "/".join(str(tid) for tid in ids if tid != station_id) if len(ids) > 1 else "",
+            }
+
+    def save_to_csv(self, rows: Iterable[Dict[str, str]], output_path: str) -> None:
+        """写出 CSV：先写同目录下的临时文件，全部行写完后再替换目标文件
+
+        行迭代器中途出错时删除临时文件并重新抛出，原有数据文件保持不变。
+        """
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
         headers = ["站点ID", "线路名", "站名", "可换乘站点ID"]
-        with open(output_path, "w", encoding="utf-8", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(rows)
+        tmp_path = output_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=headers)
+                writer.writeheader()
+                writer.writerows(rows)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
 
     def fetch_and_save(self, output_path: str) -> None:
-        data = self.fetch_raw()
-        rows = self.process(data)
-        self.save_to_csv(rows, output_path)
+        """抓取并写出 CSV，写出成功后才更新响应缓存"""
+        response = self.fetch()
+        if response is None:
+            self.save_to_csv(self.iter_rows(self._cached_data()), output_path)
+            return
+        data, headers, body = response
+        self.save_to_csv(self.iter_rows(data), output_path)
+        self.save_response(headers, body)
 
 
-__all__ = ["DataFetcher", "FetchError"]
+__all__ = ["DataFetcher", "FetchError", "CITY_CODES"]
@@ -3,11 +3,43 @@
 该模块负责从CSV文件读取地铁线路数据，并构建地铁网络图。
 """
 
+import contextlib
 import csv
-from typing import Dict, List
+import gc
+import hashlib
+import os
+import pickle
+from array import array
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 from models.station import Station
 from models.network import MetroNetwork
 
+# 快照格式版本，数据结构或编译规则变化时递增，旧快照会被自动重建
+# 2: 记录格式错误的行，快照启动时同样能报告被跳过的行
+SNAPSHOT_VERSION = 2
+
+# CSV 必要字段（依次为站点ID、线路名、站名、可换乘站点ID）
+REQUIRED_FIELDS = ('站点ID', '线路名', '站名', '可换乘站点ID')
+# 错误信息中最多列出的格式错误行数
+MAX_REPORTED_ROWS = 20
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """批量创建站点期间暂停循环垃圾回收
+
+    站点之间的前后引用构成环，分代回收会在构建过程中反复扫描整张不断增长的图；
+    构建期间不会产生需要回收的垃圾，暂停后百万级站点的加载时间约减半。
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
 
 class DataLoadError(Exception):
     """数据加载异常"""
@@ -27,72 +59,255 @@ class DataLoader:
         """初始化数据加载器"""
         self.network = MetroNetwork()
         self.transfer_data: Dict[int, List[int]] = {}
+        # 按CSV行顺序记录的 (站点ID, 线路名, 站名)，用于写快照
+        self._rows: List[Tuple[int, str, str]] = []
+        # 格式错误的行：(行号, 原因)，行号从文件头下一行（2）开始计
+        self.malformed_rows: List[Tuple[int, str]] = []
     
-    def load_from_csv(self, file_path: str) -> MetroNetwork:
+    def load_from_csv(self, file_path: str, strict: bool = False) -> MetroNetwork:
         """从CSV文件加载数据
         
+        用 csv.reader 按元组批量读取四个必要字段，一次遍历创建全部站点，
+        格式错误的行先记录在 malformed_rows 中，读完后统一报告。
+
         Args:
             file_path: CSV文件路径
+            strict: 为 False（默认）时跳过格式错误的行继续构建，由调用方查看 malformed_rows；
+                为 True 时存在格式错误的行即抛出异常（信息中列出这些行）
             
         Returns:
             构建完成的地铁网络对象
             
         Raises:
-            DataLoadError: 文件不存在或格式错误时抛出
+            DataLoadError: 文件不存在、缺少必要字段，或 strict 下存在格式错误的行时抛出
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
+            with _gc_paused(), open(file_path, 'r', encoding='utf-8', newline='') as file:
+                reader = csv.reader(file)
+                header = [field.strip().lstrip('\ufeff') for field in next(reader, [])]
                 
                 # 验证CSV文件头
-                required_fields = {'站点ID', '线路名', '站名', '可换乘站点ID'}
-                if not required_fields.issubset(set(reader.fieldnames or [])):
-                    raise DataLoadError(f"CSV文件缺少必要字段，需要: {required_fields}")
-                
-                # 第一遍：创建所有站点
-                for row in reader:
-                    self._process_station_row(row)
+                if not set(REQUIRED_FIELDS).issubset(header):
+                    raise DataLoadError(f"CSV文件缺少必要字段，需要: {set(REQUIRED_FIELDS)}")
                 
-                # 第二遍：建立换乘关系
-                self.network.build_transfer_links(self.transfer_data)
-                
-                return self.network
+                pick = itemgetter(*(header.index(field) for field in REQUIRED_FIELDS))
+                self._add_records(reader, pick)
                 
         except FileNotFoundError:
             raise DataLoadError(f"文件未找到: {file_path}")
+        except DataLoadError:
+            raise
         except Exception as e:
             raise DataLoadError(f"加载数据时出错: {str(e)}")
+        with _gc_paused():
+            return self._build(strict)
     
-    def _process_station_row(self, row: Dict[str, str]) -> None:
-        """处理CSV文件中的一行数据
-        
+    def load_from_rows(self, rows: Iterable[Dict[str, str]], strict: bool = False) -> MetroNetwork:
+        """由CSV行字典构建网络（字段同CSV文件头）
+
         Args:
-            row: CSV行数据字典
-            
+            rows: CSV行，例如 csv.DictReader 或 DataFetcher.iter_rows() 的产出
+            strict: 同 load_from_csv
+
+        Returns:
+            构建并编译完成的地铁网络对象
+
         Raises:
-            DataLoadError: 数据格式错误时抛出
+            DataLoadError: strict 下存在格式错误的行时抛出
         """
-        try:
-            # 解析基本信息
-            station_id = int(row['站点ID'].strip())
-            line_name = row['线路名'].strip()
-            station_name = row['站名'].strip()
-            transfer_ids_str = row['可换乘站点ID'].strip()
-            
-            # 创建站点
-            station = Station(station_id, line_name, station_name)
-            self.network.add_station(station)
-            
-            # 解析换乘信息
+        with _gc_paused():
+            self._add_records(rows, itemgetter(*REQUIRED_FIELDS))
+            return self._build(strict)
+
+    def _add_records(self, records: Iterable[Sequence[str]],
+                     pick: Callable[[Sequence[str]], Tuple[str, str, str, str]]) -> None:
+        """第一遍：解析全部记录并批量创建站点，格式错误的行记入 malformed_rows
+
+        Args:
+            records: CSV记录（csv.reader 的列表或行字典）
+            pick: 从记录中取出 (站点ID, 线路名, 站名, 可换乘站点ID) 的函数
+        """
+        seen = set(self.network.stations_by_id)
+        stations: List[Station] = []
+        rows = self._rows
+        transfer_data = self.transfer_data
+        malformed = self.malformed_rows
+        for line_no, record in enumerate(records, 2):
+            if not record:  # 空行
+                continue
+            try:
+                raw_id, line_name, station_name, transfer_ids_str = pick(record)
+                station_id = int(raw_id)
+                line_name = line_name.strip()
+                station_name = station_name.strip()
+            except IndexError:
+                malformed.append((line_no, f"字段数不足: {record!r}"))
+                continue
+            except KeyError as e:
+                malformed.append((line_no, f"缺少必要字段: {e}"))
+                continue
+            except (TypeError, ValueError, AttributeError):
+                malformed.append((line_no, f"字段格式错误: {record!r}"))
+                continue
+            if not line_name or not station_name:
+                malformed.append((line_no, "线路名或站名为空"))
+                continue
+            if station_id in seen:
+                malformed.append((line_no, f"站点ID重复: {station_id}"))
+                continue
+            seen.add(station_id)
+            stations.append(Station(station_id, line_name, station_name))
+            rows.append((station_id, line_name, station_name))
+
+            # 解析换乘信息：整段按 "/" 切分后一次转换，失败时退回逐个容错解析
+            transfer_ids_str = (transfer_ids_str or '').strip()
             if transfer_ids_str:
-                transfer_ids = self._parse_transfer_ids(transfer_ids_str)
-                self.transfer_data[station_id] = transfer_ids
-                
-        except ValueError as e:
-            raise DataLoadError(f"数据格式错误: {str(e)}")
-        except KeyError as e:
-            raise DataLoadError(f"缺少必要字段: {str(e)}")
-    
+                try:
+                    transfer_data[station_id] = list(map(int, transfer_ids_str.split('/')))
+                except ValueError:
+                    transfer_data[station_id] = self._parse_transfer_ids(transfer_ids_str)
+
+        self.network.add_stations(stations)
+
+    def _build(self, strict: bool) -> MetroNetwork:
+        """第二遍：建立换乘关系并编译；strict 下先报告格式错误的行"""
+        if strict and self.malformed_rows:
+            raise DataLoadError(self.describe_malformed())
+
+        self.network.build_transfer_links(self.transfer_data)
+
+        # 编译为整数索引图，供高频路径查询使用
+        self.network.compile()
+
+        return self.network
+
+    def describe_malformed(self, limit: int = MAX_REPORTED_ROWS) -> str:
+        """格式错误行的汇总说明（最多列出 limit 行）"""
+        rows = self.malformed_rows
+        details = '；'.join(f"第 {line_no} 行: {reason}" for line_no, reason in rows[:limit])
+        more = f"；另有 {len(rows) - limit} 行未列出" if len(rows) > limit else ''
+        return f"数据格式错误（共 {len(rows)} 行）：{details}{more}"
+
+    def load(self, file_path: str, use_snapshot: bool = True) -> MetroNetwork:
+        """加载地铁网络，优先使用二进制快照
+
+        快照保存在CSV旁（``<文件名>.snapshot``），记录CSV的大小、修改时间和 SHA-256。
+        大小与修改时间一致时直接读取快照；不一致时再比较内容哈希，
+        CSV内容确有变化（或快照版本过旧、损坏）时重新解析CSV并重写快照。
+
+        Args:
+            file_path: CSV文件路径
+            use_snapshot: 是否读写快照
+
+        Returns:
+            构建完成的地铁网络对象
+
+        Raises:
+            DataLoadError: 文件不存在或格式错误时抛出
+        """
+        if not use_snapshot:
+            return self.load_from_csv(file_path)
+        try:
+            source = self._source_info(file_path)
+        except OSError:
+            raise DataLoadError(f"文件未找到: {file_path}")
+
+        snapshot_path = self.snapshot_path(file_path)
+        snapshot = self._read_snapshot(snapshot_path)
+        if snapshot is not None:
+            cached = snapshot['source']
+            same_stat = (cached['size'], cached['mtime_ns']) == (source['size'], source['mtime_ns'])
+            if same_stat or cached['sha256'] == self._file_sha256(file_path):
+                network = self._restore_snapshot(snapshot)
+                if not same_stat:
+                    # 内容未变（如仅被touch），更新快照中记录的文件状态
+                    self._write_snapshot(snapshot_path, file_path)
+                return network
+
+        network = self.load_from_csv(file_path)
+        self._write_snapshot(snapshot_path, file_path)
+        return network
+
+    def save_snapshot(self, file_path: str) -> None:
+        """为已写出的CSV文件保存当前网络的快照（网络须由本加载器构建）"""
+        self._write_snapshot(self.snapshot_path(file_path), file_path)
+
+    @staticmethod
+    def snapshot_path(file_path: str) -> str:
+        """CSV对应的快照文件路径"""
+        return os.path.splitext(file_path)[0] + '.snapshot'
+
+    @staticmethod
+    def _source_info(file_path: str) -> Dict[str, int]:
+        stat = os.stat(file_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    @staticmethod
+    def _file_sha256(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _read_snapshot(snapshot_path: str) -> Optional[Dict]:
+        """读取快照；不存在、损坏或版本不符时返回 None"""
+        try:
+            with open(snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+            return None
+        return snapshot
+
+    def _write_snapshot(self, snapshot_path: str, file_path: str) -> None:
+        """将当前网络写为快照（先写临时文件再原子替换），写入失败不影响加载"""
+        line_names: Dict[str, int] = {}
+        station_names: Dict[str, int] = {}
+        rows = self._rows
+        compiled = self.network.compile()
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'source': dict(self._source_info(file_path), sha256=self._file_sha256(file_path)),
+            'ids': array('i', (row[0] for row in rows)),
+            'line_index': array('i', (line_names.setdefault(row[1], len(line_names)) for row in rows)),
+            'name_index': array('i', (station_names.setdefault(row[2], len(station_names)) for row in rows)),
+            'line_names': list(line_names),
+            'station_names': list(station_names),
+            'transfers': self.transfer_data,
+            'malformed_rows': list(self.malformed_rows),
+            'compiled': compiled.export_state(),
+        }
+        tmp_path = snapshot_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, snapshot_path)
+        except OSError:
+            pass
+
+    def _restore_snapshot(self, snapshot: Dict) -> MetroNetwork:
+        """由快照重建网络，编译结果与格式错误行列表直接恢复"""
+        line_names = snapshot['line_names']
+        station_names = snapshot['station_names']
+        network = self.network
+        stations = []
+        with _gc_paused():
+            for station_id, line_idx, name_idx in zip(snapshot['ids'], snapshot['line_index'],
+                                                      snapshot['name_index']):
+                line_name = line_names[line_idx]
+                station_name = station_names[name_idx]
+                stations.append(Station(station_id, line_name, station_name))
+                self._rows.append((station_id, line_name, station_name))
+            network.add_stations(stations)
+            self.transfer_data = snapshot['transfers']
+            network.build_transfer_links(self.transfer_data)
+        network.restore_compiled(snapshot['compiled'])
+        self.malformed_rows = list(snapshot['malformed_rows'])
+        return network
+
     def _parse_transfer_ids(self, transfer_ids_str: str) -> List[int]:
         """解析换乘站点ID字符串
         
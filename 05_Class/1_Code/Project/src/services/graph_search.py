@@ -0,0 +1,668 @@
+"""整数图搜索算法
+
+在 CompiledGraph 的 CSR 结构上运行的最短路径搜索，
+节点均为整数下标，权重为整数，循环内不涉及对象哈希和字符串操作。
+"""
+
+import heapq
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from models.compiled_graph import CompiledGraph, SAME_FAMILY_WEIGHT, TRANSFER_WEIGHT
+
+if TYPE_CHECKING:  # pragma: no cover - 仅用于类型标注
+    from models.hub_graph import HubGraph
+
+
+def dijkstra(graph: CompiledGraph, source: int, target: int,
+             weights: Sequence[int], stats: Optional[Dict[str, int]] = None) -> Optional[List[int]]:
+    """点对点 Dijkstra 搜索
+
+    出边遍历顺序和堆中的计数器与对象版本一致，因此等价路径的选择结果相同。
+
+    Args:
+        graph: 编译后的整数图
+        source: 起点下标
+        target: 终点下标
+        weights: 与 graph.targets 等长的权重数组
+        stats: 可选的统计字典，写入 settled（出堆定点数）和 pushes（入堆次数）
+
+    Returns:
+        前驱数组（未到达的节点为 -1，起点为自身）；不可达时返回 None
+    """
+    offsets = graph.offsets
+    targets = graph.targets
+    n = graph.node_count
+    inf = float('inf')
+    dist = [inf] * n
+    pred = [-1] * n
+    visited = bytearray(n)
+    dist[source] = 0
+    pred[source] = source
+    heap = [(0, 0, source)]
+    counter = 0
+    settled = 0
+    found = False
+
+    while heap:
+        cost, _, u = heapq.heappop(heap)
+        if visited[u]:
+            continue
+        visited[u] = 1
+        settled += 1
+        if u == target:
+            found = True
+            break
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            if visited[v]:
+                continue
+            new_cost = cost + weights[e]
+            if new_cost < dist[v]:
+                dist[v] = new_cost
+                pred[v] = u
+                counter += 1
+                heapq.heappush(heap, (new_cost, counter, v))
+
+    if stats is not None:
+        stats['settled'] = settled
+        stats['pushes'] = counter + 1
+    return pred if found else None
+
+
+def hub_dijkstra(hubs: 'HubGraph', source: int, target: int, strategy: str,
+                 stats: Optional[Dict[str, int]] = None) -> Optional[List[int]]:
+    """站点组收缩图上的点对点 Dijkstra
+
+    普通出边照常松弛（跳过指向枢纽节点的边）；站台所在组已收缩时按组松弛：
+    组内第一个出堆的站台按原换乘边顺序松弛全组，之后出堆的站台只遍历本线路族成员。
+    后者到其他线路族的代价不低于第一个站台已给出的代价，原图中同样不会更新，
+    因此入堆顺序、计数器和前驱与 dijkstra() 在原图上完全一致，而每组的松弛次数随成员数线性增长。
+
+    Args:
+        hubs: 站点组收缩图
+        source: 起点下标
+        target: 终点下标
+        strategy: 权重策略
+        stats: 可选的统计字典，写入 settled 和 pushes
+
+    Returns:
+        站台节点上的前驱数组；不可达时返回 None
+    """
+    offsets = hubs.offsets
+    targets = hubs.targets
+    weights = hubs.get_weights(strategy)
+    limit = hubs.platform_count
+    group_of = hubs.group_of
+    group_offsets = hubs.group_offsets
+    group_members = hubs.group_members
+    family_of = hubs.family_of
+    family_offsets = hubs.family_offsets
+    family_members = hubs.family_members
+    cross = TRANSFER_WEIGHT + (hubs.transfer_unit if strategy == "min_transfer" else 0)
+    inf = float('inf')
+    dist = [inf] * limit
+    pred = [-1] * limit
+    visited = bytearray(limit)
+    opened = bytearray(len(group_offsets) - 1)
+    dist[source] = 0
+    pred[source] = source
+    heap = [(0, 0, source)]
+    counter = 0
+    settled = 0
+    found = False
+
+    while heap:
+        cost, _, u = heapq.heappop(heap)
+        if visited[u]:
+            continue
+        visited[u] = 1
+        settled += 1
+        if u == target:
+            found = True
+            break
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            if v >= limit or visited[v]:
+                continue
+            new_cost = cost + weights[e]
+            if new_cost < dist[v]:
+                dist[v] = new_cost
+                pred[v] = u
+                counter += 1
+                heapq.heappush(heap, (new_cost, counter, v))
+        g = group_of[u]
+        if g < 0:
+            continue
+        family = family_of[u]
+        if opened[g]:
+            members = family_members[family_offsets[family]:family_offsets[family + 1]]
+        else:
+            opened[g] = 1
+            members = group_members[group_offsets[g]:group_offsets[g + 1]]
+        for v in members:
+            if v == u or visited[v]:
+                continue
+            new_cost = cost + (SAME_FAMILY_WEIGHT if family_of[v] == family else cross)
+            if new_cost < dist[v]:
+                dist[v] = new_cost
+                pred[v] = u
+                counter += 1
+                heapq.heappush(heap, (new_cost, counter, v))
+
+    if stats is not None:
+        stats['settled'] = settled
+        stats['pushes'] = counter + 1
+    return pred if found else None
+
+
+def single_source(graph: CompiledGraph, source: int, weights: Sequence[int]) -> List[int]:
+    """单源 Dijkstra，搜索整个连通分量并返回最短路径树
+
+    堆的计数器与 dijkstra() 相同，因此树中任意 source->t 的路径
+    与点对点搜索提前终止时得到的路径完全一致。
+
+    Args:
+        graph: 编译后的整数图（或具有相同接口的 GraphTopology）
+        source: 起点下标
+        weights: 与 graph.targets 等长的权重数组
+
+    Returns:
+        前驱数组（未到达的节点为 -1，起点为自身）
+    """
+    offsets = graph.offsets
+    targets = graph.targets
+    n = graph.node_count
+    inf = float('inf')
+    dist = [inf] * n
+    pred = [-1] * n
+    visited = bytearray(n)
+    dist[source] = 0
+    pred[source] = source
+    heap = [(0, 0, source)]
+    counter = 0
+
+    while heap:
+        cost, _, u = heapq.heappop(heap)
+        if visited[u]:
+            continue
+        visited[u] = 1
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            if visited[v]:
+                continue
+            new_cost = cost + weights[e]
+            if new_cost < dist[v]:
+                dist[v] = new_cost
+                pred[v] = u
+                counter += 1
+                heapq.heappush(heap, (new_cost, counter, v))
+    return pred
+
+
+def reconstruct(pred: Sequence[int], source: int, target: int) -> List[int]:
+    """根据前驱数组回溯起点到终点的节点序列"""
+    nodes = [target]
+    node = target
+    while node != source:
+        node = pred[node]
+        nodes.append(node)
+    nodes.reverse()
+    return nodes
+
+
+def distances(graph, source: int, weights: Sequence[int]) -> List[float]:
+    """单源最短距离（不可达为 inf），可用于正向图或 reverse() 得到的反向图"""
+    offsets = graph.offsets
+    targets = graph.targets
+    inf = float('inf')
+    dist = [inf] * graph.node_count
+    dist[source] = 0
+    heap = [(0, source)]
+    while heap:
+        cost, u = heapq.heappop(heap)
+        if cost > dist[u]:
+            continue
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            new_cost = cost + weights[e]
+            if new_cost < dist[v]:
+                dist[v] = new_cost
+                heapq.heappush(heap, (new_cost, v))
+    return dist
+
+
+def hop_distances(graph, source: int) -> List[float]:
+    """单源跳数（BFS，不可达为 inf）"""
+    offsets = graph.offsets
+    targets = graph.targets
+    inf = float('inf')
+    hops = [inf] * graph.node_count
+    hops[source] = 0
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for u in frontier:
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                if hops[v] == inf:
+                    hops[v] = hops[u] + 1
+                    next_frontier.append(v)
+        frontier = next_frontier
+    return hops
+
+
+def bidirectional_dijkstra(graph: CompiledGraph, source: int, target: int, strategy: str,
+                           stats: Optional[Dict[str, int]] = None) -> Optional[List[int]]:
+    """双向 Dijkstra：从起点正向、从终点沿反向图同时扩展
+
+    当两侧堆顶距离之和不小于当前最优相遇代价时停止。
+
+    Returns:
+        起点到终点的节点序列；不可达时返回 None
+    """
+    reverse, _ = graph.reverse()
+    sides = (
+        (graph.offsets, graph.targets, graph.get_weights(strategy)),
+        (reverse.offsets, reverse.targets, graph.get_reverse_weights(strategy)),
+    )
+    n = graph.node_count
+    inf = float('inf')
+    dist = ([inf] * n, [inf] * n)
+    parent = ([-1] * n, [-1] * n)
+    settled_flags = (bytearray(n), bytearray(n))
+    heaps = ([(0, 0, source)], [(0, 0, target)])
+    dist[0][source] = 0
+    dist[1][target] = 0
+    parent[0][source] = source
+    parent[1][target] = target
+    counter = 0
+    settled = 0
+    best = inf
+    meet = -1
+
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        # 扩展堆顶更小的一侧
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        cost, _, u = heapq.heappop(heaps[side])
+        if settled_flags[side][u]:
+            continue
+        settled_flags[side][u] = 1
+        settled += 1
+        offsets, targets, weights = sides[side]
+        own_dist = dist[side]
+        other_dist = dist[1 - side]
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            new_cost = cost + weights[e]
+            if new_cost < own_dist[v]:
+                own_dist[v] = new_cost
+                parent[side][v] = u
+                counter += 1
+                heapq.heappush(heaps[side], (new_cost, counter, v))
+            total = own_dist[v] + other_dist[v]
+            if total < best:
+                best = total
+                meet = v
+        if own_dist[u] + other_dist[u] < best:
+            best = own_dist[u] + other_dist[u]
+            meet = u
+
+    if stats is not None:
+        stats['settled'] = settled
+        stats['pushes'] = counter + 2
+    if meet < 0:
+        return None if source != target else [source]
+
+    forward = reconstruct(parent[0], source, meet)
+    node = meet
+    while node != target:
+        node = parent[1][node]
+        forward.append(node)
+    return forward
+
+
+class LandmarkIndex:
+    """ALT 地标下界索引
+
+    地标按跳数做最远点选取；每个地标预计算到各节点的正向和反向加权距离，
+    由三角不等式得到到终点距离的可采纳（且一致）下界。
+
+    Attributes:
+        landmarks: 地标节点下标
+        dist_from: dist_from[k][v] = d(地标k, v)
+        dist_to: dist_to[k][v] = d(v, 地标k)
+    """
+
+    def __init__(self, graph: CompiledGraph, strategy: str, count: int = 8):
+        reverse, _ = graph.reverse()
+        weights = graph.get_weights(strategy)
+        rev_weights = graph.get_reverse_weights(strategy)
+        self.landmarks: List[int] = self._select(graph, count)
+        self.dist_from = [distances(graph, lm, weights) for lm in self.landmarks]
+        self.dist_to = [distances(reverse, lm, rev_weights) for lm in self.landmarks]
+
+    @staticmethod
+    def _select(graph: CompiledGraph, count: int) -> List[int]:
+        """最远点选取：每次取距已选地标跳数最远的节点"""
+        n = graph.node_count
+        if n == 0:
+            return []
+        inf = float('inf')
+        landmarks: List[int] = []
+        nearest = [inf] * n
+        candidate = 0
+        while len(landmarks) < min(count, n):
+            landmarks.append(candidate)
+            hops = hop_distances(graph, candidate)
+            for v in range(n):
+                if hops[v] < nearest[v]:
+                    nearest[v] = hops[v]
+            # 不可达节点（其他连通分量）优先作为新地标
+            best = max(range(n), key=lambda v: (nearest[v], -v))
+            if nearest[best] == 0:
+                break
+            candidate = best
+        return landmarks
+
+    def restrict(self, old_of_new: Sequence[int]) -> Optional['LandmarkIndex']:
+        """把地标距离搬到只删除了站点/边的新图上
+
+        保留边的权重不变、只删不增时新图距离不小于旧图距离，旧距离给出的三角不等式下界
+        对新图仍可采纳且一致，只需按新下标重排；被删除的地标随之丢弃。
+
+        Args:
+            old_of_new: 新图下标 -> 旧图下标
+
+        Returns:
+            新图上的地标索引；地标全部被删除时返回 None
+        """
+        new_of_old = {old: new for new, old in enumerate(old_of_new)}
+        restricted = LandmarkIndex.__new__(LandmarkIndex)
+        restricted.landmarks, restricted.dist_from, restricted.dist_to = [], [], []
+        for landmark, from_lm, to_lm in zip(self.landmarks, self.dist_from, self.dist_to):
+            if landmark not in new_of_old:
+                continue
+            restricted.landmarks.append(new_of_old[landmark])
+            restricted.dist_from.append([from_lm[old] for old in old_of_new])
+            restricted.dist_to.append([to_lm[old] for old in old_of_new])
+        return restricted if restricted.landmarks else None
+
+    def bound(self, v: int, target: int) -> float:
+        """单个节点到 target 的距离下界"""
+        inf = float('inf')
+        best = 0
+        for from_lm, to_lm in zip(self.dist_from, self.dist_to):
+            lt, lv = from_lm[target], from_lm[v]
+            if lt != inf and lv != inf and lt - lv > best:
+                best = lt - lv
+            vl, tl = to_lm[v], to_lm[target]
+            if vl != inf and tl != inf and vl - tl > best:
+                best = vl - tl
+        return best
+
+
+def get_landmarks(graph: CompiledGraph, strategy: str, count: int = 8) -> LandmarkIndex:
+    """获取（必要时构建）图上指定策略的地标索引，结果缓存在 graph.derived 中"""
+    key = f'landmarks:{strategy}:{count}'
+    index = graph.derived.get(key)
+    if index is None:
+        index = LandmarkIndex(graph, strategy, count)
+        graph.derived[key] = index
+    return index
+
+
+def astar(graph: CompiledGraph, source: int, target: int, strategy: str,
+          landmarks: LandmarkIndex, stats: Optional[Dict[str, int]] = None) -> Optional[List[int]]:
+    """A* 搜索（ALT 下界），下界按需逐节点计算
+
+    Returns:
+        起点到终点的节点序列；不可达时返回 None
+    """
+    offsets = graph.offsets
+    targets = graph.targets
+    weights = graph.get_weights(strategy)
+    bound = landmarks.bound
+    n = graph.node_count
+    inf = float('inf')
+    dist = [inf] * n
+    pred = [-1] * n
+    visited = bytearray(n)
+    dist[source] = 0
+    pred[source] = source
+    heap = [(bound(source, target), 0, source)]
+    counter = 0
+    settled = 0
+    found = False
+
+    while heap:
+        _, _, u = heapq.heappop(heap)
+        if visited[u]:
+            continue
+        visited[u] = 1
+        settled += 1
+        if u == target:
+            found = True
+            break
+        cost = dist[u]
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            if visited[v]:
+                continue
+            new_cost = cost + weights[e]
+            if new_cost < dist[v]:
+                dist[v] = new_cost
+                pred[v] = u
+                counter += 1
+                heapq.heappush(heap, (new_cost + bound(v, target), counter, v))
+
+    if stats is not None:
+        stats['settled'] = settled
+        stats['pushes'] = counter + 1
+    return reconstruct(pred, source, target) if found else None
+
+
+def pareto_search(graph: CompiledGraph, source: int, target: int,
+                  stats: Optional[Dict[str, int]] = None) -> List[Tuple[int, int, List[int]]]:
+    """多目标标号设定搜索：一次求出 (换乘次数, 站点代价) 的全部 Pareto 最优路径
+
+    标号按字典序出堆，因此某节点先定下的标号在两个分量上都不劣于后续标号的换乘次数；
+    新标号只有站点代价严格小于该节点已定标号的最小站点代价时才不被支配，
+    每个节点只需保存这一个最小值。到达终点的标号同样用于剪枝。
+
+    Args:
+        graph: 编译后的整数图
+        source: 起点下标
+        target: 终点下标
+        stats: 可选的统计字典，写入 settled（定下的标号数）和 pushes
+
+    Returns:
+        [(换乘次数, 站点代价, 节点序列), ...]，按换乘次数升序；不可达时为空列表
+    """
+    offsets = graph.offsets
+    targets = graph.targets
+    weights = graph.get_weights("min_station")
+    transfer_edges = graph.transfer_edges
+    inf = float('inf')
+    best_cost = [inf] * graph.node_count
+    # 标号表：label_id -> (节点, 父标号)
+    label_node: List[int] = [source]
+    label_parent: List[int] = [-1]
+    heap: List[Tuple[int, int, int]] = [(0, 0, 0)]
+    settled = 0
+    results: List[Tuple[int, int, List[int]]] = []
+
+    while heap:
+        transfers, cost, label = heapq.heappop(heap)
+        u = label_node[label]
+        if cost >= best_cost[u] or cost >= best_cost[target]:
+            continue
+        best_cost[u] = cost
+        settled += 1
+        if u == target:
+            nodes = []
+            while label >= 0:
+                nodes.append(label_node[label])
+                label = label_parent[label]
+            nodes.reverse()
+            results.append((transfers, cost, nodes))
+            continue
+        for e in range(offsets[u], offsets[u + 1]):
+            v = targets[e]
+            new_cost = cost + weights[e]
+            if new_cost >= best_cost[v] or new_cost >= best_cost[target]:
+                continue
+            label_node.append(v)
+            label_parent.append(label)
+            heapq.heappush(heap, (transfers + transfer_edges[e], new_cost, len(label_node) - 1))
+
+    if stats is not None:
+        stats['settled'] = settled
+        stats['pushes'] = len(label_node)
+    return results
+
+
+def k_shortest_paths(graph: CompiledGraph, source: int, target: int, strategy: str, k: int,
+                     stats: Optional[Dict[str, int]] = None) -> List[Tuple[int, List[int]]]:
+    """Yen 算法求前 k 条无环最短路径
+
+    备选路线按物理车站（站名编号）判重：同名站点之间的换乘边只会产生
+    “同一条路线在不同站台绕一下”的变体，这类候选以及重复经过同一车站的候选会被丢弃，
+    偏离搜索也不会再进入根路径已经过的车站。
+
+    只在反向图上做一次完整的单源搜索，得到所有节点到终点的距离（最短路径树）：
+    第一条路径直接沿该树回溯；之后每次偏离搜索都以这些距离作为 A* 下界——
+    屏蔽节点和边只会让距离变长，所以下界仍然可采纳，偏离搜索几乎沿直线扩展，
+    不必为每条备选路线重新跑一遍完整的 Dijkstra。
+
+    Args:
+        graph: 编译后的整数图
+        source: 起点下标
+        target: 终点下标
+        strategy: 权重策略
+        k: 需要的路径条数
+        stats: 可选的统计字典，写入 settled 和 pushes（累计所有偏离搜索）
+
+    Returns:
+        [(代价, 节点序列), ...]，按代价升序，最多 k 条
+    """
+    offsets = graph.offsets
+    targets = graph.targets
+    weights = graph.get_weights(strategy)
+    reverse, _ = graph.reverse()
+    to_target = distances(reverse, target, graph.get_reverse_weights(strategy))
+    name_index = graph.name_index
+    inf = float('inf')
+    counters = {'settled': 0, 'pushes': 0}
+
+    def physical_route(nodes: List[int]) -> Optional[Tuple[int, ...]]:
+        """折叠连续同名站点后的车站序列；重复经过同一车站时返回 None"""
+        route: List[int] = []
+        for node in nodes:
+            name = name_index[node]
+            if route and route[-1] == name:
+                continue
+            route.append(name)
+        return tuple(route) if len(set(route)) == len(route) else None
+
+    members: Dict[int, List[int]] = {}
+    for node, name in enumerate(name_index):
+        members.setdefault(name, []).append(node)
+
+    if k <= 0 or to_target[source] == inf:
+        if stats is not None:
+            stats.update(counters)
+        return []
+
+    def edge_weight(u: int, v: int) -> int:
+        return min(weights[e] for e in range(offsets[u], offsets[u + 1]) if targets[e] == v)
+
+    def tree_path(node: int) -> List[int]:
+        """沿到终点的最短路径树走到终点"""
+        nodes = [node]
+        while node != target:
+            node = min(
+                (targets[e] for e in range(offsets[node], offsets[node + 1])
+                 if to_target[targets[e]] + weights[e] == to_target[node]),
+            )
+            nodes.append(node)
+        return nodes
+
+    def spur_search(spur: int, blocked_nodes: set, blocked_edges: set) -> Optional[List[int]]:
+        """以 to_target 为下界的 A* 偏离搜索"""
+        dist = {spur: 0}
+        pred = {spur: spur}
+        done = set()
+        heap = [(to_target[spur], 0, spur)]
+        counter = 0
+        while heap:
+            _, _, u = heapq.heappop(heap)
+            if u in done:
+                continue
+            done.add(u)
+            counters['settled'] += 1
+            if u == target:
+                return reconstruct(pred, spur, target)
+            cost = dist[u]
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                if v in done or v in blocked_nodes or (u, v) in blocked_edges:
+                    continue
+                if to_target[v] == inf:
+                    continue
+                new_cost = cost + weights[e]
+                if new_cost < dist.get(v, inf):
+                    dist[v] = new_cost
+                    pred[v] = u
+                    counter += 1
+                    counters['pushes'] += 1
+                    heapq.heappush(heap, (new_cost + to_target[v], counter, v))
+        return None
+
+    accepted: List[Tuple[int, List[int]]] = [(to_target[source], tree_path(source))]
+    seen = {tuple(accepted[0][1])}
+    seen_routes = {physical_route(accepted[0][1])}
+    candidates: List[Tuple[int, int, List[int]]] = []
+    counter = 0
+
+    while len(accepted) < k:
+        _, last = accepted[-1]
+        root_cost = 0
+        for i in range(len(last) - 1):
+            spur = last[i]
+            root = last[:i + 1]
+            blocked_edges = {
+                (path[i], path[i + 1]) for _, path in accepted
+                if len(path) > i + 1 and path[:i + 1] == root
+            }
+            root_names = {name_index[node] for node in root[:-1]}
+            root_names.discard(name_index[spur])
+            blocked_nodes = set(root[:-1])
+            for name in root_names:
+                blocked_nodes.update(members[name])
+            spur_path = spur_search(spur, blocked_nodes, blocked_edges)
+            if spur_path is not None:
+                candidate = root[:-1] + spur_path
+                key = tuple(candidate)
+                if key not in seen:
+                    seen.add(key)
+                    spur_cost = sum(edge_weight(a, b) for a, b in zip(spur_path, spur_path[1:]))
+                    counter += 1
+                    heapq.heappush(candidates, (root_cost + spur_cost, counter, candidate))
+            root_cost += edge_weight(last[i], last[i + 1])
+        if not candidates:
+            break
+        while candidates:
+            cost, _, path = heapq.heappop(candidates)
+            route = physical_route(path)
+            if route is not None and route not in seen_routes:
+                seen_routes.add(route)
+                accepted.append((cost, path))
+                break
+        if accepted[-1][1] is last:
+            break
+
+    if stats is not None:
+        stats.update(counters)
+    return accepted
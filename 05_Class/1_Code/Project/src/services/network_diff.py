@@ -0,0 +1,226 @@
+"""网络结构差异
+
+比较在线抓取的新数据与当前运行中的网络，得到站点、线路、区间（同线相邻站）
+和换乘关系的增删集合。站点以 (线路名, 站名, 同线同名序号) 识别，与数据中的站点ID无关：
+新数据中仍存在的站点沿用旧ID，新增站点分配新ID，使缓存、日志中的站点ID在更新前后保持一致。
+
+新网络由对齐ID后的行整体重建（见 NetworkDiff.rebuild），差异决定旧网络上的哪些派生结构可以沿用：
+
+* 编译图拓扑不变（如只改了站名）：地标、站点组收缩图、收缩层次、预计算路径表全部沿用
+* 只删不增：地标距离按新下标重排后仍是可采纳的下界，继续使用
+* 未经过被删除元素的缓存路径迁移到新网络（见 affects_path）
+"""
+
+import copy
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from models.compiled_graph import CompiledGraph
+from models.network import MetroNetwork
+from services.data_loader import DataLoader
+
+# (线路名, 站名, 同线同名序号)；环线闭合副本的序号为 1
+StationKey = Tuple[str, str, int]
+Edge = FrozenSet[StationKey]
+CsvRow = Dict[str, str]
+
+
+def network_rows(network: MetroNetwork) -> List[CsvRow]:
+    """将网络还原为 CSV 行（顺序与加载时一致）"""
+    rows = []
+    for station in network.stations_by_id.values():
+        rows.append({
+            "站点ID": str(station.id),
+            "线路名": station.line_name,
+            "站名": station.station_name,
+            "可换乘站点ID": "/".join(str(s.id) for s in station.transfer_stations),
+        })
+    return rows
+
+
+# 沿用时在提示信息中列出的派生结构（derived 键前缀 -> 名称）
+_DERIVED_LABELS = (("landmarks:", "地标距离"), ("hub_graph", "站点组收缩图"), ("ch:", "收缩层次"))
+
+
+def same_topology(old: CompiledGraph, new: CompiledGraph) -> bool:
+    """两张编译图的站点下标、邻接数组、权重与站名分组是否完全相同（站点ID、站名可以不同）"""
+    return all(getattr(old, field) == getattr(new, field) for field in CompiledGraph.STATE_FIELDS)
+
+
+def _parse_ids(text: str) -> List[int]:
+    return [int(token) for token in text.split("/") if token.strip()]
+
+
+class _Structure:
+    """CSV 行的结构化视图：站点键、区间、换乘边"""
+
+    def __init__(self, rows: Iterable[CsvRow]):
+        self.rows: List[CsvRow] = list(rows)
+        self.keys: List[StationKey] = []
+        self.key_of: Dict[int, StationKey] = {}
+        self.links: Set[Edge] = set()
+        self.lines: Dict[str, List[StationKey]] = {}
+        occurrences: Dict[Tuple[str, str], int] = {}
+        for row in self.rows:
+            line_name, name = row["线路名"].strip(), row["站名"].strip()
+            seq = occurrences.get((line_name, name), 0)
+            occurrences[(line_name, name)] = seq + 1
+            key = (line_name, name, seq)
+            self.keys.append(key)
+            self.key_of[int(row["站点ID"])] = key
+            line = self.lines.setdefault(line_name, [])
+            if line:
+                self.links.add(frozenset((line[-1], key)))
+            line.append(key)
+        self.transfers: Set[Edge] = set()
+        for row, key in zip(self.rows, self.keys):
+            for other_id in _parse_ids(row["可换乘站点ID"]):
+                other = self.key_of.get(other_id)
+                if other is not None:
+                    self.transfers.add(frozenset((key, other)))
+
+
+class NetworkDiff:
+    """两版网络数据之间的结构差异
+
+    Attributes:
+        added_stations / removed_stations: 新增 / 删除的站点键
+        added_lines / removed_lines: 新增 / 删除的线路名
+        added_links / removed_links: 新增 / 删除的同线相邻区间
+        added_transfers / removed_transfers: 新增 / 删除的换乘关系
+        rows: 新数据的 CSV 行（站点ID已对齐到旧网络）
+        id_of: 新数据中每个站点键对应的站点ID
+    """
+
+    def __init__(self, old: _Structure, new: _Structure):
+        old_keys, new_keys = set(old.keys), set(new.keys)
+        self.added_stations: Set[StationKey] = new_keys - old_keys
+        self.removed_stations: Set[StationKey] = old_keys - new_keys
+        self.added_lines: Set[str] = set(new.lines) - set(old.lines)
+        self.removed_lines: Set[str] = set(old.lines) - set(new.lines)
+        self.added_links: Set[Edge] = new.links - old.links
+        self.removed_links: Set[Edge] = old.links - new.links
+        self.added_transfers: Set[Edge] = new.transfers - old.transfers
+        self.removed_transfers: Set[Edge] = old.transfers - new.transfers
+        self.id_of: Dict[StationKey, int] = {}
+        self.rows: List[CsvRow] = self._align_ids(old, new)
+        # 旧网络中的站点ID，用于判断缓存路径是否受影响
+        old_id = {key: station_id for station_id, key in old.key_of.items()}
+        self.removed_station_ids: Set[int] = {old_id[key] for key in self.removed_stations}
+        self.removed_edge_ids: Set[FrozenSet[int]] = {
+            frozenset(old_id[key] for key in edge)
+            for edge in self.removed_links | self.removed_transfers
+        }
+
+    def _align_ids(self, old: _Structure, new: _Structure) -> List[CsvRow]:
+        """新数据中保留的站点沿用旧ID，新增站点从旧ID最大值之后顺延编号"""
+        old_id = {key: station_id for station_id, key in old.key_of.items()}
+        next_id = max(old.key_of, default=0) + 1
+        for key in new.keys:
+            if key in old_id:
+                self.id_of[key] = old_id[key]
+            else:
+                self.id_of[key] = next_id
+                next_id += 1
+        rows = []
+        for row, key in zip(new.rows, new.keys):
+            transfer_ids = (self.id_of[new.key_of[i]] for i in _parse_ids(row["可换乘站点ID"])
+                            if i in new.key_of)
+            rows.append({
+                "站点ID": str(self.id_of[key]),
+                "线路名": key[0],
+                "站名": key[1],
+                "可换乘站点ID": "/".join(str(i) for i in transfer_ids),
+            })
+        return rows
+
+    def is_empty(self) -> bool:
+        """结构完全相同"""
+        return not (self.added_stations or self.removed_stations or self.added_links
+                    or self.removed_links or self.added_transfers or self.removed_transfers)
+
+    def is_removal_only(self) -> bool:
+        """只删除、不新增任何站点/区间/换乘
+
+        此时网络中任意两站间的最短路径代价只增不减，未经过被删除元素的缓存路径仍为最优。
+        """
+        return not (self.added_stations or self.added_links or self.added_transfers)
+
+    def summary(self) -> str:
+        """差异摘要"""
+        return (f"站点 +{len(self.added_stations)}/-{len(self.removed_stations)}，"
+                f"线路 +{len(self.added_lines)}/-{len(self.removed_lines)}，"
+                f"区间 +{len(self.added_links)}/-{len(self.removed_links)}，"
+                f"换乘 +{len(self.added_transfers)}/-{len(self.removed_transfers)}")
+
+    def rebuild(self, loader: Optional[DataLoader] = None) -> MetroNetwork:
+        """由对齐ID后的新数据整体重建网络（运行中的网络不受影响）
+
+        这是完整的重新加载：新网络重新编译，编译图上的派生结构在首次使用时重新计算。
+        调用方可借助差异迁移路径缓存（is_removal_only / affects_path）并复用站名索引。
+
+        Args:
+            loader: 用于构建副本的加载器，默认新建；调用方可随后用它写快照
+
+        Returns:
+            已编译的新网络
+        """
+        loader = loader or DataLoader()
+        return loader.load_from_rows(self.rows)
+
+    def carry_derived(self, old: CompiledGraph, new: CompiledGraph) -> List[str]:
+        """把不受差异影响的派生结构从旧编译图搬到新编译图
+
+        Args:
+            old: 运行中网络的编译图
+            new: rebuild() 得到的新网络的编译图
+
+        Returns:
+            沿用的派生结构名称
+        """
+        carried: Dict[str, object] = {}
+        if same_topology(old, new):
+            for key, value in old.derived.items():
+                # 指纹含站点ID；对象引擎邻接表引用旧网络的站点对象
+                if key in ('fingerprint', 'ch:building') or key.startswith('object_adjacency:'):
+                    continue
+                if key == 'hub_graph':
+                    value = copy.copy(value)
+                    value.base = new
+                carried[key] = value
+        elif self.is_removal_only():
+            old_of_new = [old.index_of[station.id] for station in new.stations]
+            for key, value in old.derived.items():
+                if not key.startswith('landmarks:'):
+                    continue
+                # min_transfer 的换乘代价随站点数变化，站点数不同时旧距离不可比
+                if key.split(':')[1] == 'min_transfer' and old.transfer_unit != new.transfer_unit:
+                    continue
+                restricted = value.restrict(old_of_new)
+                if restricted is not None:
+                    carried[key] = restricted
+        new.derived.update(carried)
+        return [label for prefix, label in _DERIVED_LABELS
+                if any(key.startswith(prefix) for key in carried)]
+
+    def affects_path(self, station_ids: List[int]) -> bool:
+        """按站点ID序列判断路径是否经过被删除的站点、区间或换乘"""
+        if any(station_id in self.removed_station_ids for station_id in station_ids):
+            return True
+        return any(frozenset(pair) in self.removed_edge_ids
+                   for pair in zip(station_ids, station_ids[1:]))
+
+
+def diff_network(network: MetroNetwork, rows: Iterable[CsvRow]) -> NetworkDiff:
+    """计算当前网络与新数据（DataFetcher 产出的 CSV 行）之间的差异
+
+    Args:
+        network: 运行中的网络（只读）
+        rows: 新数据的 CSV 行
+
+    Returns:
+        结构差异
+    """
+    return NetworkDiff(_Structure(network_rows(network)), _Structure(rows))
+
+
+__all__ = ["NetworkDiff", "diff_network", "network_rows", "same_topology"]
@@ -0,0 +1,144 @@
+"""多城市网络注册表
+
+按城市懒加载 MetroNetwork：首次查询某城市时才读取其数据（优先走二进制快照），
+已加载的网络放在按站点总数限额的 LRU 缓存中，超出限额时淘汰最久未使用的城市；
+热门城市可在后台线程中预加载。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List
+
+from models.network import MetroNetwork
+from services.data_loader import DataLoader, DataLoadError
+from services.data_fetcher import DataFetcher, FetchError
+from config import CITY_CACHE_MAX_STATIONS, get_city_data_file
+
+
+class NetworkRegistry:
+    """按城市懒加载、LRU 淘汰的网络缓存
+
+    Attributes:
+        max_stations: 缓存中所有网络站点数之和的上限（内存占用的近似度量）
+        auto_fetch: 城市数据文件不存在时是否在线抓取
+        loads: 实际加载次数
+        evictions: 淘汰次数
+    """
+
+    def __init__(self, max_stations: int = CITY_CACHE_MAX_STATIONS,
+                 data_file_for: Callable[[str], str] = get_city_data_file,
+                 auto_fetch: bool = False):
+        """初始化注册表
+
+        Args:
+            max_stations: 站点总数上限
+            data_file_for: 城市 -> 数据文件路径
+            auto_fetch: 数据文件缺失时是否调用 DataFetcher 在线抓取
+        """
+        self.max_stations = max_stations
+        self.data_file_for = data_file_for
+        self.auto_fetch = auto_fetch
+        self.loads = 0
+        self.evictions = 0
+        self._networks: "OrderedDict[str, MetroNetwork]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 正在加载的城市 -> 加载锁；加载结束即移除，不随城市数增长
+        self._city_locks: Dict[str, threading.Lock] = {}
+
+    def get(self, city: str) -> MetroNetwork:
+        """获取城市网络，未加载时同步加载
+
+        同一城市的并发请求只会触发一次加载。
+
+        Raises:
+            DataLoadError: 数据文件缺失或格式错误时抛出
+        """
+        with self._lock:
+            network = self._networks.get(city)
+            if network is not None:
+                self._networks.move_to_end(city)
+                return network
+            city_lock = self._city_locks.setdefault(city, threading.Lock())
+
+        with city_lock:
+            # 可能已被等待期间的另一个线程加载
+            with self._lock:
+                network = self._networks.get(city)
+                if network is not None:
+                    self._networks.move_to_end(city)
+                    return network
+            try:
+                network = self._load(city)
+                self.put(city, network)
+            finally:
+                with self._lock:
+                    if self._city_locks.get(city) is city_lock:
+                        del self._city_locks[city]
+            return network
+
+    def put(self, city: str, network: MetroNetwork) -> None:
+        """放入（或替换）城市网络，并按限额淘汰最久未使用的其他城市"""
+        with self._lock:
+            self._networks[city] = network
+            self._networks.move_to_end(city)
+            total = sum(n.get_station_count() for n in self._networks.values())
+            while total > self.max_stations and len(self._networks) > 1:
+                _, evicted = self._networks.popitem(last=False)
+                total -= evicted.get_station_count()
+                self.evictions += 1
+
+    def evict(self, city: str) -> bool:
+        """主动移除城市网络，返回是否存在"""
+        with self._lock:
+            return self._networks.pop(city, None) is not None
+
+    def loaded_cities(self) -> List[str]:
+        """已加载的城市（从最久未使用到最近使用）"""
+        with self._lock:
+            return list(self._networks.keys())
+
+    def prefetch(self, cities: Iterable[str]) -> threading.Thread:
+        """在后台线程中依次预加载城市，加载失败的城市跳过
+
+        Returns:
+            已启动的守护线程
+        """
+        cities = list(cities)
+
+        def worker():
+            for city in cities:
+                try:
+                    self.get(city)
+                except (DataLoadError, FetchError):
+                    continue
+
+        thread = threading.Thread(target=worker, name="city-prefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict[str, object]:
+        """缓存统计"""
+        with self._lock:
+            return {
+                'cities': list(self._networks.keys()),
+                'stations': sum(n.get_station_count() for n in self._networks.values()),
+                'max_stations': self.max_stations,
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
+
+    def _load(self, city: str) -> MetroNetwork:
+        data_file = self.data_file_for(city)
+        if not os.path.exists(data_file) and self.auto_fetch:
+            try:
+                DataFetcher(city).fetch_and_save(data_file)
+            except FetchError as e:
+                raise DataLoadError(f"城市 {city} 数据抓取失败: {e}") from e
+        network = DataLoader().load(data_file)
+        with self._lock:
+            self.loads += 1
+        return network
+
+
+__all__ = ["NetworkRegistry"]
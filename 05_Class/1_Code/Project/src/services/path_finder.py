@@ -1,11 +1,62 @@
 """路径查找器
 
 使用可配置权重的最短路径搜索（Dijkstra），支持“最少站点”和“最少换乘”策略，并在跨线路时插入“换乘”标记。
+提供以下引擎：
+- object: 直接在 Station 对象图上搜索
+- compiled: 在 MetroNetwork 编译出的整数 CSR 图上搜索，适合高频查询
+- bidirectional: 编译图上的双向 Dijkstra
+- astar: 编译图上的 A*，下界来自地标（ALT）预计算距离
+- hub: 站点组收缩图（同名站台经枢纽节点换乘）上的 Dijkstra
+- ch: 收缩层次（预处理后的上行双向搜索，捷径展开为原图路径）
 """
 
 import heapq
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union, TYPE_CHECKING
 from models.station import Station
+from models.network import MetroNetwork
+from models.compiled_graph import CompiledGraph, WEIGHT_SCALE, extract_main_line, is_same_family
+from models.hub_graph import get_hub_graph
+from services import graph_search
+from services.contraction import get_hierarchy
+
+if TYPE_CHECKING:  # pragma: no cover - 仅用于类型标注
+    from services.route_table import RouteTable
+
+ENGINES = ("object", "compiled", "bidirectional", "astar", "hub", "ch")
+
+# ALT 引擎使用的地标数量
+LANDMARK_COUNT = 8
+
+# 对象引擎的邻接表：站点ID -> [(邻站, (换乘次数增量, 站点代价)), ...]
+ObjectAdjacency = Dict[int, List[Tuple[Station, Tuple[int, float]]]]
+
+
+def get_object_adjacency(graph: CompiledGraph, strategy: str) -> ObjectAdjacency:
+    """获取（必要时构建）对象引擎使用的邻接表，结果缓存在 graph.derived 中
+
+    由编译图的逐边权重与换乘标记一次换算得到（线路族判定已在编译时对每条边做过一次），
+    搜索内循环因此不再做任何线路名字符串运算。邻站顺序与 _get_neighbors_with_weight 一致。
+    """
+    key = f'object_adjacency:{strategy}'
+    adjacency = graph.derived.get(key)
+    if adjacency is None:
+        count_transfers = strategy == "min_transfer"
+        # 共享权重元组：(0, 1.0) 相邻站 / 跨线换乘（min_station），(0, 0.1) 同线路族换乘，(1, 1.0) 计换乘
+        costs: Dict[Tuple[int, int], Tuple[int, float]] = {}
+        weights = graph.get_weights("min_station")
+        stations, targets, transfer_edges = graph.stations, graph.targets, graph.transfer_edges
+        adjacency = {}
+        for u, station in enumerate(stations):
+            neighbors = []
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                cost_key = (transfer_edges[e] if count_transfers else 0, weights[e])
+                cost = costs.get(cost_key)
+                if cost is None:
+                    cost = costs[cost_key] = (cost_key[0], cost_key[1] / WEIGHT_SCALE)
+                neighbors.append((stations[targets[e]], cost))
+            adjacency[station.id] = neighbors
+        graph.derived[key] = adjacency
+    return adjacency
 
 
 class PathNotFoundError(Exception):
@@ -17,11 +68,30 @@ class PathFinder:
     """路径查找器类
     
     使用 Dijkstra 算法查找两个站点之间的路径，支持不同权重策略。
+
+    Attributes:
+        network: 绑定的地铁网络（compiled 引擎需要）
+        engine: 搜索引擎名称
     """
     
-    def __init__(self):
-        """初始化路径查找器"""
-        pass
+    def __init__(self, network: Optional[MetroNetwork] = None, engine: str = "object"):
+        """初始化路径查找器
+
+        Args:
+            network: 绑定的地铁网络，compiled 引擎依赖其编译结果
+            engine: 搜索引擎，"object"（默认）、"compiled"、"bidirectional"、"astar"、"hub" 或 "ch"
+
+        Raises:
+            ValueError: 引擎名称非法时抛出
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"不支持的搜索引擎: {engine}")
+        self.network = network
+        self.engine = engine
+
+    def set_network(self, network: Optional[MetroNetwork]) -> None:
+        """绑定（或替换）地铁网络"""
+        self.network = network
     
     def find_path(self, start: Station, end: Station, strategy: str = "min_station") -> List[Union[Station, str]]:
         """查找从起点到终点的路径
@@ -34,6 +104,24 @@ class PathFinder:
         Returns:
             路径列表，包含 Station 对象和 "换乘" 标记
             
+        Raises:
+            ValueError: 起点/终点为 None 或策略非法时抛出
+            PathNotFoundError: 无可达路径时抛出
+        """
+        return self.find_path_with_stats(start, end, strategy)[0]
+
+    def find_path_with_stats(self, start: Station, end: Station, strategy: str = "min_station"
+                             ) -> Tuple[List[Union[Station, str]], Dict[str, int]]:
+        """查找路径并返回搜索统计
+
+        Args:
+            start: 起始站点
+            end: 目标站点
+            strategy: 路径策略
+
+        Returns:
+            (路径列表, 统计字典)，统计包含 settled（出堆定点的节点数）和 pushes（入堆次数）
+
         Raises:
             ValueError: 起点/终点为 None 或策略非法时抛出
             PathNotFoundError: 无可达路径时抛出
@@ -42,15 +130,31 @@ class PathFinder:
             raise ValueError("起点和终点不能为None")
         if strategy not in {"min_station", "min_transfer"}:
             raise ValueError(f"不支持的策略: {strategy}")
+        stats: Dict[str, int] = {'settled': 0, 'pushes': 0}
         if start == end:
-            return [start]
-        
+            return [start], stats
+
+        if self.engine != "object" and self.network is not None:
+            return self._find_path_compiled(start, end, strategy, stats), stats
+        return self._find_path_object(start, end, strategy, stats), stats
+
+    def _find_path_object(self, start: Station, end: Station, strategy: str,
+                          stats: Dict[str, int]) -> List[Union[Station, str]]:
+        """在 Station 对象图上搜索
+
+        代价为 (换乘次数, 站点代价) 元组：min_station 下换乘次数恒为 0，
+        min_transfer 下按字典序比较，先比换乘次数再比站点代价。
+        绑定了网络时邻居与权重取自预计算的邻接表，否则逐个站点现场计算。
+        """
+        adjacency = (get_object_adjacency(self.network.compile(), strategy)
+                     if self.network is not None else {})
         # Dijkstra
-        dist: Dict[Station, float] = {start: 0.0}
+        zero: Tuple[int, float] = (0, 0.0)
+        dist: Dict[Station, Tuple[int, float]] = {start: zero}
         came_from: Dict[Station, Optional[Station]] = {start: None}
-        heap: List[Tuple[float, int, Station]] = []
+        heap: List[Tuple[Tuple[int, float], int, Station]] = []
         counter = 0
-        heapq.heappush(heap, (0.0, counter, start))
+        heapq.heappush(heap, (zero, counter, start))
         visited: set[Station] = set()
         
         found = False
@@ -59,20 +163,25 @@ class PathFinder:
             if current in visited:
                 continue
             visited.add(current)
+            stats['settled'] += 1
             if current == end:
                 found = True
                 break
             
-            for neighbor, weight in self._get_neighbors_with_weight(current, strategy):
+            neighbors = adjacency.get(current.id)
+            if neighbors is None:
+                neighbors = self._get_neighbors_with_weight(current, strategy)
+            for neighbor, (transfers, weight) in neighbors:
                 if neighbor in visited:
                     continue
-                new_cost = cost + weight
-                if new_cost < dist.get(neighbor, float('inf')):
+                new_cost = (cost[0] + transfers, cost[1] + weight)
+                if neighbor not in dist or new_cost < dist[neighbor]:
                     dist[neighbor] = new_cost
                     came_from[neighbor] = current
                     counter += 1
                     heapq.heappush(heap, (new_cost, counter, neighbor))
         
+        stats['pushes'] = counter + 1
         if not found:
             raise PathNotFoundError(f"未找到从 {start} 到 {end} 的路径")
         
@@ -83,8 +192,142 @@ class PathFinder:
             station_path.append(node)
             node = came_from[node]
         station_path.reverse()
-        
-        # 插入换乘标记：相邻站点线路名变化时加入
+        return self.with_transfer_marks(station_path)
+
+    def _find_path_compiled(self, start: Station, end: Station, strategy: str,
+                            stats: Dict[str, int]) -> List[Union[Station, str]]:
+        """在编译后的整数图上按所选引擎搜索"""
+        graph = self.network.compile()
+        source = graph.index_of.get(start.id)
+        target = graph.index_of.get(end.id)
+        if source is None or target is None:
+            raise ValueError("起点或终点不属于当前网络")
+
+        nodes: Optional[List[int]] = None
+        # 收缩层次在后台构建期间为 None，ch 引擎临时使用 compiled 引擎的 Dijkstra
+        hierarchy = get_hierarchy(graph, strategy) if self.engine == "ch" else None
+        if self.engine == "bidirectional":
+            nodes = graph_search.bidirectional_dijkstra(graph, source, target, strategy, stats)
+        elif self.engine == "astar":
+            landmarks = graph_search.get_landmarks(graph, strategy, LANDMARK_COUNT)
+            nodes = graph_search.astar(graph, source, target, strategy, landmarks, stats)
+        elif self.engine == "hub":
+            pred = graph_search.hub_dijkstra(get_hub_graph(graph), source, target, strategy, stats)
+            if pred is not None:
+                nodes = graph_search.reconstruct(pred, source, target)
+        elif hierarchy is not None:
+            nodes = hierarchy.query(source, target, stats)
+        else:
+            pred = graph_search.dijkstra(graph, source, target, graph.get_weights(strategy), stats)
+            if pred is not None:
+                nodes = graph_search.reconstruct(pred, source, target)
+
+        if nodes is None:
+            raise PathNotFoundError(f"未找到从 {start} 到 {end} 的路径")
+        stations = graph.stations
+        return self.with_transfer_marks([stations[i] for i in nodes])
+
+    def find_path_in_table(self, table: 'RouteTable', start: Station, end: Station,
+                           strategy: str = "min_station") -> List[Union[Station, str]]:
+        """从预计算的全源路径表中回溯路径（不运行搜索）
+
+        Args:
+            table: 与当前网络匹配的路径表
+            start: 起始站点
+            end: 目标站点
+            strategy: 路径策略
+
+        Returns:
+            路径列表，格式与 find_path 相同
+
+        Raises:
+            PathNotFoundError: 无可达路径时抛出
+        """
+        if start == end:
+            return [start]
+        graph = self.network.compile()
+        source = graph.index_of.get(start.id)
+        target = graph.index_of.get(end.id)
+        if source is None or target is None:
+            raise ValueError("起点或终点不属于当前网络")
+        nodes = table.lookup(source, target, strategy)
+        if nodes is None:
+            raise PathNotFoundError(f"未找到从 {start} 到 {end} 的路径")
+        stations = graph.stations
+        return self.with_transfer_marks([stations[i] for i in nodes])
+
+    def find_pareto_paths(self, start: Station, end: Station) -> List[List[Union[Station, str]]]:
+        """一次搜索返回 (换乘次数, 站点数) 意义下全部互不支配的路径
+
+        结果按换乘次数升序：第一条即最少换乘路线，最后一条即最少站点路线。
+
+        Args:
+            start: 起始站点
+            end: 目标站点
+
+        Returns:
+            路径列表的列表，每条路径格式与 find_path 相同
+
+        Raises:
+            ValueError: 起点/终点为 None 或未绑定网络时抛出
+            PathNotFoundError: 无可达路径时抛出
+        """
+        if start is None or end is None:
+            raise ValueError("起点和终点不能为None")
+        if self.network is None:
+            raise ValueError("Pareto 搜索需要先绑定地铁网络")
+        if start == end:
+            return [[start]]
+        graph = self.network.compile()
+        source = graph.index_of.get(start.id)
+        target = graph.index_of.get(end.id)
+        if source is None or target is None:
+            raise ValueError("起点或终点不属于当前网络")
+        results = graph_search.pareto_search(graph, source, target)
+        if not results:
+            raise PathNotFoundError(f"未找到从 {start} 到 {end} 的路径")
+        stations = graph.stations
+        return [self.with_transfer_marks([stations[i] for i in nodes]) for _, _, nodes in results]
+
+    def find_k_paths(self, start: Station, end: Station, k: int = 3,
+                     strategy: str = "min_station") -> List[List[Union[Station, str]]]:
+        """查找前 k 条无环最短路径（Yen 算法，复用到终点的最短路径树）
+
+        Args:
+            start: 起始站点
+            end: 目标站点
+            k: 路径条数
+            strategy: 路径策略
+
+        Returns:
+            路径列表的列表，按代价升序，首条与 find_path 代价相同
+
+        Raises:
+            ValueError: 起点/终点为 None、策略非法或未绑定网络时抛出
+            PathNotFoundError: 无可达路径时抛出
+        """
+        if start is None or end is None:
+            raise ValueError("起点和终点不能为None")
+        if strategy not in {"min_station", "min_transfer"}:
+            raise ValueError(f"不支持的策略: {strategy}")
+        if self.network is None:
+            raise ValueError("多路径搜索需要先绑定地铁网络")
+        if start == end:
+            return [[start]]
+        graph = self.network.compile()
+        source = graph.index_of.get(start.id)
+        target = graph.index_of.get(end.id)
+        if source is None or target is None:
+            raise ValueError("起点或终点不属于当前网络")
+        results = graph_search.k_shortest_paths(graph, source, target, strategy, k)
+        if not results:
+            raise PathNotFoundError(f"未找到从 {start} 到 {end} 的路径")
+        stations = graph.stations
+        return [self.with_transfer_marks([stations[i] for i in nodes]) for _, nodes in results]
+
+    @staticmethod
+    def with_transfer_marks(station_path: List[Station]) -> List[Union[Station, str]]:
+        """插入换乘标记：相邻站点线路名变化时加入"""
         path_with_transfer: List[Union[Station, str]] = []
         for i, station in enumerate(station_path):
             if i > 0:
@@ -95,14 +338,15 @@ class PathFinder:
         
         return path_with_transfer
     
-    def _get_neighbors_with_weight(self, station: Station, strategy: str) -> List[Tuple[Station, float]]:
-        """获取邻居及权重"""
-        neighbors: List[Tuple[Station, float]] = []
-        # 同线路相邻站，权重始终为1
+    def _get_neighbors_with_weight(self, station: Station, strategy: str
+                                   ) -> List[Tuple[Station, Tuple[int, float]]]:
+        """获取邻居及 (换乘次数增量, 站点代价) 权重"""
+        neighbors: List[Tuple[Station, Tuple[int, float]]] = []
+        # 同线路相邻站，站点代价始终为1
         if station.prev_station:
-            neighbors.append((station.prev_station, 1.0))
+            neighbors.append((station.prev_station, (0, 1.0)))
         if station.next_station:
-            neighbors.append((station.next_station, 1.0))
+            neighbors.append((station.next_station, (0, 1.0)))
         # 换乘站
         for transfer in station.transfer_stations:
             weight = self._calc_transfer_weight(station, transfer, strategy)
@@ -111,28 +355,26 @@ class PathFinder:
 
     def _extract_main_line(self, line_name: str) -> str:
         """提取主线名称（去掉支线后缀）"""
-        return line_name.split("(")[0].strip()
+        return extract_main_line(line_name)
 
     def _is_same_family(self, line_a: str, line_b: str) -> bool:
         """判定是否属于同一线路族（主线/支线/包含关系）"""
-        if line_a == line_b:
-            return True
-        if line_a in line_b or line_b in line_a:
-            return True
-        return self._extract_main_line(line_a) == self._extract_main_line(line_b)
+        return is_same_family(line_a, line_b)
 
-    def _calc_transfer_weight(self, current: Station, neighbor: Station, strategy: str) -> float:
-        """计算换乘权重，支持同线/同系零代价换乘"""
-        base_weight = 1.0 if strategy == "min_station" else 1000.0
+    def _calc_transfer_weight(self, current: Station, neighbor: Station, strategy: str) -> Tuple[int, float]:
+        """计算换乘权重 (换乘次数增量, 站点代价)，支持同线/同系近零代价换乘
 
+        跨线路换乘的站点代价视作经过一站；min_transfer 策略下额外计一次换乘，
+        与站点代价按字典序比较，不再依赖大权重近似。
+        """
         # 同名换乘（含环线闭合、主线-支线换乘）
         if current.station_name == neighbor.station_name:
             if current.line_name == neighbor.line_name:
-                return 0.1
+                return 0, 0.1
             if self._is_same_family(current.line_name, neighbor.line_name):
-                return 0.1
+                return 0, 0.1
 
-        return base_weight
+        return (0 if strategy == "min_station" else 1), 1.0
     
     def calculate_transfer_count(self, path: List[Union[Station, str]]) -> int:
         """计算路径中的换乘次数"""
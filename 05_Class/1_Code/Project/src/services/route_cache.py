@@ -0,0 +1,132 @@
+"""路径查询缓存
+
+以 (起点ID, 终点ID, 策略) 为键的有界 LRU 缓存。
+每条缓存都绑定到生成它的 MetroNetwork 版本号，网络被替换或修改后旧结果不会再被返回。
+查询线程与在线更新线程可能同时访问，所有操作都在内部锁中完成。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Union
+
+from models.station import Station
+
+RouteKey = Hashable
+Route = List[Union[Station, str]]
+
+
+class RouteCache:
+    """有界 LRU 路径缓存
+
+    Attributes:
+        max_size: 最大缓存条目数
+        version: 当前缓存内容对应的网络版本号
+        hits: 命中次数
+        misses: 未命中次数
+    """
+
+    def __init__(self, max_size: int = 1024):
+        """初始化缓存
+
+        Args:
+            max_size: 最大缓存条目数，<= 0 表示禁用缓存
+        """
+        self.max_size = max_size
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[RouteKey, Route]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: int, key: RouteKey) -> Optional[Route]:
+        """查询缓存
+
+        Args:
+            version: 当前网络版本号
+            key: (起点ID, 终点ID, 策略)
+
+        Returns:
+            缓存路径的副本；未命中返回 None
+        """
+        with self._lock:
+            if self._stale(version):
+                self.misses += 1
+                return None
+            if version != self.version:
+                self._reset(version)
+            path = self._entries.get(key)
+            if path is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(path)
+
+    def put(self, version: int, key: RouteKey, path: Route) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            if self.max_size <= 0 or self._stale(version):
+                return
+            if version != self.version:
+                self._reset(version)
+            self._entries[key] = list(path)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def migrate(self, old_version: int, new_version: int,
+                remap: Callable[[Route], Optional[Route]]) -> int:
+        """网络增量更新后迁移缓存，而不是整体清空
+
+        Args:
+            old_version: 更新前的网络版本号
+            new_version: 更新后的网络版本号
+            remap: 将旧路径映射到新网络的函数，返回 None 表示该条目失效
+
+        Returns:
+            保留的条目数
+        """
+        with self._lock:
+            if self.version != old_version:
+                self._reset(new_version)
+                return 0
+            kept: "OrderedDict[RouteKey, Route]" = OrderedDict()
+            for key, path in self._entries.items():
+                new_path = remap(path)
+                if new_path is not None:
+                    kept[key] = new_path
+            self._entries = kept
+            self.version = new_version
+            return len(kept)
+
+    def invalidate(self) -> None:
+        """清空缓存（保留命中统计）"""
+        with self._lock:
+            self._entries.clear()
+            self.version = None
+
+    # 以下两个辅助方法由调用方在持有锁时调用
+
+    def _stale(self, version: int) -> bool:
+        # 版本号全局递增：热替换期间仍在旧网络上完成的查询既不读也不写当前缓存
+        return self.version is not None and version < self.version
+
+    def _reset(self, version: int) -> None:
+        self._entries.clear()
+        self.version = version
+
+    def stats(self) -> Dict[str, int]:
+        """返回缓存统计信息"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+__all__ = ["RouteCache"]
@@ -0,0 +1,197 @@
+"""全源路径表
+
+离线为每个站点运行一次单源搜索，把两种策略的前驱矩阵保存为 NumPy 文件，
+在线查询时以内存映射方式打开，沿前驱回溯即可得到路径（O(路径长度)），无需再运行 Dijkstra。
+
+文件布局：
+- ``<数据文件名>.routes.npy``: 形状为 (策略数, 站点数, 站点数) 的前驱矩阵，
+  ``pred[k, s, t]`` 表示策略 k 下从 s 出发的最短路径树中 t 的前驱（不可达为 -1）
+- ``<数据文件名>.routes.json``: 元信息（格式版本、策略顺序、图指纹）
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.compiled_graph import CompiledGraph, GraphTopology, STRATEGIES
+from services import graph_search
+
+FORMAT_VERSION = 1
+
+
+class RouteTableError(Exception):
+    """路径表构建或加载异常"""
+    pass
+
+
+def _ensure_numpy():
+    try:
+        import numpy  # type: ignore
+        return numpy
+    except ImportError as exc:  # pragma: no cover - 环境缺依赖时提示
+        raise RouteTableError("缺少 numpy 库，请先安装: pip install numpy") from exc
+
+
+def default_table_path(data_file: str) -> str:
+    """根据数据文件路径推导路径表文件路径（.npy）"""
+    return os.path.splitext(data_file)[0] + '.routes.npy'
+
+
+def _meta_path(table_path: str) -> str:
+    return os.path.splitext(table_path)[0] + '.json'
+
+
+# 子进程中的只读图数据（由 _init_worker 设置）
+_worker_graph: Optional[GraphTopology] = None
+_worker_weights: Dict[str, Sequence[int]] = {}
+
+
+def _init_worker(topology: GraphTopology, weights: Dict[str, Sequence[int]]) -> None:
+    global _worker_graph, _worker_weights
+    _worker_graph = topology
+    _worker_weights = weights
+
+
+def _solve_sources(sources: List[int]) -> List[Tuple[int, str, List[int]]]:
+    """子进程任务：对一批起点运行全部策略的单源搜索"""
+    results = []
+    for source in sources:
+        for strategy in STRATEGIES:
+            pred = graph_search.single_source(_worker_graph, source, _worker_weights[strategy])
+            results.append((source, strategy, pred))
+    return results
+
+
+class RouteTable:
+    """预计算的全源前驱矩阵
+
+    Attributes:
+        pred: 前驱矩阵（numpy 数组或内存映射）
+        strategies: 矩阵第一维对应的策略顺序
+        fingerprint: 生成时的图指纹
+    """
+
+    def __init__(self, pred, strategies: Sequence[str], fingerprint: str):
+        self.pred = pred
+        self.strategies = list(strategies)
+        self.fingerprint = fingerprint
+        self._strategy_index = {name: i for i, name in enumerate(self.strategies)}
+
+    @classmethod
+    def build(cls, graph: CompiledGraph, workers: Optional[int] = None,
+              chunk_size: int = 16) -> 'RouteTable':
+        """构建全源路径表
+
+        Args:
+            graph: 编译后的整数图
+            workers: 进程数，None 为 CPU 核数，1 表示在当前进程中计算
+            chunk_size: 每个子任务包含的起点数
+
+        Returns:
+            内存中的路径表
+        """
+        np = _ensure_numpy()
+        n = graph.node_count
+        dtype = np.int16 if n < np.iinfo(np.int16).max else np.int32
+        pred = np.full((len(STRATEGIES), n, n), -1, dtype=dtype)
+        strategy_index = {name: i for i, name in enumerate(STRATEGIES)}
+
+        topology = graph.topology()
+        weights = {strategy: graph.get_weights(strategy) for strategy in STRATEGIES}
+        chunks = [list(range(i, min(i + chunk_size, n))) for i in range(0, n, chunk_size)]
+
+        def store(results):
+            for source, strategy, row in results:
+                pred[strategy_index[strategy], source] = row
+
+        if workers == 1:
+            _init_worker(topology, weights)
+            for chunk in chunks:
+                store(_solve_sources(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(topology, weights)) as executor:
+                for results in executor.map(_solve_sources, chunks):
+                    store(results)
+
+        return cls(pred, STRATEGIES, graph.fingerprint())
+
+    def save(self, table_path: str) -> None:
+        """保存前驱矩阵和元信息
+
+        前驱矩阵先写临时文件再替换：旧文件可能仍被内存映射，不能原地截断。
+        """
+        np = _ensure_numpy()
+        os.makedirs(os.path.dirname(table_path) or '.', exist_ok=True)
+        tmp_path = table_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, self.pred)
+        os.replace(tmp_path, table_path)
+        self.save_meta(table_path)
+
+    def save_meta(self, table_path: str) -> None:
+        """只写元信息（前驱矩阵未变时使用，如 rebind 之后）"""
+        meta = {
+            'version': FORMAT_VERSION,
+            'strategies': self.strategies,
+            'fingerprint': self.fingerprint,
+        }
+        with open(_meta_path(table_path), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, table_path: str, graph: CompiledGraph) -> 'RouteTable':
+        """以内存映射方式加载路径表
+
+        Args:
+            table_path: .npy 文件路径
+            graph: 当前网络的编译图，用于校验指纹
+
+        Raises:
+            RouteTableError: 文件缺失、版本不符或与当前网络不匹配时抛出
+        """
+        np = _ensure_numpy()
+        try:
+            with open(_meta_path(table_path), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            pred = np.load(table_path, mmap_mode='r')
+        except (OSError, ValueError) as exc:
+            raise RouteTableError(f"无法读取路径表: {exc}") from exc
+
+        if meta.get('version') != FORMAT_VERSION:
+            raise RouteTableError("路径表格式版本不匹配，请重新预计算")
+        if meta.get('fingerprint') != graph.fingerprint():
+            raise RouteTableError("路径表与当前线路数据不匹配，请重新预计算")
+        return cls(pred, meta['strategies'], meta['fingerprint'])
+
+    def rebind(self, graph: CompiledGraph) -> 'RouteTable':
+        """绑定到拓扑相同（站点下标、邻接数组与权重一致，仅站点ID或站名不同）的新图
+
+        前驱矩阵只含节点下标，直接共用，只更新指纹。
+        """
+        return RouteTable(self.pred, self.strategies, graph.fingerprint())
+
+    def has_strategy(self, strategy: str) -> bool:
+        """是否包含指定策略"""
+        return strategy in self._strategy_index
+
+    def lookup(self, source: int, target: int, strategy: str) -> Optional[List[int]]:
+        """回溯 source -> target 的节点序列
+
+        Returns:
+            节点下标序列；不可达时返回 None
+        """
+        row = self.pred[self._strategy_index[strategy], source]
+        if row[target] < 0:
+            return None
+        nodes = [target]
+        node = target
+        while node != source:
+            node = int(row[node])
+            nodes.append(node)
+        nodes.reverse()
+        return nodes
+
+
+__all__ = ["RouteTable", "RouteTableError", "default_table_path"]
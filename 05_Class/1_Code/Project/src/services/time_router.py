@@ -0,0 +1,275 @@
+"""时间相关路径（最早到达）
+
+在编译后的整数图上运行连接扫描算法（CSA）：
+按线路的站点顺序和发车参数（首末班、发车间隔、区间运行时间、停站时间）生成全天的列车连接，
+按出发时间排序保存在整数数组中；查询时从出发时刻起顺序扫描一次即可得到最早到达时间和行程。
+换乘视为同名站台之间的步行（footpath），步行时间可逐站配置。
+
+时刻参数文件（默认 ``doc/时刻.csv``）字段：``类型,线路,站点,目标线路,目标站点,秒数,首班,末班``
+
+* ``区间,1号线,莘庄,外环路,,150,,``：相邻两站的运行时间（双向）
+* ``换乘,1号线,人民广场,2号线,,240,,``：换乘步行时间（双向，目标站点缺省为同名站）
+* ``发车,1号线,,,,180,05:30,23:00``：发车间隔与首末班时间（两个方向相同）
+
+未列出的部分使用 config 中的缺省值，文件不存在时全部使用缺省值。
+"""
+
+import csv
+import os
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from models.compiled_graph import CompiledGraph
+from config import (DEFAULT_RUN_SECONDS, DEFAULT_DWELL_SECONDS, DEFAULT_WALK_SECONDS,
+                    SAME_FAMILY_WALK_SECONDS, DEFAULT_HEADWAY_SECONDS, DEFAULT_FIRST_TRAIN,
+                    DEFAULT_LAST_TRAIN)
+
+DAY_SECONDS = 24 * 3600
+INF = float('inf')
+
+
+class TimetableError(Exception):
+    """时刻参数文件格式错误"""
+
+
+def parse_clock(text: str) -> int:
+    """将 "HH:MM" 或 "HH:MM:SS" 转为当日秒数
+
+    Raises:
+        ValueError: 格式错误时抛出
+    """
+    try:
+        parts = [int(part) for part in text.strip().split(':')]
+    except ValueError:
+        raise ValueError(f"时间格式应为 HH:MM: {text}") from None
+    if len(parts) not in (2, 3) or not 0 <= parts[0] < 48 or not all(0 <= p < 60 for p in parts[1:]):
+        raise ValueError(f"时间格式应为 HH:MM: {text}")
+    hours, minutes = parts[0], parts[1]
+    seconds = parts[2] if len(parts) == 3 else 0
+    return hours * 3600 + minutes * 60 + seconds
+
+
+class TimeRouter:
+    """基于连接扫描的最早到达查询
+
+    Attributes:
+        graph: 编译后的整数图（节点下标即站点下标）
+        patterns: 列车运行模式，每个为按行驶顺序排列的节点下标（每条线路两个方向）
+        dep / arr: 连接的出发 / 到达时刻（秒），按出发时刻升序
+        frm / to: 连接的起止节点
+        trip: 连接所属车次
+        pos: 连接起点在所属模式中的位置
+        trip_pattern: 车次 -> 运行模式
+        footpaths: 节点 -> [(同名站台节点, 步行秒数), ...]
+    """
+
+    def __init__(self, graph: CompiledGraph, timetable_path: Optional[str] = None):
+        """生成全天连接
+
+        Args:
+            graph: 编译后的整数图
+            timetable_path: 时刻参数文件，None 或文件不存在时全部使用缺省值
+
+        Raises:
+            TimetableError: 文件格式错误或引用了不存在的线路/站点时抛出
+        """
+        self.graph = graph
+        self._node_of: Dict[Tuple[str, str], int] = {}
+        for node, station in enumerate(graph.stations):
+            self._node_of.setdefault((station.line_name, station.station_name), node)
+        self._run: Dict[Tuple[int, int], int] = {}
+        self._walk: Dict[Tuple[int, int], int] = {}
+        self._service: Dict[str, Tuple[int, int, int]] = {}
+        if timetable_path and os.path.exists(timetable_path):
+            self._read(timetable_path)
+
+        self.patterns = self._build_patterns()
+        self.footpaths = self._build_footpaths()
+        self._build_connections()
+
+    # ------------------------------------------------------------------
+    # 参数读取与连接生成
+    # ------------------------------------------------------------------
+
+    def _node(self, line_name: str, station_name: str, line_no: int) -> int:
+        node = self._node_of.get((line_name, station_name))
+        if node is None:
+            raise TimetableError(f"第 {line_no} 行：未找到站点 {line_name}，{station_name}")
+        return node
+
+    def _read(self, path: str) -> None:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                for line_no, row in enumerate(reader, 2):
+                    self._read_row(row, line_no)
+        except (KeyError, ValueError) as e:
+            raise TimetableError(f"时刻参数文件格式错误: {e}") from e
+
+    def _read_row(self, row: Dict[str, str], line_no: int) -> None:
+        kind = row['类型'].strip()
+        line_name = row['线路'].strip()
+        if kind == '区间':
+            a = self._node(line_name, row['站点'].strip(), line_no)
+            b = self._node(line_name, row['目标站点'].strip(), line_no)
+            self._run[(a, b)] = self._run[(b, a)] = int(row['秒数'])
+        elif kind == '换乘':
+            station_name = row['站点'].strip()
+            a = self._node(line_name, station_name, line_no)
+            b = self._node(row['目标线路'].strip(), row['目标站点'].strip() or station_name, line_no)
+            self._walk[(a, b)] = self._walk[(b, a)] = int(row['秒数'])
+        elif kind == '发车':
+            if not any(key[0] == line_name for key in self._node_of):
+                raise TimetableError(f"第 {line_no} 行：未找到线路 {line_name}")
+            first = parse_clock(row['首班'] or DEFAULT_FIRST_TRAIN)
+            last = parse_clock(row['末班'] or DEFAULT_LAST_TRAIN)
+            if last < first:  # 末班车在午夜之后
+                last += DAY_SECONDS
+            self._service[line_name] = (int(row['秒数'] or DEFAULT_HEADWAY_SECONDS), first, last)
+        else:
+            raise TimetableError(f"第 {line_no} 行：未知类型 {kind}")
+
+    def _build_patterns(self) -> List[List[int]]:
+        """沿 next_station 链得到每条线路的站点顺序，正反两个方向各为一个运行模式"""
+        index_of = self.graph.index_of
+        patterns = []
+        for node, station in enumerate(self.graph.stations):
+            if station.prev_station is not None or station.next_station is None:
+                continue
+            nodes = [node]
+            current = station.next_station
+            while current is not None:
+                nodes.append(index_of[current.id])
+                current = current.next_station
+            patterns.append(nodes)
+            patterns.append(nodes[::-1])
+        return patterns
+
+    def _build_footpaths(self) -> List[List[Tuple[int, int]]]:
+        """同名站台之间的换乘边即步行边（同名站点两两相连，满足 CSA 对步行边传递闭包的要求）"""
+        graph = self.graph
+        footpaths: List[List[Tuple[int, int]]] = [[] for _ in range(graph.node_count)]
+        for u in range(graph.node_count):
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                v = graph.targets[e]
+                if graph.name_index[u] != graph.name_index[v]:
+                    continue
+                default = DEFAULT_WALK_SECONDS if graph.transfer_edges[e] else SAME_FAMILY_WALK_SECONDS
+                footpaths[u].append((v, self._walk.get((u, v), default)))
+        return footpaths
+
+    def _build_connections(self) -> None:
+        stations = self.graph.stations
+        default_service = (DEFAULT_HEADWAY_SECONDS, parse_clock(DEFAULT_FIRST_TRAIN),
+                           parse_clock(DEFAULT_LAST_TRAIN))
+        connections = []
+        self.trip_pattern = array('i')
+        for pattern_id, nodes in enumerate(self.patterns):
+            headway, first, last = self._service.get(stations[nodes[0]].line_name, default_service)
+            # 相对发车时刻的 (出发, 到达) 偏移
+            offsets = []
+            elapsed = 0
+            for u, v in zip(nodes, nodes[1:]):
+                run = self._run.get((u, v), DEFAULT_RUN_SECONDS)
+                offsets.append((elapsed, elapsed + run))
+                elapsed += run + DEFAULT_DWELL_SECONDS
+            for start in range(first, last + 1, max(headway, 1)):
+                trip_id = len(self.trip_pattern)
+                self.trip_pattern.append(pattern_id)
+                for position, (dep_offset, arr_offset) in enumerate(offsets):
+                    connections.append((start + dep_offset, start + arr_offset,
+                                        nodes[position], nodes[position + 1], trip_id, position))
+        connections.sort()
+        self.dep = array('i', (c[0] for c in connections))
+        self.arr = array('i', (c[1] for c in connections))
+        self.frm = array('i', (c[2] for c in connections))
+        self.to = array('i', (c[3] for c in connections))
+        self.trip = array('i', (c[4] for c in connections))
+        self.pos = array('i', (c[5] for c in connections))
+
+    @property
+    def connection_count(self) -> int:
+        return len(self.dep)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def earliest_arrival(self, source: int, target: int,
+                         depart: int) -> Optional[Tuple[int, List[int]]]:
+        """从 source 于 depart 时刻出发，到达 target 的最早时刻及经过的节点
+
+        Args:
+            source: 起点节点下标
+            target: 终点节点下标
+            depart: 出发时刻（当日秒数）
+
+        Returns:
+            (到达时刻, 节点序列)；当天已无可达列车时返回 None
+        """
+        n = self.graph.node_count
+        arrival = [INF] * n
+        via_conn = [-1] * n       # 经由哪条连接到达
+        via_walk = [-1] * n       # 经由哪个节点步行到达
+        boarded: Dict[int, int] = {}  # 车次 -> 上车连接
+        footpaths = self.footpaths
+
+        arrival[source] = depart
+        for v, walk in footpaths[source]:
+            if depart + walk < arrival[v]:
+                arrival[v] = depart + walk
+                via_walk[v] = source
+
+        dep, arr, frm, to, trip = self.dep, self.arr, self.frm, self.to, self.trip
+        for i in range(bisect_left(dep, depart), len(dep)):
+            d = dep[i]
+            if d >= arrival[target]:
+                break
+            t = trip[i]
+            if t not in boarded:
+                if arrival[frm[i]] > d:
+                    continue
+                boarded[t] = i
+            a = arr[i]
+            v = to[i]
+            if a < arrival[v]:
+                arrival[v] = a
+                via_conn[v] = i
+                via_walk[v] = -1
+                for w, walk in footpaths[v]:
+                    if a + walk < arrival[w]:
+                        arrival[w] = a + walk
+                        via_walk[w] = v
+                        via_conn[w] = -1
+
+        if arrival[target] == INF:
+            return None
+        return int(arrival[target]), self._reconstruct(source, target, via_conn, via_walk, boarded)
+
+    def _reconstruct(self, source: int, target: int, via_conn: List[int],
+                     via_walk: List[int], boarded: Dict[int, int]) -> List[int]:
+        segments: List[List[int]] = []
+        v = target
+        while v != source:
+            if via_walk[v] >= 0:
+                segments.append([via_walk[v], v])
+                v = via_walk[v]
+                continue
+            exit_conn = via_conn[v]
+            board_conn = boarded[self.trip[exit_conn]]
+            nodes = self.patterns[self.trip_pattern[self.trip[exit_conn]]]
+            segments.append(nodes[self.pos[board_conn]:self.pos[exit_conn] + 2])
+            v = self.frm[board_conn]
+        path = [source]
+        for segment in reversed(segments):
+            path.extend(segment[1:])
+        return path
+
+
+def default_timetable_path(data_file: str) -> str:
+    """线路数据文件旁的时刻参数文件路径"""
+    return os.path.join(os.path.dirname(data_file), '时刻.csv')
+
+
+__all__ = ["TimeRouter", "TimetableError", "parse_clock", "default_timetable_path"]
@@ -64,6 +64,25 @@ class Formatter:
         summary = f"\n\n路径摘要：\n经过站点数：{station_count}\n换乘次数：{transfer_count}"
         return path_str + summary
     
+    @staticmethod
+    def format_timed_path(path: List[Union[Station, str]], depart: int, arrival: int) -> str:
+        """格式化带出发/到达时刻的路径
+
+        Args:
+            path: 路径列表
+            depart: 出发时刻（当日秒数）
+            arrival: 到达时刻（当日秒数）
+
+        Returns:
+            路径字符串，末尾附出发、到达时刻和全程用时
+        """
+        def clock(seconds: int) -> str:
+            return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}"
+
+        minutes = (arrival - depart + 59) // 60
+        summary = f"\n\n出发：{clock(depart)}  到达：{clock(arrival)}  全程约 {minutes} 分钟"
+        return Formatter.format_path(path) + summary
+
     @staticmethod
     def format_error(error_message: str) -> str:
         """格式化错误消息
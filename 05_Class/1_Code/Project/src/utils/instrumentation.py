@@ -0,0 +1,196 @@
+"""请求级性能埋点
+
+按请求记录各阶段耗时（解析、站点定位、搜索、格式化……）和计数（出堆节点数、入堆次数、缓存命中等），
+可逐请求输出一行 JSON 日志，也可汇总为 Prometheus 文本格式。
+
+用法::
+
+    tracer = Tracer(enabled=True, stream=sys.stderr)
+    with tracer.request("query") as trace:
+        with trace.stage("parse"):
+            ...
+        trace.count("settled", 42)
+
+同一线程内嵌套的 ``request()`` 复用最外层的 trace，因此内层方法无需传递 trace 对象，
+也可通过 ``tracer.current()`` 取得当前 trace。未启用时 ``request()``、``stage()`` 返回共享的空对象，
+每处埋点只多一次方法调用。汇总数据只在当前进程内累计。
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Optional, TextIO
+
+
+class Trace:
+    """单个请求的阶段耗时（秒，同名阶段累加）与计数"""
+
+    __slots__ = ('name', 'stages', 'counters')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    def stage(self, name: str) -> '_Stage':
+        """返回计时上下文，退出时把耗时累加到该阶段"""
+        return _Stage(self, name)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """计数加 n"""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+
+class _Stage:
+    __slots__ = ('trace', 'name', 'start')
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self) -> '_Stage':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        stages = self.trace.stages
+        stages[self.name] = stages.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+class _NullTrace:
+    """未启用时使用的空 trace"""
+
+    __slots__ = ()
+    name = None
+
+    def stage(self, name: str) -> '_NullTrace':
+        return self
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def __enter__(self) -> '_NullTrace':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class _Request:
+    __slots__ = ('tracer', 'name', 'trace', 'start', 'outermost')
+
+    def __init__(self, tracer: 'Tracer', name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self) -> Trace:
+        local = self.tracer._local
+        current = getattr(local, 'trace', None)
+        self.outermost = current is None
+        if self.outermost:
+            current = local.trace = Trace(self.name)
+            self.start = time.perf_counter()
+        self.trace = current
+        return current
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.outermost:
+            self.tracer._local.trace = None
+            self.tracer._record(self.trace, time.perf_counter() - self.start,
+                                exc_type.__name__ if exc_type else None)
+
+
+class Tracer:
+    """埋点入口与进程内汇总
+
+    Attributes:
+        enabled: 是否启用
+        stream: 逐请求 JSON 日志的输出流，None 表示只做汇总
+    """
+
+    def __init__(self, enabled: bool = False, stream: Optional[TextIO] = None):
+        self.enabled = enabled
+        self.stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._requests: Dict[str, list] = {}   # 请求名 -> [次数, 总耗时, 出错次数]
+        self._stages: Dict[str, list] = {}     # 阶段名 -> [次数, 总耗时]
+        self._counters: Dict[str, int] = {}
+
+    def request(self, name: str):
+        """开始（或在同一线程内复用）一个请求 trace，作为上下文管理器使用"""
+        if not self.enabled:
+            return NULL_TRACE
+        return _Request(self, name)
+
+    def current(self):
+        """当前线程正在进行的 trace；没有或未启用时返回空 trace"""
+        if not self.enabled:
+            return NULL_TRACE
+        return getattr(self._local, 'trace', None) or NULL_TRACE
+
+    def _record(self, trace: Trace, total: float, error: Optional[str]) -> None:
+        with self._lock:
+            entry = self._requests.setdefault(trace.name, [0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += total
+            entry[2] += error is not None
+            for name, seconds in trace.stages.items():
+                stage = self._stages.setdefault(name, [0, 0.0])
+                stage[0] += 1
+                stage[1] += seconds
+            for name, n in trace.counters.items():
+                self._counters[name] = self._counters.get(name, 0) + n
+            if self.stream is not None:
+                record = {
+                    'request': trace.name,
+                    'total_ms': round(total * 1000, 3),
+                    'stages_ms': {name: round(s * 1000, 3) for name, s in trace.stages.items()},
+                    'counters': trace.counters,
+                }
+                if error:
+                    record['error'] = error
+                self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.stream.flush()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """汇总数据：requests / stages 为 {名称: {count, seconds}}，counters 为 {名称: 累计值}"""
+        with self._lock:
+            return {
+                'requests': {name: {'count': c, 'seconds': s, 'errors': e}
+                             for name, (c, s, e) in self._requests.items()},
+                'stages': {name: {'count': c, 'seconds': s} for name, (c, s) in self._stages.items()},
+                'counters': dict(self._counters),
+            }
+
+    def render(self, prefix: str = "metro") -> str:
+        """输出 Prometheus 文本格式"""
+        data = self.snapshot()
+        lines = [f"# TYPE {prefix}_request_seconds summary"]
+        for name, item in data['requests'].items():
+            lines.append(f'{prefix}_request_seconds_sum{{request="{name}"}} {item["seconds"]:.6f}')
+            lines.append(f'{prefix}_request_seconds_count{{request="{name}"}} {item["count"]}')
+        lines.append(f"# TYPE {prefix}_request_errors_total counter")
+        for name, item in data['requests'].items():
+            lines.append(f'{prefix}_request_errors_total{{request="{name}"}} {item["errors"]}')
+        lines.append(f"# TYPE {prefix}_stage_seconds summary")
+        for name, item in data['stages'].items():
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {item["seconds"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {item["count"]}')
+        lines.append(f"# TYPE {prefix}_events_total counter")
+        for name, value in data['counters'].items():
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """清空汇总数据"""
+        with self._lock:
+            self._requests.clear()
+            self._stages.clear()
+            self._counters.clear()
+
+
+__all__ = ["Tracer", "Trace", "NULL_TRACE"]
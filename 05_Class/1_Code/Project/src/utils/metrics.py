@@ -0,0 +1,90 @@
+"""跨进程共享的延迟直方图
+
+计数保存在 multiprocessing 共享内存中：在父进程创建后 fork 出的各工作进程写入同一份计数，
+任一进程都能输出全部进程的汇总结果（Prometheus 文本格式）。
+"""
+
+import multiprocessing
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# 默认桶边界（秒）
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class LatencyHistogram:
+    """按端点与状态分类的累积延迟直方图
+
+    Attributes:
+        name: 指标名
+        buckets: 桶上界（秒，升序，+Inf 隐含在末尾）
+        labels: 允许的 (端点, 状态) 标签组合
+    """
+
+    def __init__(self, name: str, labels: Iterable[Tuple[str, str]],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """初始化直方图（须在 fork 工作进程之前创建）
+
+        Args:
+            name: 指标名，如 "http_request_duration_seconds"
+            labels: 全部 (端点, 状态) 组合，共享内存按此预先分配
+            buckets: 桶上界
+        """
+        self.name = name
+        self.buckets = tuple(sorted(buckets))
+        self.labels: List[Tuple[str, str]] = list(labels)
+        self._slot: Dict[Tuple[str, str], int] = {label: i for i, label in enumerate(self.labels)}
+        # 每个标签：len(buckets) + 1 个桶计数（最后一个为 +Inf），随后是总数
+        self._width = len(self.buckets) + 2
+        self._counts = multiprocessing.Array('q', len(self.labels) * self._width)
+        self._sums = multiprocessing.Array('d', len(self.labels), lock=self._counts.get_lock())
+
+    def observe(self, endpoint: str, status: str, seconds: float) -> None:
+        """记录一次请求耗时；未登记的标签组合被忽略"""
+        slot = self._slot.get((endpoint, status))
+        if slot is None:
+            return
+        base = slot * self._width
+        bucket = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                bucket = i
+                break
+        with self._counts.get_lock():
+            counts = self._counts.get_obj()
+            counts[base + bucket] += 1
+            counts[base + self._width - 1] += 1
+            self._sums.get_obj()[slot] += seconds
+
+    def snapshot(self) -> Dict[Tuple[str, str], Dict[str, object]]:
+        """各标签的 (非累积) 桶计数、总数与耗时和"""
+        with self._counts.get_lock():
+            counts = list(self._counts.get_obj())
+            sums = list(self._sums.get_obj())
+        result = {}
+        for slot, label in enumerate(self.labels):
+            base = slot * self._width
+            result[label] = {
+                'buckets': counts[base:base + len(self.buckets) + 1],
+                'count': counts[base + self._width - 1],
+                'sum': sums[slot],
+            }
+        return result
+
+    def render(self) -> str:
+        """输出 Prometheus 文本格式（只输出有记录的标签）"""
+        lines = [f"# TYPE {self.name} histogram"]
+        for (endpoint, status), data in self.snapshot().items():
+            if not data['count']:
+                continue
+            tags = f'endpoint="{endpoint}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), data['buckets']):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{{{tags},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{tags}}} {data['sum']:.6f}")
+            lines.append(f"{self.name}_count{{{tags}}} {data['count']}")
+        return "\n".join(lines) + "\n"
+
+
+__all__ = ["LatencyHistogram", "DEFAULT_BUCKETS"]